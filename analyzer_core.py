@@ -0,0 +1,677 @@
+import os
+import re
+import sys
+import json
+import logging
+from array import array
+from collections import Counter, deque
+from itertools import compress
+from datetime import datetime
+
+from comment_batch import CommentView, as_view, select
+from instrumentation import RunReport, configure_logging, logger
+from page_loader import read_text
+
+# 단계 순서, 스냅샷에서 이어서 실행할 때 사용
+STAGES = (
+    "get_comments",
+    "overdue_comments",
+    "find_email",
+    "near_duplicate_comments",
+    "find_duplicate_comments",
+    "exclude_past_winners",
+    "random_picker",
+)
+
+
+class CommentAnalyzer:
+    """
+    Headless core of the comment picker: settings, pipeline stages and saving.
+    Nothing here touches tkinter; errors are raised and left to the caller (GUI, CLI, batch)
+    to report. Modules only needed by some stages are imported when the stage runs.
+    """
+
+    def __init__(self, settings_file="settings.json"):
+        self.settings_file = settings_file
+        if not os.path.exists(settings_file):
+            self._create_settings()
+        self._get_settings()
+        # 진행 상황을 받을 함수 (done, total), 백그라운드 실행 시 GUI가 설정
+        self.progress = None
+        self.report = RunReport(self.html_name, self.trace_memory)
+        # 추첨 기록에서 이번 실행(페이지 + 날짜)의 id, 처음 기록할 때 정함
+        self._giveaway_id = None
+        self.end_date = None
+
+    def _create_settings(self):
+        """
+        Create settings.json file
+        """
+        settings = {
+            "html_name": "comments.html",
+            "email_types": [
+                "\uc9c0\uba54\uc77c",
+                "\ub124\uc774\ubc84",
+                "\ud56b\uba54\uc77c",
+                "\uc544\uc6c3\ub8e9",
+                "\ud55c\uba54\uc77c",
+                "\ub2e4\uc74c",
+            ],
+            "pick_number": 3,
+            "show_process": True,
+            "grace_period": 1,
+            "email_aliases": {},
+            "dedupe_normalization": [],
+            "remove_near_duplicates": False,
+            "near_duplicate_threshold": 0.8,
+            "near_duplicate_min_length": 20,
+            "use_cache": True,
+            "cache_max_mb": 200,
+            "log_level": "DEBUG",
+            "trace_memory": False,
+            "save_run_report": True,
+            "show_stage_summary": False,
+            "fast_parse": True,
+            "export_format": "csv",
+            "compress_exports": False,
+            "save_snapshots": False,
+            "parse_workers": 1,
+            "save_history": True,
+            "history_file": "data/history.sqlite3",
+            "exclude_recent_winners": 0,
+            "stream_pipeline": False,
+            "watch_interval": 1,
+            "watch_debounce": 2,
+        }
+        with open(self.settings_file, "w", encoding="utf-8") as file:
+            json.dump(settings, file, indent=4)
+
+    def _get_settings(self):
+        """
+        Load settings from settings.json file
+        html_name: 댓글들이 달린 HTML 파일 저장 이름
+        email_types: 댓글에서 이메일을 추출할 때 분류되는 이메일 종류
+        pick_number: 추첨할 댓글의 개수
+        show_process: 중간 과정을 출력할지 여부 (콘솔에 출력이라 gui에서는 사용하지 않음)
+        grace_period: 종료일자 이후 며칠까지 댓글 가져올지
+        email_aliases: 이메일 종류별 다른 표기 (예: {"지메일": ["gmail", "G메일"]}), 원래 종류와 같은 우선순위
+        dedupe_normalization: 중복 판단 기준 (casefold: 대소문자 무시, plus_tag: +태그 무시, gmail_dots: 지메일 점 무시, provider: 이메일 종류까지 같아야 중복)
+        remove_near_duplicates: 거의 같은 내용의 댓글(봇 도배)을 묶어서 제외할지
+        near_duplicate_threshold: 이 값 이상 비슷한 댓글들을 같은 묶음으로 봄 (0~1)
+        near_duplicate_min_length: 이보다 짧은 댓글은 유사 댓글 검사에서 제외 (글자 수)
+        use_cache: 같은 HTML 파일을 다시 파싱하지 않도록 cache 폴더에 결과를 저장할지
+        cache_max_mb: cache 폴더의 최대 크기 (MB), 넘으면 오래 안 쓴 페이지부터 삭제
+        log_level: 콘솔 출력 수준 (DEBUG: 댓글별 중간 과정까지, INFO: 단계별 요약과 추첨 결과, WARNING: 출력 안 함), 없으면 show_process에 따라 DEBUG/INFO
+        trace_memory: 단계별 최대 메모리 사용량을 측정할지 (tracemalloc, 켜면 느려짐)
+        save_run_report: 자동 실행/추첨이 끝나면 단계별 시간과 행 수를 data 폴더에 json으로 저장할지
+        show_stage_summary: gui 결과 칸에 단계별 실행 시간 요약을 보여줄지
+        fast_parse: 표준 저장 페이지면 HTML 파서 대신 빠른 추출을 사용할지 (형식이 다르면 자동으로 전체 파서 사용)
+        export_format: 단계 저장 형식 (csv: 엑셀에서 열림, ndjson: 한 줄에 json 하나, txt: 예전 "a, b, c" 형식)
+        compress_exports: 단계 저장 파일을 gzip으로 압축할지 (.gz)
+        save_snapshots: 단계 저장 시 다시 파싱하지 않고 그 단계부터 이어서 실행할 수 있는 .snapshot 파일도 저장할지
+        parse_workers: 큰 페이지(16MB 이상)를 나눠서 동시에 파싱할 프로세스 수 (1: 사용 안 함, 0: CPU 코어 수)
+        save_history: 단계별 행 수, 중복 제거 후 참여자, 당첨자를 추첨 기록(SQLite)에 남길지
+        history_file: 추첨 기록 파일 경로 (python history_store.py로 조회)
+        exclude_recent_winners: 최근 몇 번의 추첨에서 당첨된 사람을 추첨 전에 제외할지 (0: 제외 안 함, save_history가 켜져 있어야 함)
+        stream_pipeline: 자동 실행을 댓글 하나씩 흘려보내는 방식으로 할지 (아주 큰 페이지용, 메모리는 중복 판단 키만큼만 사용, 유사 댓글 제외와 함께 쓸 수 없음)
+        watch_interval: 변경 감시 중 페이지 파일을 확인하는 간격 (초)
+        watch_debounce: 페이지 파일이 바뀐 뒤 이 시간(초) 동안 그대로면 저장이 끝난 것으로 보고 다시 실행
+        """
+        self.settings = json.loads(read_text(self.settings_file))
+        self.html_name = self.settings["html_name"]
+        self.email_types = self.settings["email_types"]
+        self.pick_number = self.settings["pick_number"]
+        self.show_process = self.settings["show_process"]
+        self.grace_period = self.settings["grace_period"]
+        self.email_aliases = self.settings.get("email_aliases", {})
+        self.dedupe_normalization = self.settings.get("dedupe_normalization", [])
+        self.remove_near_duplicates = self.settings.get("remove_near_duplicates", False)
+        self.near_duplicate_threshold = self.settings.get(
+            "near_duplicate_threshold", 0.8
+        )
+        self.near_duplicate_min_length = self.settings.get(
+            "near_duplicate_min_length", 20
+        )
+        self.use_cache = self.settings.get("use_cache", True)
+        self.cache_max_mb = self.settings.get("cache_max_mb", 200)
+        self.log_level = self.settings.get(
+            "log_level", "DEBUG" if self.show_process else "INFO"
+        )
+        self.trace_memory = self.settings.get("trace_memory", False)
+        self.save_run_report = self.settings.get("save_run_report", True)
+        self.show_stage_summary = self.settings.get("show_stage_summary", False)
+        self.fast_parse = self.settings.get("fast_parse", True)
+        self.export_format = self.settings.get("export_format", "csv")
+        self.compress_exports = self.settings.get("compress_exports", False)
+        self.save_snapshots = self.settings.get("save_snapshots", False)
+        self.parse_workers = self.settings.get("parse_workers", 1)
+        self.save_history = self.settings.get("save_history", True)
+        self.history_file = self.settings.get("history_file", "data/history.sqlite3")
+        self.exclude_recent_winners = self.settings.get("exclude_recent_winners", 0)
+        self.stream_pipeline = self.settings.get("stream_pipeline", False)
+        self.watch_interval = self.settings.get("watch_interval", 1)
+        self.watch_debounce = self.settings.get("watch_debounce", 2)
+        # 별칭이 바뀌었을 수 있으므로 다음 기록 때 다시 엶
+        self._history = None
+        self._exclusion = None
+        configure_logging(self.log_level)
+
+    def _report(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+    def _history_giveaway(self):
+        """
+        History store and the id of the current run in it, opened on first use
+        """
+        from history_store import HistoryStore
+
+        if self._history is None:
+            self._history = HistoryStore(self.history_file, self.email_aliases)
+        if self._giveaway_id is None:
+            self._giveaway_id = self._history.begin_giveaway(
+                self.html_name, end_date=self.end_date
+            )
+        return self._history, self._giveaway_id
+
+    def _winner_exclusion(self):
+        from winner_exclusion import WinnerExclusion
+
+        history, _ = self._history_giveaway()
+        if (
+            self._exclusion is None
+            or self._exclusion.giveaways != self.exclude_recent_winners
+        ):
+            self._exclusion = WinnerExclusion(history, self.exclude_recent_winners)
+        return self._exclusion
+
+    def _record_history(self, record, entrants=None, winners=None):
+        """
+        Write a finished stage to the history store (save_history)
+        :param record: stage record of the report, entrants: entries left after removing duplicates, winners: picked emails
+        """
+        if not self.save_history:
+            return
+        history, giveaway_id = self._history_giveaway()
+        history.record_stage(giveaway_id, record, entrants, winners)
+        if winners is not None:
+            # 다음 추첨에서 바로 제외되도록 제외 목록에 더함, 제외를 꺼 둔 동안 뽑은 당첨자도
+            # 나중에 켰을 때 빠지지 않도록 항상 더함 (목록 파일이 아직 없으면 하지 않음)
+            self._winner_exclusion().add_draw(giveaway_id)
+
+    def get_comments(self):
+        """
+        Get comments from the HTML file
+        :return: comments[time, comment, email type] (CommentView over the parsed CommentBatch)
+        :raise FileNotFoundError: html_name does not exist
+        """
+        from parse_cache import ParseCache, load_comment_batch
+        from sharded_parser import resolve_workers
+
+        # 댓글을 새로 가져오면 새 실행으로 봄
+        self.report = RunReport(self.html_name, self.trace_memory)
+        self._giveaway_id = None
+        self.end_date = None
+        with self.report.stage("get_comments") as stage:
+            cache = (
+                ParseCache(max_bytes=self.cache_max_mb * 1024 * 1024)
+                if self.use_cache
+                else None
+            )
+            comments = load_comment_batch(
+                self.html_name,
+                self.email_types,
+                cache,
+                self.email_aliases,
+                progress=self.progress,
+                fast=self.fast_parse,
+                workers=resolve_workers(self.parse_workers),
+            ).view()
+            stage["bytes"] = os.path.getsize(self.html_name)
+            stage["rows_out"] = len(comments)
+        self._record_history(stage)
+        return comments
+
+    def save_data(self, datas, filename, stage=None):
+        """
+        Save data to a file (export_format, compress_exports), writing the rows one by one
+        :param datas: 데이터 리스트 또는 단계 결과(CommentView), filename: 파일이름,
+            stage: 데이터를 만든 단계 이름, 주어지고 save_snapshots가 켜져 있으면 스냅샷도 저장
+        :return: path of the saved file
+        """
+        from exporter import SNAPSHOT_SUFFIX, export_path, export_rows, save_snapshot
+
+        name = f"{datetime.now().strftime('%Y-%m-%d')}_{filename}"
+        directory = "data"
+        path = export_path(directory, name, self.export_format, self.compress_exports)
+        with self.report.stage("save_data", len(datas)) as record:
+            record["rows_out"] = export_rows(datas, path, self.export_format)
+            if self.save_snapshots and stage is not None:
+                save_snapshot(
+                    datas, os.path.join(directory, name + SNAPSHOT_SUFFIX), stage
+                )
+        return path
+
+    def load_snapshot(self, path):
+        """
+        Load a stage result saved with save_data (save_snapshots)
+        :param path: .snapshot file
+        :return: name of the stage that made the rows, rows (CommentView)
+        :raise ValueError: not a snapshot file
+        """
+        from exporter import load_snapshot
+
+        self.report = RunReport(path, self.trace_memory)
+        self._giveaway_id = None
+        with self.report.stage("load_snapshot") as record:
+            stage, rows = load_snapshot(path)
+            record["rows_out"] = len(rows)
+        logger.info("%s 단계 결과 %d개를 불러왔습니다.", stage, len(rows))
+        return stage, rows
+
+    def overdue_comments(self, comments, end_date):
+        """
+        Remove comments that are posted after the end date
+        :param comments: comments[time, comment, email type], end_date
+        :return: comments[time, comment, email type] that are posted before the end date, comments[time, comment, email type] that are posted after the end date, number of overdue comments, number of not overdue comments
+        """
+        threshold = self.__time_conversion(end_date)
+        if end_date != self.end_date:
+            self.end_date = end_date
+            if self._giveaway_id is not None:
+                # 이미 기록을 시작한 실행이면 종료일자만 고침
+                self._history.set_end_date(self._giveaway_id, end_date)
+        with self.report.stage("overdue_comments", len(comments)) as stage:
+            comments = as_view(comments)
+            result, overdue_comments = comments.batch.split_by_day_offset(
+                comments.indices, threshold - self.grace_period
+            )
+            result = comments.with_indices(result)
+            overdue_comments = comments.with_indices(overdue_comments)
+            stage["rows_out"] = len(result)
+        self._record_history(stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            # 댓글마다 한 줄씩이라 꺼져 있으면 반복 자체를 하지 않음
+            for comment in result:
+                logger.debug("종료일자 이전 댓글: %s, %s", comment[0], comment[1])
+            for comment in overdue_comments:
+                logger.debug("종료일자 이후 댓글: %s, %s", comment[0], comment[1])
+        cnt_overdue = len(overdue_comments)
+        cnt_not_overdue = len(result)
+        logger.info("종료일자 이후 댓글: %d개", cnt_overdue)
+        logger.info("종료일자 이전 댓글: %d개", cnt_not_overdue)
+
+        return result, overdue_comments, cnt_overdue, cnt_not_overdue
+
+    def find_email(self, comments):
+        """
+        Find emails from comments: a full address (abc@gmail.com, email type from the domain)
+        or the first word that is not only digits (abc + 지메일)
+        :param comments: comments[time, comment, email type]
+        :return: emails[email, email type], number of comments that contain email, comment text of each email
+        """
+        from email_extractor import get_extractor
+
+        with self.report.stage("find_email", len(comments)) as stage:
+            comments = as_view(comments)
+            # 이메일 열은 따로 두어 앞 단계의 행(이메일 종류)이 바뀌지 않게 함
+            batch = comments.batch.with_email_columns()
+            indices = comments.indices
+            positions, emails, email_types = get_extractor(
+                self.email_types, self.email_aliases
+            ).extract_all(comments.column("comments"), self._report)
+            result = array("I", map(indices.__getitem__, positions))
+            # 행마다 Python 반복을 돌지 않고 이메일 열을 채움
+            deque(map(batch.emails.__setitem__, result, emails), maxlen=0)
+            # 전체 주소는 도메인으로 이메일 종류를 정함
+            for index, email_type in compress(zip(result, email_types), email_types):
+                batch.type_codes[index] = batch.type_code(email_type)
+            result = CommentView(batch, result, kind="email")
+            stage["rows_out"] = len(result)
+        self._record_history(stage)
+        return result, len(result), result.column("comments")
+
+    def near_duplicate_comments(self, emails, texts):
+        """
+        Remove entries whose comments are nearly identical to other comments (bot floods)
+        :param emails: emails[email, email type], texts: comment text of each email
+        :return: emails[email, email type] that are not near duplicates, clusters[[email, comment], ...], number of excluded emails
+        """
+        from near_duplicates import remove_near_duplicates
+
+        with self.report.stage("near_duplicate_comments", len(emails)) as stage:
+            result = remove_near_duplicates(
+                emails,
+                texts,
+                self.near_duplicate_threshold,
+                self.near_duplicate_min_length,
+            )
+            stage["rows_out"] = len(result[0])
+        self._record_history(stage)
+        logger.info(
+            "유사 댓글 묶음: %d개, 제외된 이메일: %d개", len(result[1]), result[2]
+        )
+        return result
+
+    def find_duplicate_comments(self, emails):
+        """
+        Find duplicate emails from emails
+        :param emails: emails[email, email type]
+        :return: emails[email, email type] that do not contain duplicate emails, duplicate emails, number of duplicate emails, number of emails that do not contain duplicate emails, {duplicate email: occurrences}
+        """
+        from dedupe import find_duplicates
+
+        with self.report.stage("find_duplicate_comments", len(emails)) as stage:
+            result = find_duplicates(
+                emails, self.dedupe_normalization, self.email_aliases
+            )
+            stage["rows_out"] = len(result[0])
+        self._record_history(stage, entrants=result[0])
+        if result[1]:
+            logger.info("중복된 이메일: %s", result[4])
+        else:
+            logger.info("중복된 이메일이 없습니다.")
+
+        return result
+
+    def exclude_past_winners(self, emails):
+        """
+        Remove entries that won one of the last exclude_recent_winners giveaways of the history
+        :param emails: emails[email, email type]
+        :return: emails[email, email type] without past winners, excluded emails[email, email type], number of excluded emails
+        :raise ValueError: save_history is off
+        """
+        if not self.save_history:
+            raise ValueError("지난 당첨자를 제외하려면 save_history를 켜야 합니다.")
+        with self.report.stage("exclude_past_winners", len(emails)) as stage:
+            history, giveaway_id = self._history_giveaway()
+            if isinstance(emails, CommentView):
+                addresses = emails.column("emails")
+                email_types = emails.column("email_types")
+            else:
+                addresses = [email[0] for email in emails]
+                email_types = [email[1] for email in emails]
+            keys = list(map(history.normalize, addresses, email_types))
+            excluded = self._winner_exclusion().excluded(keys, giveaway_id)
+            excluded_positions = set(excluded)
+            result = select(
+                emails,
+                [
+                    position
+                    for position in range(len(keys))
+                    if position not in excluded_positions
+                ],
+            )
+            excluded = select(emails, excluded)
+            stage["rows_out"] = len(result)
+        self._record_history(stage)
+        logger.info(
+            "최근 %d번의 추첨 당첨자 제외: %d개",
+            self.exclude_recent_winners,
+            len(excluded),
+        )
+        return result, excluded, len(excluded)
+
+    def past_winners_version(self):
+        """
+        Past winners exclude_past_winners would leave out now, changes after a draw is saved (see stage_graph)
+        :return: see WinnerExclusion.version, None if exclude_recent_winners or save_history is off
+        """
+        if not (self.exclude_recent_winners and self.save_history):
+            return None
+        _, giveaway_id = self._history_giveaway()
+        return self._winner_exclusion().version(giveaway_id)
+
+    def random_picker(self, emails, pick_number):
+        """
+        Pick random emails from emails
+        :param emails: emails[time, comment, email type], pick_number
+        :return: random_emails[picked emails]
+        """
+        import random
+
+        with self.report.stage("random_picker", len(emails)) as stage:
+            random_emails = random.sample(emails, pick_number)
+            stage["rows_out"] = len(random_emails)
+        self._record_history(stage, winners=random_emails)
+        self._log_winners(random_emails)
+
+        return random_emails
+
+    def _log_winners(self, random_emails):
+        from email_extractor import format_email, mask_email
+
+        for email in random_emails:
+            logger.info("%s", format_email(email[0], email[1]))
+
+        logger.info("마스킹된 이메일 주소:")
+        # 마스킹된 이메일 주소 출력
+        for email in random_emails:
+            logger.info("%s", format_email(mask_email(email[0]), email[1]))
+
+    def all_in_one(self, end_date, snapshot=None):
+        """
+        Run all the methods in order
+        :param end_date: end date, snapshot: .snapshot file to resume from (runs only the stages after it)
+        :return: random_emails[picked emails]
+        """
+        if snapshot is None and self.stream_pipeline:
+            return self.stream_all_in_one(end_date)[0]
+        if snapshot is None:
+            stage, rows = "get_comments", self.get_comments()
+        else:
+            stage, rows = self.load_snapshot(snapshot)
+        done = STAGES.index(stage)
+        if done < STAGES.index("overdue_comments"):
+            rows, _, _, _ = self.overdue_comments(rows, end_date)
+        if done < STAGES.index("find_email"):
+            rows, _, _ = self.find_email(rows)
+        if (
+            done < STAGES.index("near_duplicate_comments")
+            and self.remove_near_duplicates
+        ):
+            rows, _, _ = self.near_duplicate_comments(rows, rows.column("comments"))
+        if done < STAGES.index("find_duplicate_comments"):
+            rows = self.find_duplicate_comments(rows)[0]
+        if done < STAGES.index("exclude_past_winners") and self.exclude_recent_winners:
+            rows = self.exclude_past_winners(rows)[0]
+        if done < STAGES.index("random_picker"):
+            rows = self.random_picker(rows, self.pick_number)
+        self.save_report()
+        return rows
+
+    def stream_all_in_one(self, end_date):
+        """
+        Run all the stages as one stream: every comment goes through overdue -> email -> dedupe
+        as soon as it is parsed and the winners are drawn with reservoir sampling, so memory
+        grows with the number of dedupe keys instead of holding every stage's rows
+        :param end_date: end date
+        :return: random_emails[picked emails], counts of every stage (comments, overdue, not_overdue,
+            emails, duplicates, entries, past_winners)
+        :raise ValueError: remove_near_duplicates is on (needs every comment at once)
+        """
+        from dedupe import make_key_function
+        from email_extractor import get_extractor
+        from page_loader import open_page
+        from stream_pipeline import (
+            COUNT_NAMES,
+            drop_overdue,
+            drop_past_winners,
+            extract_emails,
+            iter_records,
+            reservoir_sample,
+            unique_entries,
+        )
+
+        if self.remove_near_duplicates:
+            raise ValueError("유사 댓글 제외는 stream_pipeline과 함께 쓸 수 없습니다.")
+        if self.exclude_recent_winners and not self.save_history:
+            raise ValueError("지난 당첨자를 제외하려면 save_history를 켜야 합니다.")
+        threshold = self.__time_conversion(end_date)
+        self.report = RunReport(self.html_name, self.trace_memory)
+        self._giveaway_id = None
+        self.end_date = end_date
+        counts = Counter()
+        with self.report.stage("stream_pipeline") as stage:
+            with open_page(self.html_name) as content:
+                records = iter_records(
+                    content,
+                    self.email_types,
+                    self.email_aliases,
+                    self.progress,
+                    self.fast_parse,
+                )
+                records = drop_overdue(records, threshold - self.grace_period, counts)
+                emails = extract_emails(
+                    records,
+                    get_extractor(self.email_types, self.email_aliases),
+                    counts,
+                )
+                entries, _ = unique_entries(
+                    emails,
+                    make_key_function(self.dedupe_normalization, self.email_aliases),
+                    counts,
+                )
+            candidates = entries.values()
+            if self.exclude_recent_winners:
+                history, giveaway_id = self._history_giveaway()
+                candidates = drop_past_winners(
+                    candidates,
+                    self._winner_exclusion().checker(giveaway_id),
+                    history.normalize,
+                    counts,
+                )
+            random_emails = reservoir_sample(candidates, self.pick_number)
+            stage["bytes"] = os.path.getsize(self.html_name)
+            stage["rows_in"] = counts["comments"]
+            stage["rows_out"] = len(random_emails)
+            stage["counts"] = {name: counts[name] for name in COUNT_NAMES}
+        self._record_history(
+            stage, entrants=iter(entries.values()), winners=random_emails
+        )
+        logger.info("종료일자 이후 댓글: %d개", counts["overdue"])
+        logger.info("종료일자 이전 댓글: %d개", counts["not_overdue"])
+        logger.info("이메일 주소를 포함한 댓글: %d개", counts["emails"])
+        logger.info(
+            "중복된 이메일: %d개, 중복되지 않은 이메일: %d개",
+            counts["duplicates"],
+            counts["entries"],
+        )
+        if self.exclude_recent_winners:
+            logger.info("지난 당첨자 제외: %d개", counts["past_winners"])
+        self._log_winners(random_emails)
+        self.save_report()
+        return random_emails, counts
+
+    def watch(self, end_date):
+        """
+        Keep the entries up to date while the page is saved again and again (live giveaway):
+        every time html_name changes and settles, only the stages whose input changed run again
+        (see stage_graph). Ctrl+C stops watching and draws the winners from the latest entries.
+        :param end_date: end date
+        :return: random_emails[picked emails]
+        """
+        import time
+        from page_watcher import PageWatcher
+        from stage_graph import NODES, StageGraph
+
+        graph = StageGraph(self)
+        watcher = PageWatcher(self.html_name, self.watch_debounce)
+        entries = graph.rows(NODES[-1], end_date)
+        logger.info(
+            "참여자 %d명, %s 변경 감시 중 (Ctrl+C: 추첨)", len(entries), self.html_name
+        )
+        try:
+            while True:
+                time.sleep(self.watch_interval)
+                if not watcher.poll():
+                    continue
+                try:
+                    refreshed = graph.rows(NODES[-1], end_date)
+                except (OSError, ValueError) as error:
+                    # 저장이 덜 끝난 페이지 등, 다음 변경을 기다림
+                    logger.warning("다시 실행하지 못했습니다: %s", error)
+                    continue
+                if refreshed is not entries:  # 내용이 같으면 다시 실행하지 않음
+                    entries = refreshed
+                    logger.info("참여자 %d명", len(entries))
+        except KeyboardInterrupt:
+            pass
+        random_emails = graph.draw(end_date)
+        self.save_report()
+        return random_emails
+
+    def save_report(self):
+        """
+        Save the stage measurements of the current run to the data folder (save_run_report)
+        :return: path of the report, None if disabled
+        """
+        if not self.save_run_report:
+            return None
+        path = self.report.save()
+        logger.info("실행 기록: %s", path)
+        return path
+
+    def __time_conversion(self, end_date):
+        """
+        Convert end date to the number of days from the current date
+        :param end_date: end date
+        :return: the number of days from the current date
+        """
+        current_year = datetime.now().year
+        end_date_with_year = f"{current_year}/{end_date}"
+        date_diff = datetime.now() - datetime.strptime(end_date_with_year, "%Y/%m/%d")
+        logger.info("종료일(%s)으로부터 %d일 지났습니다.", end_date, date_diff.days)
+        return date_diff.days
+
+    def save_settings(self, html_name, email_types, pick_number, grace_period):
+        """
+        Save settings to settings.json file
+        :param html_name: HTML file name, email_types: email types, pick_number: number of picked emails, grace_period: grace period
+        :raise ValueError: pick_number or grace_period is not a positive integer
+        """
+        self.settings["html_name"] = html_name
+        self.settings["email_types"] = [
+            email_type.strip() for email_type in email_types.split(",")
+        ]
+        try:
+            self.settings["pick_number"] = int(pick_number)
+            self.settings["grace_period"] = int(grace_period)
+            if self.settings["pick_number"] <= 0 or self.settings["grace_period"] <= 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError("뽑기 수와 grace period는 양수로 입력해주세요.") from None
+        with open(self.settings_file, "w", encoding="utf-8") as file:
+            json.dump(self.settings, file, indent=4)
+        self._get_settings()  # Update settings
+
+
+if __name__ == "__main__":
+    # 사용법: python analyzer_core.py mm/dd [settings.json] [--resume 저장파일.snapshot] [--watch]
+    # 화면 없이 전체 과정을 실행하고 추첨 결과를 출력합니다.
+    import argparse
+
+    parser = argparse.ArgumentParser(description="화면 없이 전체 과정을 실행합니다.")
+    parser.add_argument("end_date", help="종료일자 (mm/dd)")
+    parser.add_argument("settings", nargs="?", default="settings.json")
+    parser.add_argument("--resume", help="이 단계 저장 파일(.snapshot)부터 이어서 실행")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="페이지가 다시 저장될 때마다 바뀐 단계만 다시 실행, Ctrl+C를 누르면 추첨",
+    )
+    args = parser.parse_args()
+    if args.watch and args.resume:
+        parser.error("--watch와 --resume은 함께 쓸 수 없습니다.")
+    if not re.match(r"\d{2}/\d{2}", args.end_date):
+        sys.exit("사용법: python analyzer_core.py mm/dd [settings.json]")
+    analyzer = CommentAnalyzer(args.settings)
+    try:
+        if args.watch:
+            analyzer.watch(args.end_date)
+        else:
+            analyzer.all_in_one(args.end_date, args.resume)
+    except FileNotFoundError as error:
+        sys.exit(f"{error.filename or analyzer.html_name}을 찾을 수 없습니다.")
+    except ValueError as error:
+        sys.exit(str(error))
@@ -0,0 +1,467 @@
+"""
+Serve the pipeline over HTTP so several people can run draws on one machine at the same time.
+Parsing and the stages after it run on a process pool; a page uploaded again (or uploaded by
+several people at once) is parsed only once and shared through the parse cache.
+
+사용법:
+    python analyzer_service.py [settings.json] --port 8765 --workers 2 --max-pending 8
+
+요청 (응답은 단계가 끝날 때마다 한 줄씩 json, application/x-ndjson):
+    POST /draw?end_date=mm/dd&pick_number=3            본문: 저장한 페이지 파일 그대로
+    POST /draw?end_date=mm/dd&path=pages/giveaway.html 본문 없이 서버 폴더 안의 페이지
+    GET /status                                        실행 중/대기 중인 요청 수
+
+응답 줄: 단계별 기록(stage, rows_in, rows_out, seconds ...), 마지막 줄은 {"winners": [...], "masked": [...]},
+도중에 실패하면 마지막 줄이 {"error": "..."}.
+동시에 workers개까지 실행하고, 기다리는 요청이 max_pending개를 넘으면 503으로 바로 거절합니다.
+"""
+
+import os
+import re
+import sys
+import json
+import signal
+import asyncio
+import hashlib
+import argparse
+import itertools
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support, get_context
+from urllib.parse import parse_qs, urlsplit
+
+UPLOAD_DIRECTORY = os.path.join("cache", "uploads")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+# 업로드한 페이지를 이만큼 남겨둠, 같은 페이지를 다시 올리면 파싱 캐시에서 바로 찾음
+KEEP_UPLOADS = 64
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+def _analyzer(settings_file, page):
+    from analyzer_core import CommentAnalyzer
+
+    analyzer = CommentAnalyzer(settings_file)
+    analyzer.html_name = page
+    # 여러 요청이 같은 페이지의 파싱 결과를 나눠 쓰도록 항상 캐시 사용
+    analyzer.use_cache = True
+    return analyzer
+
+
+def parse_page(settings_file, page):
+    """
+    get_comments in a worker process, leaving the parsed page in the parse cache
+    :param settings_file: settings json, page: page path
+    :return: get_comments stage record
+    """
+    # 콘솔 출력이 많아 여러 프로세스가 동시에 쓰면 느려지므로 버림
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        analyzer = _analyzer(settings_file, page)
+        analyzer.get_comments()
+    return analyzer.report.stages[-1]
+
+
+def draw_page(settings_file, page, end_date, pick_number=None, records=None):
+    """
+    The stages after get_comments in a worker process (the page comes from the parse cache).
+    The stages run one by one like all_in_one without stream_pipeline, so the parse cache
+    shared by the requests is used and every stage record can be sent as soon as it is done.
+    :param settings_file: settings json, page: page path, end_date: end date, pick_number: number of winners (default: setting),
+        records: queue that gets the record of every stage after get_comments as it finishes
+    :return: random_emails[picked emails]
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        analyzer = _analyzer(settings_file, page)
+        if pick_number is not None:
+            analyzer.pick_number = pick_number
+
+        def done(rows):
+            if records is not None:
+                records.put(analyzer.report.stages[-1])
+            return rows
+
+        rows = analyzer.get_comments()
+        rows = done(analyzer.overdue_comments(rows, end_date)[0])
+        rows = done(analyzer.find_email(rows)[0])
+        if analyzer.remove_near_duplicates:
+            rows = done(
+                analyzer.near_duplicate_comments(rows, rows.column("comments"))[0]
+            )
+        rows = done(analyzer.find_duplicate_comments(rows)[0])
+        if analyzer.exclude_recent_winners:
+            rows = done(analyzer.exclude_past_winners(rows)[0])
+        winners = done(analyzer.random_picker(rows, analyzer.pick_number))
+        analyzer.save_report()
+    return winners
+
+
+class RequestError(Exception):
+    """
+    Request answered with an error status before any stage ran
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AnalyzerService:
+    """
+    asyncio HTTP server in front of a process pool. At most `workers` requests run at once
+    (one pool process each); up to `max_pending` more wait for a free slot and the rest are
+    turned away with 503 before their page is read. Pages are parsed in one pool task and the
+    remaining stages in a second one that sends every stage record back through a manager
+    queue as soon as the stage is done; requests for the same page content that arrive while
+    it is being parsed wait for that parse instead of starting their own, and later ones find
+    it in the parse cache.
+    """
+
+    def __init__(
+        self,
+        settings_file="settings.json",
+        workers=2,
+        max_pending=8,
+        upload_directory=UPLOAD_DIRECTORY,
+    ):
+        self.settings_file = settings_file
+        self.workers = workers
+        self.max_pending = max_pending
+        self.upload_directory = upload_directory
+        self.root = os.path.realpath(os.getcwd())
+        self.pool = None
+        self.manager = None
+        self._slots = None  # asyncio.Semaphore(workers), 이벤트 루프 안에서 만듦
+        self._admitted = 0  # 실행 중 + 대기 중인 요청
+        self._running = 0
+        # 페이지 키 -> 진행 중인 파싱 (같은 페이지 요청이 함께 기다림)
+        self._parsing = {}
+        self._uploads = OrderedDict()  # 내용 해시 -> 업로드 경로, 최근에 쓴 순서
+        self._in_use = {}  # 업로드 경로 -> 사용 중인 요청 수
+        self._temp_names = itertools.count()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """
+        Run the server until cancelled (Ctrl+C) or sent SIGTERM; either way the server is closed
+        and the pool processes are shut down before returning
+        """
+        self._slots = asyncio.Semaphore(self.workers)
+        self._load_uploads()
+        stop = asyncio.Event()
+        with contextlib.suppress(NotImplementedError):  # Windows
+            # 기본 동작대로 바로 끝나면 풀 프로세스가 남음
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        # fork로 만든 프로세스는 그때 열려 있던 연결을 물려받아 응답이 끝나도 연결이 닫히지 않음
+        context = get_context("spawn")
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        # 풀 프로세스가 단계 기록을 끝나는 대로 보내는 큐
+        self.manager = context.Manager()
+        try:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = server.sockets[0].getsockname()
+            print(f"http://{address[0]}:{address[1]} 에서 대기 중 (Ctrl+C: 종료)")
+            async with server:
+                await stop.wait()
+        finally:
+            # 기다리는 작업은 버리고 실행 중인 작업이 끝나면 프로세스 종료
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.manager.shutdown()
+
+    def _load_uploads(self):
+        try:
+            names = os.listdir(self.upload_directory)
+        except FileNotFoundError:
+            return
+        paths = [
+            os.path.join(self.upload_directory, name)
+            for name in names
+            if name.endswith(".html")
+        ]
+        for path in sorted(paths, key=os.path.getmtime):
+            self._uploads[os.path.basename(path)[: -len(".html")]] = path
+
+    async def handle(self, reader, writer):
+        """
+        Answer one request (one request per connection)
+        """
+        try:
+            try:
+                method, url, headers = await self._read_head(reader)
+                await self._route(method, url, headers, reader, writer)
+            except RequestError as error:
+                await self._respond(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # 클라이언트가 먼저 끊음
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_head(self, reader):
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise RequestError(400, "잘못된 요청입니다.") from None
+        return method, urlsplit(target), headers
+
+    async def _route(self, method, url, headers, reader, writer):
+        if url.path == "/status":
+            await self._respond(writer, 200, self.status())
+            return
+        if url.path != "/draw":
+            raise RequestError(404, f"{url.path}: 없는 주소입니다.")
+        if method != "POST":
+            raise RequestError(405, "POST로 요청해주세요.")
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        end_date = query.get("end_date", "")
+        if not re.fullmatch(r"\d{2}/\d{2}", end_date):
+            raise RequestError(400, "종료일자는 mm/dd 형식으로 입력해주세요.")
+        pick_number = query.get("pick_number")
+        if pick_number is not None:
+            if not pick_number.isdigit() or int(pick_number) <= 0:
+                raise RequestError(400, "뽑기 수는 양수로 입력해주세요.")
+            pick_number = int(pick_number)
+        length = headers.get("content-length")
+        if self._admitted >= self.workers + self.max_pending:
+            # 본문은 읽고 버려야 클라이언트가 응답을 받음
+            if length and length.isdigit():
+                await self._discard(reader, int(length))
+            await self._respond(
+                writer, 503, {"error": "요청이 많습니다. 잠시 후 다시 시도해주세요."}
+            )
+            return
+        self._admitted += 1
+        try:
+            if "path" in query:
+                key, page = self._local_page(query["path"])
+            elif length is None:
+                raise RequestError(411, "페이지를 본문으로 보내거나 path를 주세요.")
+            else:
+                key, page = await self._receive_upload(reader, length)
+            self._in_use[page] = self._in_use.get(page, 0) + 1
+            try:
+                async with self._slots:
+                    self._running += 1
+                    try:
+                        await self._draw(writer, key, page, end_date, pick_number)
+                    finally:
+                        self._running -= 1
+            finally:
+                self._in_use[page] -= 1
+                if not self._in_use[page]:
+                    del self._in_use[page]
+        finally:
+            self._admitted -= 1
+
+    def status(self):
+        """
+        :return: running and waiting requests, pages being parsed and the limits
+        """
+        return {
+            "running": self._running,
+            "waiting": self._admitted - self._running,
+            "parsing": len(self._parsing),
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+        }
+
+    def _local_page(self, path):
+        """
+        A page already on the server, only inside the folder the service runs in
+        :return: page key (path, size, mtime), real path
+        """
+        page = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, page]) != self.root:
+            raise RequestError(403, "서버 폴더 밖의 파일은 읽을 수 없습니다.")
+        try:
+            stat = os.stat(page)
+        except OSError:
+            raise RequestError(404, f"{path}을 찾을 수 없습니다.") from None
+        return ("path", page, stat.st_size, stat.st_mtime_ns), page
+
+    async def _discard(self, reader, length):
+        while length > 0:
+            chunk = await reader.read(min(UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+
+    async def _receive_upload(self, reader, length):
+        """
+        Write the uploaded page to the upload folder under its content hash
+        :return: page key (content hash), page path
+        """
+        if not length.isdigit():
+            raise RequestError(400, "Content-Length가 올바르지 않습니다.")
+        remaining = int(length)
+        if remaining > MAX_UPLOAD_BYTES:
+            raise RequestError(413, "페이지가 너무 큽니다.")
+        os.makedirs(self.upload_directory, exist_ok=True)
+        temp_path = os.path.join(
+            self.upload_directory, f"{os.getpid()}_{next(self._temp_names)}.tmp"
+        )
+        digest = hashlib.sha256()
+        try:
+            with open(temp_path, "wb") as file:
+                while remaining:
+                    chunk = await reader.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError("업로드가 중간에 끊겼습니다.")
+                    digest.update(chunk)
+                    file.write(chunk)
+                    remaining -= len(chunk)
+            key = digest.hexdigest()
+            page = self._uploads.get(key)
+            if page is not None and os.path.exists(page):
+                # 같은 페이지는 파일을 바꾸지 않아 파싱 캐시가 해시 없이 찾음
+                os.remove(temp_path)
+                self._uploads.move_to_end(key)
+            else:
+                page = os.path.join(self.upload_directory, f"{key}.html")
+                os.replace(temp_path, page)
+                self._uploads[key] = page
+                self._prune_uploads()
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+        return key, page
+
+    def _prune_uploads(self):
+        for key in list(self._uploads):
+            if len(self._uploads) <= KEEP_UPLOADS:
+                break
+            page = self._uploads[key]
+            if page in self._in_use:
+                continue
+            del self._uploads[key]
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(page)
+
+    async def _parse(self, key, page):
+        """
+        Parse a page on the pool, or wait for the parse already running for the same page
+        :return: get_comments stage record (shared: parsed for another request)
+        """
+        task = self._parsing.get(key)
+        shared = task is not None
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(
+                loop.run_in_executor(self.pool, parse_page, self.settings_file, page)
+            )
+            self._parsing[key] = task
+            task.add_done_callback(lambda _: self._parsing.pop(key, None))
+        # 기다리던 요청이 끊겨도 함께 기다리는 다른 요청의 파싱은 취소하지 않음
+        record = dict(await asyncio.shield(task))
+        record["shared"] = shared
+        return record
+
+    async def _draw(self, writer, key, page, end_date, pick_number):
+        from email_extractor import mask_email
+
+        await self._start_stream(writer)
+        try:
+            await self._send_line(writer, await self._parse(key, page))
+            loop = asyncio.get_running_loop()
+            records = self.manager.Queue()
+            draw = loop.run_in_executor(
+                self.pool,
+                draw_page,
+                self.settings_file,
+                page,
+                end_date,
+                pick_number,
+                records,
+            )
+            # 작업이 끝나면 (실패해도) 단계 기록을 모두 넣은 뒤이므로 그 뒤에 끝 표시를 넣음
+            draw.add_done_callback(lambda _: records.put(None))
+            while True:
+                record = await loop.run_in_executor(None, records.get)
+                if record is None:
+                    break
+                await self._send_line(writer, record)
+            winners = await draw
+        except Exception as error:
+            # 이미 200으로 응답을 시작했으므로 마지막 줄로 알림
+            await self._send_line(writer, {"error": f"{type(error).__name__}: {error}"})
+            return
+        await self._send_line(
+            writer,
+            {
+                "winners": winners,
+                "masked": [[mask_email(email[0]), email[1]] for email in winners],
+            },
+        )
+
+    async def _start_stream(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        await writer.drain()
+
+    async def _send_line(self, writer, record):
+        writer.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def _respond(self, writer, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            + ("Retry-After: 1\r\n" if status == 503 else "")
+            + "Connection: close\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추첨 과정을 HTTP로 제공합니다.")
+    parser.add_argument("settings", nargs="?", default="settings.json")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="0.0.0.0: 다른 PC에서도 접속"
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="동시에 실행할 요청(프로세스) 수"
+    )
+    parser.add_argument(
+        "--max-pending", type=int, default=8, help="자리를 기다릴 수 있는 요청 수"
+    )
+    args = parser.parse_args(argv)
+
+    service = AnalyzerService(
+        args.settings, args.workers or os.cpu_count() or 1, args.max_pending
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Run the whole pipeline for many saved pages at once, one page per process.
+
+사용법:
+    python batch_runner.py "pages/*.html" --manifest manifest.json
+    python batch_runner.py pages/ --manifest manifest.json --workers 4
+
+manifest.json 예시 (파일 이름별 종료일자와 뽑기 수, "default"는 목록에 없는 페이지에 사용):
+    {
+        "default": {"end_date": "01/31", "pick_number": 3},
+        "giveaway_0201.html": {"end_date": "02/01", "pick_number": 5}
+    }
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
+
+DATA_DIRECTORY = "data"
+
+
+def find_pages(target):
+    """
+    Get the saved pages to run
+    :param target: directory (every .html/.htm in it) or glob pattern
+    :return: sorted page paths
+    """
+    if os.path.isdir(target):
+        pattern_paths = glob.glob(os.path.join(target, "*.htm*"))
+    else:
+        pattern_paths = glob.glob(target)
+    return sorted(path for path in pattern_paths if os.path.isfile(path))
+
+
+def load_manifest(path):
+    """
+    Load the end date and pick count of each page
+    :param path: manifest json path
+    :return: {file name: {"end_date": "mm/dd", "pick_number": n}}
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def page_options(manifest, page):
+    options = dict(manifest.get("default", {}))
+    options.update(manifest.get(os.path.basename(page), {}))
+    if "end_date" not in options:
+        raise ValueError(f"{os.path.basename(page)}의 종료일자가 manifest에 없습니다.")
+    return options
+
+
+def run_page(job):
+    """
+    Run get -> overdue -> email -> dedupe -> past winners -> pick for one page (runs in a worker process)
+    :param job: (page path, options from the manifest, output directory)
+    :return: summary of the page
+    """
+    from analyzer_core import CommentAnalyzer
+    from email_extractor import mask_email
+    from exporter import export_path, export_rows
+
+    page, options, directory = job
+    summary = {"page": page, "end_date": options.get("end_date")}
+    start = time.perf_counter()
+    try:
+        # 콘솔 출력이 많아 여러 프로세스가 동시에 쓰면 느려지므로 버림
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            analyzer = CommentAnalyzer()
+            analyzer.html_name = page
+            pick_number = int(options.get("pick_number", analyzer.pick_number))
+            comments = analyzer.get_comments()
+            remaining, _, cnt_overdue, _ = analyzer.overdue_comments(
+                comments, options["end_date"]
+            )
+            emails, cnt_email, texts = analyzer.find_email(remaining)
+            if analyzer.remove_near_duplicates:
+                emails, _, _ = analyzer.near_duplicate_comments(emails, texts)
+            emails, _, cnt_duplicate, cnt_entries, _ = analyzer.find_duplicate_comments(
+                emails
+            )
+            cnt_past_winners = 0
+            if analyzer.exclude_recent_winners:
+                emails, _, cnt_past_winners = analyzer.exclude_past_winners(emails)
+            winners = analyzer.random_picker(emails, pick_number)
+
+        name = os.path.splitext(os.path.basename(page))[0]
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        export_format = analyzer.export_format
+        compress = analyzer.compress_exports
+        export_rows(
+            emails,
+            export_path(
+                directory, f"{current_date}_{name}_중복제거", export_format, compress
+            ),
+            export_format,
+        )
+        export_rows(
+            winners + [[mask_email(email[0]), email[1]] for email in winners],
+            export_path(
+                directory, f"{current_date}_{name}_추첨결과", export_format, compress
+            ),
+            export_format,
+        )
+        summary.update(
+            {
+                "status": "ok",
+                "comments": len(comments),
+                "overdue": cnt_overdue,
+                "emails": cnt_email,
+                "duplicates": cnt_duplicate,
+                "entries": cnt_entries,
+                "past_winners": cnt_past_winners,
+                "winners": winners,
+                "stages": analyzer.report.stages,
+            }
+        )
+    except Exception as error:
+        summary.update({"status": "error", "error": f"{type(error).__name__}: {error}"})
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def run_batch(pages, manifest, directory=DATA_DIRECTORY, workers=None):
+    """
+    Run every page on a process pool and write a summary report
+    :param pages: page paths, manifest: see load_manifest, directory: output directory, workers: number of processes
+    :return: summaries in page order, summary report path
+    """
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    jobs = []
+    summaries = {}
+    for page in pages:
+        try:
+            jobs.append((page, page_options(manifest, page), directory))
+        except ValueError as error:
+            summaries[page] = {"page": page, "status": "error", "error": str(error)}
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(workers, max(1, len(jobs)))) as pool:
+        futures = [pool.submit(run_page, job) for job in jobs]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries[summary["page"]] = summary
+            print(f"[{summary['status']}] {summary['page']}")
+    elapsed = time.perf_counter() - start
+
+    ordered = [summaries[page] for page in pages]
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "pages": ordered,
+    }
+    report_path = os.path.join(
+        directory, f"{datetime.now().strftime('%Y-%m-%d_%H%M%S')}_batch_summary.json"
+    )
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+    return ordered, report_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 페이지를 한 번에 추첨합니다.")
+    parser.add_argument("pages", help="저장한 페이지가 있는 폴더 또는 glob 패턴")
+    parser.add_argument("--manifest", required=True, help="페이지별 종료일자/뽑기 수")
+    parser.add_argument("--output", default=DATA_DIRECTORY, help="결과를 저장할 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수")
+    args = parser.parse_args(argv)
+
+    pages = find_pages(args.pages)
+    if not pages:
+        print(f"{args.pages}에서 페이지를 찾을 수 없습니다.")
+        return 1
+    summaries, report_path = run_batch(
+        pages, load_manifest(args.manifest), args.output, args.workers
+    )
+    failed = sum(1 for summary in summaries if summary["status"] != "ok")
+    print(f"{len(summaries)}개 페이지 완료 (실패 {failed}개), 요약: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Compare the byte-level fast extractor with the full streaming parser on synthetic pages
+and check that both give the same times and comments.
+
+The fast extractor measures about 3-4x faster, short of the 10x that was aimed for. Profiling
+20000 comments puts roughly 45% of its time in _element_text and 35% in _find_elements.
+_element_text strips the inner markup of each element with a regex and checks for nesting.
+_find_elements matches each start tag and re-reads its id attributes. Most of the rest goes
+to the id-variant check. These per-element checks keep the output identical to the full
+parser (or send the page to it), so they stay even though they cost the remaining speedup.
+사용법: python benchmarks/bench_fast_extractor.py [댓글 수 ...]
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_page import generate_page, settings_email_types  # noqa: E402
+from comment_parser import parse_comments  # noqa: E402
+from fast_extractor import extract_comments  # noqa: E402
+from page_loader import open_page, sniff_encoding  # noqa: E402
+
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def fast_records(path):
+    with open_page(path) as content:
+        times, comments = extract_comments(content, sniff_encoding(content))
+    return [[time_text, comment] for time_text, comment in zip(times, comments)]
+
+
+def run(count, email_types, encoding, directory):
+    path = os.path.join(directory, f"page_{count}_{encoding}.html")
+    size = generate_page(path, count, email_types, seed=count, encoding=encoding)
+    full_time, expected = measure(lambda: parse_comments(path, email_types))
+    fast_time, result = measure(lambda: fast_records(path))
+    assert result == [record[:2] for record in expected], "결과가 전체 파서와 다릅니다"
+    print(
+        f"[{encoding}] 댓글 {count}개, {size / 1024 / 1024:.1f} MB: "
+        f"전체 파서 {full_time:.3f}s, 빠른 추출 {fast_time:.3f}s "
+        f"({full_time / fast_time:.1f}배)"
+    )
+
+
+if __name__ == "__main__":
+    counts = [int(count) for count in sys.argv[1:]] or [1000, 10000, 100000]
+    email_types = settings_email_types()
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            for encoding in ("utf-8", "cp949"):
+                run(count, email_types, encoding, directory)
@@ -0,0 +1,74 @@
+"""
+Measure how long a fresh interpreter takes to import the headless core and the GUI.
+analyzer_core must not pull in tkinter, the HTML parser or the stage modules at import time,
+so the CLI and batch workers start quickly.
+사용법: python benchmarks/bench_import_time.py [반복 횟수]
+"""
+
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 100  # analyzer_core import 목표 시간
+# import 시점에 불러오면 안 되는 모듈 (단계가 실행될 때 불러옴)
+LAZY_MODULES = [
+    "tkinter",
+    "html.parser",
+    "random",
+    "near_duplicates",
+    "dedupe",
+    "sqlite3",
+]
+
+
+def import_time(module):
+    """
+    Cumulative import time of a module in a fresh interpreter (python -X importtime)
+    :param module: module name
+    :return: milliseconds, names of every module imported on the way
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    milliseconds = 0.0
+    imported = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            milliseconds = int(cumulative) / 1000
+    return milliseconds, imported
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    failed = False
+    for module in ["analyzer_core", "main_gui_final"]:
+        try:
+            times = [import_time(module) for _ in range(repeat)]
+        except subprocess.CalledProcessError as error:
+            print(f"{module}: import 실패\n{error.stderr.strip().splitlines()[-1]}")
+            continue
+        best = min(milliseconds for milliseconds, _ in times)
+        print(f"{module:15s} {best:8.1f} ms (최소, {repeat}회)")
+        if module == "analyzer_core":
+            loaded = [name for name in LAZY_MODULES if name in times[0][1]]
+            if best > BUDGET_MS:
+                print(f"  목표 {BUDGET_MS} ms 초과")
+                failed = True
+            if loaded:
+                print(f"  import 시점에 불러온 모듈: {', '.join(loaded)}")
+                failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Load test of analyzer_service: concurrent local clients send draw requests and the latency of
+every request (first line and whole response) is reported as p50 / p99.
+Requests cycle over a few synthetic pages, so most uploads are pages the service has already
+parsed (served from the parse cache) and several clients send the same page at the same time.
+사용법: python benchmarks/bench_service.py [--clients 8] [--requests 64] [--count 20000] [--pages 4]
+    [--workers 2] [--max-pending 8] [--mode upload|path]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_page import generate_page, settings_email_types  # noqa: E402
+
+END_DATE_DAYS = 30  # 종료일자: 30일 전
+STARTUP_SECONDS = 30
+
+
+def end_date():
+    from datetime import datetime, timedelta
+
+    return (datetime.now() - timedelta(days=END_DATE_DAYS)).strftime("%m/%d")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def start_service(directory, port, workers, max_pending):
+    settings_file = os.path.join(directory, "settings.json")
+    settings = {
+        "html_name": "comments.html",
+        "email_types": settings_email_types(),
+        "pick_number": 3,
+        "show_process": False,
+        "grace_period": 1,
+        "log_level": "WARNING",
+        "save_run_report": False,
+        "save_history": False,
+    }
+    with open(settings_file, "w", encoding="utf-8") as file:
+        json.dump(settings, file, indent=4)
+    service = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "analyzer_service.py"),
+            settings_file,
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--max-pending",
+            str(max_pending),
+        ],
+        cwd=directory,
+        # 풀 프로세스가 물려받은 출력이 열려 있으면 파이프로 읽는 쪽이 끝나지 않음
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.perf_counter() + STARTUP_SECONDS
+    while time.perf_counter() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/status")
+            connection.getresponse().read()
+            return service
+        except OSError:
+            time.sleep(0.1)
+    service.kill()
+    raise RuntimeError("서비스가 시작되지 않았습니다.")
+
+
+def draw(port, page, date, upload):
+    """
+    One draw request
+    :return: (status, seconds until the first line, seconds until the end, error line or None)
+    """
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    if upload:
+        with open(page, "rb") as file:
+            body = file.read()
+        connection.request("POST", f"/draw?end_date={date}", body)
+    else:
+        connection.request(
+            "POST", f"/draw?end_date={date}&path={os.path.basename(page)}"
+        )
+    response = connection.getresponse()
+    first = None
+    error = None
+    for line in response:
+        if first is None:
+            first = time.perf_counter() - start
+        record = json.loads(line)
+        if "error" in record:
+            error = record["error"]
+    connection.close()
+    return response.status, first, time.perf_counter() - start, error
+
+
+def report(name, values):
+    p50 = percentile(values, 50)
+    p99 = percentile(values, 99)
+    if p50 is None:
+        print(f"  {name}: 없음")
+    else:
+        print(f"  {name}: p50 {p50 * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추첨 서비스에 부하를 걸어 봅니다.")
+    parser.add_argument("--clients", type=int, default=8, help="동시에 요청하는 수")
+    parser.add_argument("--requests", type=int, default=64, help="전체 요청 수")
+    parser.add_argument("--count", type=int, default=20000, help="페이지당 댓글 수")
+    parser.add_argument("--pages", type=int, default=4, help="서로 다른 페이지 수")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=8)
+    parser.add_argument("--mode", choices=("upload", "path"), default="upload")
+    args = parser.parse_args(argv)
+
+    print(f"CPU 코어: {os.cpu_count()}")
+    date = end_date()
+    with tempfile.TemporaryDirectory() as directory:
+        pages = []
+        for number in range(args.pages):
+            page = os.path.join(directory, f"comments_{number}.html")
+            generate_page(page, args.count, settings_email_types(), seed=number)
+            pages.append(page)
+        size = os.path.getsize(pages[0]) / 1024 / 1024
+        print(
+            f"페이지 {args.pages}개 x 댓글 {args.count}개 ({size:.1f} MB), "
+            f"요청 {args.requests}개, 동시 {args.clients}, workers {args.workers}, "
+            f"max_pending {args.max_pending}, {args.mode}"
+        )
+        port = free_port()
+        service = start_service(directory, port, args.workers, args.max_pending)
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.clients) as clients:
+                results = list(
+                    clients.map(
+                        lambda number: draw(
+                            port,
+                            pages[number % len(pages)],
+                            date,
+                            args.mode == "upload",
+                        ),
+                        range(args.requests),
+                    )
+                )
+            elapsed = time.perf_counter() - start
+        finally:
+            # 서비스의 SIGTERM 처리가 서버를 닫고 풀 프로세스까지 정리함
+            service.terminate()
+            service.wait()
+
+    done = [result for result in results if result[0] == 200 and result[3] is None]
+    rejected = sum(1 for result in results if result[0] == 503)
+    failed = len(results) - len(done) - rejected
+    print(
+        f"완료 {len(done)}개, 거절(503) {rejected}개, 실패 {failed}개, "
+        f"{elapsed:.2f}s ({len(done) / elapsed:.1f} 요청/s)"
+    )
+    report("첫 줄(파싱 완료)", [result[1] for result in done])
+    report("전체 응답", [result[2] for result in done])
+    for result in results:
+        if result[3] is not None and result[0] != 503:
+            print(f"  실패: {result[3]}")
+            break
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
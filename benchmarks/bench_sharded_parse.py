@@ -0,0 +1,80 @@
+"""
+Compare parsing one large page in a single process with the sharded parse on several processes,
+for the fast extractor and the full parser, and check that every result is identical.
+Speedup depends on the number of CPU cores (os.cpu_count() is printed first).
+사용법: python benchmarks/bench_sharded_parse.py [댓글 수 ...] [--workers 2 4 8] [--encoding cp949]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from multiprocessing import freeze_support
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_page import generate_page, settings_email_types  # noqa: E402
+from comment_parser import iter_page_comments  # noqa: E402
+from fast_extractor import extract_comments  # noqa: E402
+from page_loader import open_page, sniff_encoding  # noqa: E402
+from sharded_parser import parse_sharded  # noqa: E402
+
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def single_process(content, encoding, email_types, fast):
+    if fast:
+        return extract_comments(content, encoding)
+    records = list(iter_page_comments(content, email_types))
+    return [record[0] for record in records], [record[1] for record in records]
+
+
+def run(path, email_types, worker_counts):
+    with open_page(path) as content:
+        encoding = sniff_encoding(content)
+        for fast in (True, False):
+            name = "빠른 추출" if fast else "전체 파서"
+            base_time, expected = measure(
+                lambda: single_process(content, encoding, email_types, fast)
+            )
+            print(f"  {name} 1 프로세스 : {base_time:7.3f}s")
+            for workers in worker_counts:
+                elapsed, result = measure(
+                    lambda: parse_sharded(path, content, encoding, workers, fast)
+                )
+                assert result == tuple(expected), "결과가 1 프로세스와 다릅니다"
+                print(
+                    f"  {name} {workers} 프로세스 : {elapsed:7.3f}s ({base_time / elapsed:.2f}배)"
+                )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="페이지를 나눠 파싱하는 속도를 측정합니다."
+    )
+    parser.add_argument("counts", nargs="*", type=int, default=[100000])
+    parser.add_argument("--workers", nargs="+", type=int, default=[2, 4])
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args(argv)
+
+    print(f"CPU 코어: {os.cpu_count()}")
+    email_types = settings_email_types()
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            path = os.path.join(directory, f"comments_{count}.html")
+            size = generate_page(path, count, email_types, encoding=args.encoding)
+            print(f"\n댓글 {count}개 ({size / 1024 / 1024:.1f} MB, {args.encoding})")
+            run(path, email_types, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
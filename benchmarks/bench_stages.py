@@ -0,0 +1,201 @@
+"""
+Measure every CommentAnalyzer stage and all_in_one on synthetic pages.
+Each page size runs in a fresh process so the peak RSS of one size does not leak into the next;
+all_in_one runs in its own process as well.
+사용법: python benchmarks/bench_stages.py [댓글 수 ...] [--json 결과.json] [--cache]
+    python benchmarks/bench_stages.py 1000 10000 100000 1000000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from make_page import generate_page, settings_email_types  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+END_DATE_DAYS = 30  # 종료일자: 30일 전
+PICK_NUMBER = 3
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far in MB (None where unsupported)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 byte, Linux는 KB 단위
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def end_date():
+    from datetime import datetime, timedelta
+
+    return (datetime.now() - timedelta(days=END_DATE_DAYS)).strftime("%m/%d")
+
+
+def make_analyzer(page, directory, use_cache):
+    from analyzer_core import CommentAnalyzer
+
+    settings_file = os.path.join(directory, "settings.json")
+    settings = {
+        "html_name": page,
+        "email_types": settings_email_types(),
+        "pick_number": PICK_NUMBER,
+        "show_process": False,
+        "grace_period": 1,
+        "use_cache": use_cache,
+    }
+    with open(settings_file, "w", encoding="utf-8") as file:
+        json.dump(settings, file, indent=4)
+    return CommentAnalyzer(settings_file)
+
+
+def set_rows(result, rows):
+    result["rows"] = rows
+    result["rows_per_second"] = (
+        round(rows / result["seconds"]) if result["seconds"] else None
+    )
+
+
+def measure(results, name, rows_in, function):
+    start = time.perf_counter()
+    value = function()
+    seconds = time.perf_counter() - start
+    results.append(
+        {
+            "stage": name,
+            "seconds": round(seconds, 4),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    )
+    set_rows(results[-1], rows_in)
+    return value
+
+
+def run_stages(page, directory, use_cache):
+    """
+    Run every stage once (child process)
+    :return: per stage results
+    """
+    analyzer = make_analyzer(page, directory, use_cache)
+    date = end_date()
+    results = []
+    comments = measure(results, "get_comments", 0, analyzer.get_comments)
+    set_rows(results[-1], len(comments))
+    remaining = measure(
+        results,
+        "overdue_comments",
+        len(comments),
+        lambda: analyzer.overdue_comments(comments, date),
+    )[0]
+    emails, _, texts = measure(
+        results, "find_email", len(remaining), lambda: analyzer.find_email(remaining)
+    )
+    measure(
+        results,
+        "near_duplicate_comments",
+        len(emails),
+        lambda: analyzer.near_duplicate_comments(emails, texts),
+    )
+    unique = measure(
+        results,
+        "find_duplicate_comments",
+        len(emails),
+        lambda: analyzer.find_duplicate_comments(emails),
+    )[0]
+    measure(
+        results,
+        "random_picker",
+        len(unique),
+        lambda: analyzer.random_picker(unique, min(PICK_NUMBER, len(unique))),
+    )
+    return results
+
+
+def run_all_in_one(page, directory, use_cache):
+    analyzer = make_analyzer(page, directory, use_cache)
+    results = []
+    measure(results, "all_in_one", 0, lambda: analyzer.all_in_one(end_date()))
+    return results
+
+
+def child(args):
+    run = run_all_in_one if args.child == "all_in_one" else run_stages
+    # 단계별 콘솔 출력은 측정에서 제외
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run(args.page, args.directory, args.cache)
+    print(json.dumps(results))
+    return 0
+
+
+def run_child(mode, page, directory, use_cache):
+    command = [sys.executable, os.path.abspath(__file__), "--child", mode]
+    command += ["--page", page, "--directory", directory]
+    if use_cache:
+        command.append("--cache")
+    process = subprocess.run(
+        command, cwd=directory, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="단계별 실행 시간/메모리를 측정합니다."
+    )
+    parser.add_argument("counts", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--json", help="결과를 저장할 json 파일 (회귀 비교용)")
+    parser.add_argument(
+        "--cache", action="store_true", help="parse cache 사용 (두 번째 실행부터 적중)"
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args)
+
+    report = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.counts:
+            page = os.path.join(directory, f"comments_{count}.html")
+            size = generate_page(page, count, settings_email_types())
+            print(f"\n댓글 {count}개 ({size / 1024 / 1024:.1f} MB)")
+            print(
+                f"{'stage':25s} {'seconds':>9s} {'rows':>9s} {'rows/s':>11s} {'peak MB':>8s}"
+            )
+            results = run_child("stages", page, directory, args.cache)
+            results += run_child("all_in_one", page, directory, args.cache)
+            set_rows(results[-1], results[0]["rows"])  # 전체 댓글 수 기준
+            for result in results:
+                peak = result["peak_rss_mb"]
+                print(
+                    f"{result['stage']:25s} {result['seconds']:9.3f} {result['rows']:9d} "
+                    f"{result['rows_per_second'] or 0:11d} "
+                    f"{'-' if peak is None else f'{peak:8.1f}':>8s}"
+                )
+            report.append({"comments": count, "bytes": size, "stages": results})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+        print(f"\n결과 저장: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
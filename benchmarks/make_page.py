@@ -0,0 +1,173 @@
+"""
+Write a synthetic saved community page for benchmarks.
+The markup follows a page saved with ctrl + s (yt-attributed-string#content-text and
+span#published-time-text inside each comment thread), sorted by 최신순.
+사용법: python benchmarks/make_page.py comments.html --count 100000 --duplicate-rate 0.05 --bot-rate 0.02
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+from html import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EMAIL_TYPES = ["지메일", "네이버", "핫메일", "아웃룩", "한메일", "다음"]
+# (단위, 초, 최대 값) - 최신순이라 위에서부터 점점 오래된 시간이 나옴
+TIME_UNITS = [
+    ("초", 1, 59),
+    ("분", 60, 59),
+    ("시간", 60 * 60, 23),
+    ("일", 24 * 60 * 60, 6),
+    ("주", 7 * 24 * 60 * 60, 4),
+    ("개월", 30 * 24 * 60 * 60, 11),
+    ("년", 365 * 24 * 60 * 60, 3),
+]
+TEMPLATES = [
+    "{email} {type} 입니다 이벤트 참여합니다!",
+    "참여합니다 {email} {type}",
+    "항상 잘 보고 있어요~ {email} {type} 로 응모합니다",
+    "{email}@{type} 감사합니다 <b>꼭</b> 되고 싶어요",
+    "안녕하세요 {email} ({type}) 입니다. 이번에도 참여해봅니다",
+]
+NO_EMAIL_TEMPLATES = [
+    "영상 너무 재밌어요 ㅋㅋㅋ",
+    "이번 이벤트는 언제 끝나나요?",
+    "항상 응원합니다 2024 화이팅",
+]
+BOT_TEXT = (
+    "무료 이벤트 당첨 확인 링크 지금 바로 클릭하세요 선착순 {email} {type} 마감 임박"
+)
+THREAD = (
+    '<ytd-comment-thread-renderer class="style-scope ytd-item-section-renderer">'
+    '<div id="header-author"><a id="author-text" href="/@{author}"><span>@{author}</span></a>'
+    '<span id="published-time-text" class="style-scope ytd-comment-renderer">'
+    '<a class="yt-simple-endpoint">{time}</a></span></div>'
+    '<div id="content"><yt-attributed-string id="content-text" class="style-scope">'
+    '<span class="yt-core-attributed-string">{comment}</span></yt-attributed-string></div>'
+    "</ytd-comment-thread-renderer>\n"
+)
+HEADER = (
+    '<!DOCTYPE html><html lang="ko"><head><meta charset="{encoding}"><title>커뮤니티 - YouTube</title>'
+    "<style>.style-scope{{display:block}}</style><script>var ytInitialData = {{}};</script>"
+    '</head><body><ytd-app><div id="contents">\n'
+)
+FOOTER = "</div></ytd-app></body></html>\n"
+
+
+def time_texts(count, rng):
+    """
+    Published time texts for `count` comments in 최신순 order
+    :return: texts such as "3시간 전", "2주 전(수정됨)"
+    """
+    ages = sorted(rng.randint(1, 2 * 365 * 24 * 60 * 60) for _ in range(count))
+    for age in ages:
+        for unit, seconds, maximum in reversed(TIME_UNITS):
+            if age >= seconds or unit == "초":
+                value = min(max(1, age // seconds), maximum)
+                break
+        text = f"{value}{unit} 전"
+        if rng.random() < 0.03:
+            text += "(수정됨)"
+        yield text
+
+
+def comment_texts(count, email_types, duplicate_rate, bot_rate, no_email_rate, rng):
+    """
+    Comment texts with the requested share of repeated emails, bot floods and comments
+    without an email
+    """
+    used = []
+    for number in range(count):
+        roll = rng.random()
+        email_type = rng.choice(email_types)
+        if roll < bot_rate:
+            email = f"bot{rng.randint(0, 10**6)}"
+            text = BOT_TEXT.format(email=email, type=email_type)
+        elif roll < bot_rate + no_email_rate:
+            text = rng.choice(NO_EMAIL_TEMPLATES)
+        else:
+            if used and rng.random() < duplicate_rate:
+                email = rng.choice(used)  # 같은 사람이 여러 번 댓글
+            else:
+                email = (
+                    f"{rng.choice(['user', 'yt', 'fan'])}{number}{rng.randint(0, 99)}"
+                )
+                used.append(email)
+            text = rng.choice(TEMPLATES).format(email=email, type=email_type)
+        yield text
+
+
+def generate_page(
+    path,
+    count,
+    email_types=DEFAULT_EMAIL_TYPES,
+    duplicate_rate=0.05,
+    bot_rate=0.02,
+    no_email_rate=0.05,
+    seed=0,
+    encoding="utf-8",
+):
+    """
+    Write a synthetic saved page
+    :param path: output path, count: number of comments, email_types: email types used in comments,
+        duplicate_rate: share of comments reusing an earlier email, bot_rate: share of near-identical bot comments,
+        no_email_rate: share of comments without an email, seed: random seed, encoding: file encoding
+    :return: size of the written file in bytes
+    """
+    rng = random.Random(seed)
+    times = time_texts(count, rng)
+    comments = comment_texts(
+        count, list(email_types), duplicate_rate, bot_rate, no_email_rate, rng
+    )
+    with open(path, "w", encoding=encoding) as file:
+        file.write(HEADER.format(encoding=encoding))
+        for number, (time_text, comment) in enumerate(zip(times, comments)):
+            # <b>만 태그로 남기고 나머지는 escape
+            comment = escape(comment, quote=False)
+            comment = comment.replace("&lt;b&gt;", "<b>").replace("&lt;/b&gt;", "</b>")
+            file.write(
+                THREAD.format(
+                    author=f"channel{number}", time=time_text, comment=comment
+                )
+            )
+        file.write(FOOTER)
+    return os.path.getsize(path)
+
+
+def settings_email_types(path=os.path.join(ROOT, "settings.json")):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)["email_types"]
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_EMAIL_TYPES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 댓글 페이지를 만듭니다.")
+    parser.add_argument("output", help="저장할 html 파일")
+    parser.add_argument("--count", type=int, default=10000, help="댓글 수")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--bot-rate", type=float, default=0.02)
+    parser.add_argument("--no-email-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", default="utf-8", help="utf-8 또는 cp949")
+    args = parser.parse_args(argv)
+
+    size = generate_page(
+        args.output,
+        args.count,
+        settings_email_types(),
+        args.duplicate_rate,
+        args.bot_rate,
+        args.no_email_rate,
+        args.seed,
+        args.encoding,
+    )
+    print(f"{args.output}: 댓글 {args.count}개, {size / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+from array import array
+import operator
+from bisect import bisect_left
+from itertools import islice
+from collections.abc import Sequence
+
+from email_classifier import OTHER_TYPE, get_classifier
+from relative_time import parse_day_offset
+
+
+class CommentBatch:
+    """
+    Column store of every comment of a page.
+    Each column holds one value per comment; the email type is kept as an integer code into
+    type_names so the same few strings are not repeated on every row. Pipeline stages work
+    on CommentView index lists over one batch instead of copying rows.
+    """
+
+    def __init__(self, type_names=()):
+        self.times = []
+        self.comments = []
+        self.day_offsets = array("l")
+        self.type_names = list(type_names)
+        self._type_codes = {name: code for code, name in enumerate(self.type_names)}
+        self.type_codes = array("H")
+        self.emails = []  # find_email 단계에서 채워짐, 없으면 None
+        self._offsets_sorted = None
+
+    def __len__(self):
+        return len(self.comments)
+
+    def type_code(self, email_type):
+        """
+        Get the integer code of an email type, adding it to type_names if it is new
+        """
+        code = self._type_codes.get(email_type)
+        if code is None:
+            code = self._type_codes[email_type] = len(self.type_names)
+            self.type_names.append(email_type)
+        return code
+
+    def append(self, time_text, comment, email_type, email=None):
+        self._offsets_sorted = None
+        self.times.append(time_text)
+        self.comments.append(comment)
+        self.day_offsets.append(parse_day_offset(time_text))
+        self.type_codes.append(self.type_code(email_type))
+        self.emails.append(email)
+
+    @property
+    def offsets_sorted(self):
+        """
+        True if day offsets never decrease along the page (saved in 최신순 order)
+        """
+        if self._offsets_sorted is None:
+            offsets = self.day_offsets
+            self._offsets_sorted = all(
+                map(operator.le, offsets, islice(offsets, 1, None))
+            )
+        return self._offsets_sorted
+
+    def split_by_day_offset(self, indices, limit):
+        """
+        Split rows into the ones posted at least `limit` days ago and the newer ones.
+        Views keep the page order, so on a page sorted by 최신순 the cut-off is found with
+        a binary search; otherwise every row is checked.
+        :param indices: row indices in page order, limit: day offset cut-off
+        :return: indices with day offset >= limit, indices with day offset < limit
+        """
+        offsets = self.day_offsets
+        if self.offsets_sorted:
+            cut = bisect_left(indices, limit, key=offsets.__getitem__)
+            return indices[cut:], indices[:cut]
+        kept = array("I")
+        newer = array("I")
+        for index in indices:
+            if offsets[index] >= limit:
+                kept.append(index)
+            else:
+                newer.append(index)
+        return kept, newer
+
+    def with_email_columns(self):
+        """
+        Batch that shares the text columns of this one but has its own emails and email types,
+        so filling them in (find_email) does not change the rows of the earlier stages
+        :return: CommentBatch
+        """
+        batch = CommentBatch(self.type_names)
+        batch.times = self.times
+        batch.comments = self.comments
+        batch.day_offsets = self.day_offsets
+        batch.type_codes = array("H", self.type_codes)
+        batch.emails = [None] * len(self)
+        batch._offsets_sorted = self._offsets_sorted
+        return batch
+
+    @classmethod
+    def from_records(cls, records, email_types=()):
+        """
+        Build a batch from [time, comment, email type] records (a list or a generator)
+        :param records: comments[time, comment, email type], email_types: email types to code first
+        :return: CommentBatch
+        """
+        batch = cls(list(email_types) + [OTHER_TYPE])
+        for time_text, comment, email_type in records:
+            batch.append(time_text, comment, email_type)
+        return batch
+
+    @classmethod
+    def from_texts(cls, times, comments, email_types, aliases=None):
+        """
+        Build a batch from the time and comment columns of a page, classifying every comment
+        :param times: published time texts, comments: comment texts, email_types: email types, aliases: email type aliases
+        :return: CommentBatch
+        """
+        batch = cls()
+        batch.times = times
+        batch.comments = comments
+        batch.day_offsets = array("l", map(parse_day_offset, times))
+        batch.emails = [None] * len(comments)
+        batch.reclassify(email_types, aliases)
+        return batch
+
+    @classmethod
+    def from_email_rows(cls, rows):
+        """
+        Build a batch from [email, email type] rows that have no comment text
+        :param rows: emails[email, email type]
+        :return: CommentBatch
+        """
+        batch = cls()
+        for row in rows:
+            batch.append("", "", row[1], row[0])
+        return batch
+
+    def reclassify(self, email_types, aliases=None):
+        """
+        Classify every comment again after email types changed
+        """
+        classify_email_type = get_classifier(email_types, aliases).classify
+        self.type_names = list(email_types) + [OTHER_TYPE]
+        self._type_codes = {name: code for code, name in enumerate(self.type_names)}
+        self.type_codes = array(
+            "H", (self.type_code(classify_email_type(text)) for text in self.comments)
+        )
+
+    def to_columns(self):
+        """
+        Columns used to store the batch in the parse cache
+        """
+        return {
+            "times": self.times,
+            "comments": self.comments,
+            "type_names": self.type_names,
+            "type_codes": self.type_codes,
+        }
+
+    @classmethod
+    def from_columns(cls, columns):
+        batch = cls(columns["type_names"])
+        batch.times = columns["times"]
+        batch.comments = columns["comments"]
+        batch.type_codes = columns["type_codes"]
+        batch.day_offsets = array("l", map(parse_day_offset, batch.times))
+        batch.emails = [None] * len(batch.comments)
+        return batch
+
+    def view(self, kind="comment"):
+        """
+        View of every row in the batch
+        """
+        return CommentView(self, array("I", range(len(self))), kind)
+
+
+class CommentView(Sequence):
+    """
+    Rows of a CommentBatch selected by index.
+    It behaves like the list-of-lists the pipeline used to pass around: a "comment" view yields
+    [time, comment, email type] and an "email" view yields [email, email type], built only
+    when a row is read.
+    """
+
+    def __init__(self, batch, indices, kind="comment"):
+        self.batch = batch
+        self.indices = indices
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.indices)
+
+    def _row(self, index):
+        batch = self.batch
+        email_type = batch.type_names[batch.type_codes[index]]
+        if self.kind == "email":
+            return [batch.emails[index], email_type]
+        return [batch.times[index], batch.comments[index], email_type]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._row(index) for index in self.indices[position]]
+        return self._row(self.indices[position])
+
+    def __iter__(self):
+        row = self._row
+        for index in self.indices:
+            yield row(index)
+
+    def select(self, positions, kind=None):
+        """
+        New view of the rows at the given positions of this view
+        """
+        indices = self.indices
+        return CommentView(
+            self.batch,
+            array("I", (indices[position] for position in positions)),
+            kind or self.kind,
+        )
+
+    def with_indices(self, indices, kind=None):
+        return CommentView(self.batch, indices, kind or self.kind)
+
+    def column(self, name):
+        """
+        Values of one batch column for the rows of this view
+        :param name: times, comments, day_offsets, emails or email_types
+        """
+        batch = self.batch
+        if name == "email_types":
+            names, codes = batch.type_names, batch.type_codes
+            return list(map(names.__getitem__, map(codes.__getitem__, self.indices)))
+        return list(map(getattr(batch, name).__getitem__, self.indices))
+
+    def rows(self):
+        """
+        Copy the view into a plain list of rows
+        """
+        return list(self)
+
+
+def as_view(rows, kind="comment"):
+    """
+    Accept either a CommentView or a plain list of rows (the old API)
+    :param rows: CommentView or comments[time, comment, email type] / emails[email, email type]
+    :return: CommentView
+    """
+    if isinstance(rows, CommentView):
+        return rows
+    if kind == "email":
+        return CommentBatch.from_email_rows(rows).view("email")
+    return CommentBatch.from_records(rows).view()
+
+
+def select(rows, positions):
+    """
+    Pick rows by position, keeping a view a view and a list a list
+    """
+    if isinstance(rows, CommentView):
+        return rows.select(positions)
+    return [rows[position] for position in positions]
@@ -0,0 +1,330 @@
+import re
+import sys
+import time
+import codecs
+from collections import deque
+from html.parser import HTMLParser
+
+from email_classifier import get_classifier
+from page_loader import encoding_candidates, open_page, read_text
+
+# 댓글/시간 요소를 찾는 기준 (tag 이름, id)
+COMMENT_TAG = ("yt-attributed-string", "content-text")
+TIME_TAG = ("span", "published-time-text")
+
+# BeautifulSoup(html.parser)가 바로 닫아버리는 빈 요소들
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "keygen",
+    "link",
+    "menuitem",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+    "basefont",
+    "bgsound",
+    "command",
+    "frame",
+    "image",
+    "isindex",
+    "nextid",
+    "spacer",
+}
+# 이 태그 안의 문자열은 bs4 get_text()에 포함되지 않음
+NON_TEXT_ELEMENTS = {"script", "style", "template"}
+
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class CommentStreamParser(HTMLParser):
+    """
+    Event driven parser that extracts (time, comment) pairs while the HTML is fed in chunks.
+    Only the stack of currently open tags is kept, so memory does not grow with the page size.
+    The text rules follow BeautifulSoup(html.parser) + get_text(strip=True).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = deque()  # 완성된 [time, comment]
+        self._stack = []  # 열린 태그 [name, 수집 중인 텍스트 목록 or None]
+        self._open_counts = {}
+        self._captures = 0  # 열린 댓글/시간 요소 수
+        self._non_text = 0  # 열린 script/style/template 수
+        self._data = []
+        self._comments = deque()
+        self._times = deque()
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Parser positioned between comments with the given tags open
+        :param state: open tag names, see clean_state
+        """
+        parser = cls()
+        for name in state:
+            parser._stack.append([name, None])
+            parser._open_counts[name] = parser._open_counts.get(name, 0) + 1
+            if name in NON_TEXT_ELEMENTS:
+                parser._non_text += 1
+        return parser
+
+    def clean_state(self):
+        """
+        Names of the open tags if nothing is buffered (no half-read tag, open comment/time element
+        or unpaired record), else None. Parsers with the same clean state parse the rest of a page
+        the same way, so a segment parsed from one state can be reused wherever that state recurs.
+        """
+        if (
+            self._captures
+            or self._data
+            or self._comments
+            or self._times
+            or self.records
+            or self.rawdata
+            or self.cdata_elem
+        ):
+            return None
+        return tuple(name for name, _ in self._stack)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        element_id = None
+        for name, value in attrs:
+            if name == "id":
+                element_id = "" if value is None else value  # 중복 속성은 마지막 값
+        if tag in VOID_ELEMENTS:
+            return
+        target = None
+        if element_id is not None and (tag, element_id) in (COMMENT_TAG, TIME_TAG):
+            target = []
+            self._captures += 1
+            # bs4 find_all처럼 시작 태그 순서로 내보내도록 자리를 먼저 잡아둠
+            slots = self._comments if tag == COMMENT_TAG[0] else self._times
+            slots.append([target, None])
+        self._stack.append([tag, target])
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+        if tag in NON_TEXT_ELEMENTS:
+            self._non_text += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if not self._open_counts.get(tag):
+            return  # 열린 적 없는 태그는 무시
+        while self._stack:
+            name, target = self._stack.pop()
+            self._open_counts[name] -= 1
+            if name in NON_TEXT_ELEMENTS:
+                self._non_text -= 1
+            if target is not None:
+                self._captures -= 1
+                self._finish(name, target)
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self._captures:
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush_data()
+
+    def handle_decl(self, decl):
+        self._flush_data()
+
+    def handle_pi(self, data):
+        self._flush_data()
+
+    def unknown_decl(self, data):
+        self._flush_data()
+        if data.startswith("CDATA[") and self._captures:
+            self._data.append(data[len("CDATA[") :])
+            self._flush_data()
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        # 닫히지 않은 요소도 bs4처럼 문서 끝에서 닫아줌
+        while self._stack:
+            name, target = self._stack.pop()
+            if target is not None:
+                self._finish(name, target)
+        self._stack = []
+        self._open_counts = {}
+        self._captures = 0
+
+    def _flush_data(self):
+        """
+        Turn the buffered text into one string (a bs4 NavigableString) and hand it to the open targets
+        """
+        if not self._data:
+            return
+        text = "".join(self._data).strip()
+        self._data = []
+        if not text or self._non_text:
+            return
+        for _, target in self._stack:
+            if target is not None:
+                target.append(text)
+
+    def _finish(self, name, target):
+        text = "".join(target)
+        if name == COMMENT_TAG[0]:
+            slots = self._comments
+            text = WHITESPACE_PATTERN.sub(" ", text)
+        else:
+            slots = self._times
+        # 중첩된 요소는 안쪽이 먼저 닫히므로 시작할 때 잡아둔 자리를 찾아 채움
+        for slot in slots:
+            if slot[0] is target:
+                slot[1] = text
+                break
+        # 앞에서부터 시간과 댓글이 모두 채워지면 순서대로 짝지어 내보냄
+        while (
+            self._comments
+            and self._times
+            and self._comments[0][1] is not None
+            and self._times[0][1] is not None
+        ):
+            self.records.append([self._times.popleft()[1], self._comments.popleft()[1]])
+
+
+def _iter_records(content, encoding, chunk_size, progress):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parser = CommentStreamParser()
+    total = len(content)
+    with memoryview(content) as view:
+        for start in range(0, total, chunk_size):
+            # memoryview 조각이라 디코딩 전에 복사하지 않음
+            parser.feed(decoder.decode(view[start : start + chunk_size]))
+            if progress is not None:
+                progress(min(start + chunk_size, total), total)
+            while parser.records:
+                yield parser.records.popleft()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    while parser.records:
+        yield parser.records.popleft()
+
+
+def iter_comments(
+    path, email_types, chunk_size=CHUNK_SIZE, aliases=None, progress=None
+):
+    """
+    Stream comments from the saved HTML file, reading the file only once
+    :param path: HTML file path, email_types: email types, chunk_size: bytes decoded and parsed at once, aliases: email type aliases,
+        progress: called with (bytes parsed, file size) after every chunk, may raise to stop parsing
+    :return: generator of [time, comment, email type]
+    """
+    with open_page(path) as content:
+        yield from iter_page_comments(
+            content, email_types, chunk_size, aliases, progress
+        )
+
+
+def iter_page_comments(
+    content, email_types, chunk_size=CHUNK_SIZE, aliases=None, progress=None
+):
+    """
+    Same as iter_comments for a page that is already open
+    :param content: page bytes (bytes or mmap, see page_loader.open_page)
+    :return: generator of [time, comment, email type]
+    """
+    classify_email_type = get_classifier(email_types, aliases).classify
+    candidates = encoding_candidates(content)
+    yielded = 0
+    for encoding in candidates:
+        try:
+            for number, (time_text, comment) in enumerate(
+                _iter_records(content, encoding, chunk_size, progress)
+            ):
+                if number < yielded:
+                    continue  # 다른 인코딩으로 다시 읽기 전에 이미 내보낸 댓글
+                yielded += 1
+                yield [time_text, comment, classify_email_type(comment)]
+            return
+        except UnicodeDecodeError:
+            # 앞부분이 utf-8로 읽혔지만 뒤에서 실패한 경우, 예전처럼 cp949로 다시 읽음
+            if encoding == candidates[-1]:
+                raise
+
+
+def parse_comments(path, email_types, chunk_size=CHUNK_SIZE, aliases=None):
+    """
+    Get comments from the HTML file
+    :param path: HTML file path, email_types: email types, aliases: email type aliases
+    :return: comments[time, comment, email type]
+    """
+    return list(iter_comments(path, email_types, chunk_size, aliases))
+
+
+def parse_comments_bs4(path, email_types, aliases=None):
+    """
+    Reference implementation that builds the whole BeautifulSoup tree.
+    Used to check that the streaming parser returns exactly the same records.
+    """
+    return _parse_text_bs4(read_text(path), email_types, aliases)
+
+
+def _parse_text_bs4(text, email_types, aliases=None):
+    from bs4 import BeautifulSoup
+
+    classify_email_type = get_classifier(email_types, aliases).classify
+
+    soup = BeautifulSoup(text, "html.parser")
+    comment_elements = soup.find_all(COMMENT_TAG[0], id=COMMENT_TAG[1])
+    time_elements = soup.find_all(TIME_TAG[0], id=TIME_TAG[1])
+    comments = [
+        WHITESPACE_PATTERN.sub(" ", comment.get_text(strip=True))
+        for comment in comment_elements
+    ]
+    times = [time_element.get_text(strip=True) for time_element in time_elements]
+    return [
+        [time_text, comment, classify_email_type(comment)]
+        for time_text, comment in zip(times, comments)
+    ]
+
+
+# 페이지와 상관없이 bs4 결과와 같은지 항상 확인하는 구조
+EDGE_CASES = [
+    # 댓글 요소 안의 댓글 요소: 바깥 요소가 나중에 닫혀도 먼저 나와야 함
+    '<span id="published-time-text">1일 전</span>'
+    '<yt-attributed-string id="content-text">a'
+    '<span id="published-time-text">2일 전</span>'
+    '<yt-attributed-string id="content-text">b</yt-attributed-string>'
+    "</yt-attributed-string>",
+    # 닫히지 않은 요소는 문서 끝에서 닫힘
+    '<span id="published-time-text">3일 전</span>'
+    '<yt-attributed-string id="content-text">c<b>d',
+]
+
+if __name__ == "__main__":
+    # 사용법: python comment_parser.py comments.html
+    # 스트리밍 파서와 bs4 결과가 같은지 확인하고 걸린 시간을 출력합니다.
+    html_path = sys.argv[1] if len(sys.argv) > 1 else "comments.html"
+    types = ["지메일", "네이버", "핫메일", "아웃룩", "한메일", "다음"]
+    for case in EDGE_CASES:
+        streamed = list(iter_page_comments(case.encode("utf-8"), types))
+        reference = _parse_text_bs4(case, types)
+        print(f"{case[:40]}...: {'일치' if streamed == reference else '불일치'}")
+    start = time.perf_counter()
+    streamed = parse_comments(html_path, types)
+    print(f"stream: {len(streamed)}개, {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    reference = parse_comments_bs4(html_path, types)
+    print(f"bs4: {len(reference)}개, {time.perf_counter() - start:.3f}s")
+    print("일치" if streamed == reference else "불일치")
@@ -0,0 +1,132 @@
+from collections import Counter
+
+from comment_batch import CommentView, select
+
+# 같은 메일 서비스로 볼 이름들 (이메일 종류, 영문 표기, 도메인)
+PROVIDER_NAMES = {
+    "지메일": "gmail",
+    "gmail": "gmail",
+    "gmail.com": "gmail",
+    "googlemail.com": "gmail",
+    "네이버": "naver",
+    "naver": "naver",
+    "naver.com": "naver",
+    "핫메일": "hotmail",
+    "hotmail": "hotmail",
+    "hotmail.com": "hotmail",
+    "아웃룩": "outlook",
+    "outlook": "outlook",
+    "outlook.com": "outlook",
+    "한메일": "daum",
+    "다음": "daum",
+    "daum.net": "daum",
+    "hanmail.net": "daum",
+}
+
+
+def canonical_provider(email_type, domain="", aliases=None):
+    """
+    Get one name for every spelling of a mail provider
+    :param email_type: email type of the entry, domain: domain part of the address, aliases: {alias: email type}
+    :return: provider name (지메일, gmail, gmail.com -> gmail)
+    """
+    for name in (domain, email_type):
+        name = name.strip().lower() if name else ""
+        if name:
+            name = (aliases or {}).get(name, name)
+            return PROVIDER_NAMES.get(name, name)
+    return ""
+
+
+def casefold(local, provider):
+    return local.casefold(), provider
+
+
+def strip_plus_tag(local, provider):
+    return local.split("+", 1)[0], provider
+
+
+def ignore_gmail_dots(local, provider):
+    if provider == "gmail":
+        return local.replace(".", ""), provider
+    return local, provider
+
+
+NORMALIZERS = {
+    "casefold": casefold,
+    "plus_tag": strip_plus_tag,
+    "gmail_dots": ignore_gmail_dots,
+}
+
+
+def make_key_function(normalization=(), aliases=None):
+    """
+    Build the function that turns an entry into its dedupe key
+    :param normalization: names of NORMALIZERS to apply, plus "provider" to tell the same id on
+        different providers apart (지메일/gmail count as one provider), aliases: email type aliases
+    :return: function(email, email type) -> key
+    """
+    unknown = set(normalization) - set(NORMALIZERS) - {"provider"}
+    if unknown:
+        raise ValueError(f"알 수 없는 중복 기준입니다: {', '.join(sorted(unknown))}")
+    normalizers = [NORMALIZERS[name] for name in NORMALIZERS if name in normalization]
+    with_provider = "provider" in normalization
+    alias_lookup = {
+        word.lower(): email_type
+        for email_type, words in (aliases or {}).items()
+        for word in words
+    }
+    if not normalizers and not with_provider:
+        # 기본값: 기존처럼 아이디만 비교 (전체 주소는 @ 앞부분)
+        return lambda address, email_type: str(address).partition("@")[0]
+
+    def key(address, email_type):
+        local, _, domain = str(address).partition("@")
+        provider = canonical_provider(email_type, domain, alias_lookup)
+        for normalizer in normalizers:
+            local, provider = normalizer(local, provider)
+        return (local, provider) if with_provider else local
+
+    return key
+
+
+def find_duplicates(emails, normalization=(), aliases=None):
+    """
+    Find duplicate entries with one pass to count keys and one pass to filter
+    :param emails: emails[email, email type], normalization: see make_key_function, aliases: email type aliases
+    :return: emails without any duplicated entry, duplicate emails (first spelling seen),
+        number of duplicate emails, number of remaining emails, {duplicate email: occurrences}
+    """
+    key = make_key_function(normalization, aliases)
+    if isinstance(emails, CommentView):
+        # 행을 만들지 않고 열에서 바로 읽음
+        addresses = emails.column("emails")
+        email_types = emails.column("email_types")
+    else:
+        addresses = [email[0] for email in emails]
+        email_types = [email[1] if len(email) > 1 else "" for email in emails]
+    keys = list(map(key, addresses, email_types))
+    counts = Counter(keys)
+    keep = []
+    occurrences = {}  # 처음 나온 표기 -> 등장 횟수, 처음 나온 순서대로
+    seen = set()
+    for position, email_key in enumerate(keys):
+        count = counts[email_key]
+        if count == 1:
+            keep.append(position)
+        elif email_key not in seen:
+            seen.add(email_key)
+            name = addresses[position]
+            if name in occurrences:
+                # 서비스별로 구분할 때 같은 아이디가 여러 서비스에 있는 경우
+                name = f"{addresses[position]} ({email_types[position]})"
+            occurrences[name] = count
+    filtered_emails = select(emails, keep)
+    duplicate_emails = list(occurrences)
+    return (
+        filtered_emails,
+        duplicate_emails,
+        len(duplicate_emails),
+        len(filtered_emails),
+        occurrences,
+    )
@@ -0,0 +1,81 @@
+from functools import lru_cache
+
+OTHER_TYPE = "기타"
+
+
+def classify_email_type(comment, email_types):
+    """
+    Find the email type of a comment by checking every type in order (reference implementation)
+    :param comment: comment text, email_types: email types in priority order
+    :return: first email type found in the comment, "기타" if none
+    """
+    for email_type in email_types:
+        if email_type in comment:
+            return email_type
+    return OTHER_TYPE
+
+
+class EmailTypeClassifier:
+    """
+    Classify comments by email type, with aliases counted as their email type.
+    Every word (email types and aliases) is checked in priority order with the C `in` search, so
+    the result is the same as classify_email_type: the type that comes first in email_types wins,
+    wherever it appears in the comment.
+    A single-pass trie automaton was only faster from about 28 words on
+    (benchmarks/bench_email_classifier.py), far more than a real settings.json has, so it was dropped.
+    """
+
+    def __init__(self, email_types, aliases=None):
+        self.email_types = list(email_types)
+        priorities = {}  # 단어 -> 가장 높은 우선순위(작은 index)
+        for priority, email_type in enumerate(self.email_types):
+            words = [email_type] + list((aliases or {}).get(email_type, []))
+            for word in words:
+                if word not in priorities or priority < priorities[word]:
+                    priorities[word] = priority
+        # 우선순위 순서로 정렬, 처음 찾은 단어가 가장 우선인 종류
+        self._ordered_words = [
+            (word, self.email_types[priority])
+            for word, priority in sorted(priorities.items(), key=lambda item: item[1])
+        ]
+
+    def classify(self, comment):
+        """
+        Find the email type of a comment
+        :param comment: comment text
+        :return: email type with the highest priority found in the comment, "기타" if none
+        """
+        for word, email_type in self._ordered_words:
+            if word in comment:
+                return email_type
+        return OTHER_TYPE
+
+    def classify_all(self, comments):
+        """
+        Classify a list of comments
+        :param comments: comment texts
+        :return: email types in the same order
+        """
+        classify = self.classify
+        return [classify(comment) for comment in comments]
+
+
+@lru_cache(maxsize=8)
+def _cached_classifier(email_types, aliases):
+    return EmailTypeClassifier(
+        email_types, {email_type: list(words) for email_type, words in aliases}
+    )
+
+
+def get_classifier(email_types, aliases=None):
+    """
+    Get a compiled classifier, reusing it while email_types and aliases stay the same
+    :param email_types: email types in priority order, aliases: {email type: [alias, ...]}
+    :return: EmailTypeClassifier
+    """
+    frozen_aliases = tuple(
+        sorted(
+            (email_type, tuple(words)) for email_type, words in (aliases or {}).items()
+        )
+    )
+    return _cached_classifier(tuple(email_types), frozen_aliases)
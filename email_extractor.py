@@ -0,0 +1,160 @@
+import re
+import operator
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import compress, repeat
+
+from dedupe import canonical_provider
+
+# 진행 상황을 알리고 취소를 확인하는 단위
+BLOCK_ROWS = 65536
+# 숫자로만 된 것이 아닌 첫 단어 (아이디 + 지메일 형태), 예전 findall + isdigit 검사와 같은 결과.
+# 숫자 중간에서는 시작하지 않도록 해서 긴 숫자도 한 번만 훑음
+TOKEN_PATTERN = re.compile(r"(?<![0-9])[0-9]*[A-Za-z_-][A-Za-z0-9_-]*")
+# 전체 주소 (local@domain), "@"가 있는 댓글에서만 찾음
+ADDRESS_PATTERN = re.compile(
+    r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,}"
+)
+
+
+class EmailExtractor:
+    """
+    Find the email of every comment of a column with precompiled patterns.
+    search stops at the first id of a comment instead of listing every word, and a whole
+    block of comments is searched through map so the time goes to the regex engine.
+    A full address (abc@gmail.com) anywhere in the comment wins over an id, and its domain
+    is mapped to one of email_types (gmail.com -> 지메일).
+    """
+
+    def __init__(self, email_types, aliases=None):
+        self.email_types = list(email_types)
+        self._alias_lookup = {
+            word.lower(): email_type
+            for email_type, words in (aliases or {}).items()
+            for word in words
+        }
+        self._provider_types = {}
+        for email_type in self.email_types:
+            provider = canonical_provider(email_type, "", self._alias_lookup)
+            self._provider_types.setdefault(provider, email_type)
+        self._domain_types = {}
+
+    def domain_type(self, domain):
+        """
+        Email type of a domain (gmail.com -> 지메일, aliases can add domains)
+        :return: one of email_types, None if the domain is not one of them
+        """
+        domain = domain.lower()
+        if domain not in self._domain_types:
+            provider = canonical_provider("", domain, self._alias_lookup)
+            self._domain_types[domain] = self._provider_types.get(provider)
+        return self._domain_types[domain]
+
+    def extract(self, comment):
+        """
+        Find the email of one comment: a full address anywhere in the comment, else the first id
+        :return: email (full address or id), email type of the domain or None; None if no email
+        """
+        if "@" in comment:
+            match = ADDRESS_PATTERN.search(comment)
+            if match is not None:
+                address = match.group()
+                return address, self.domain_type(address.rpartition("@")[2])
+        match = TOKEN_PATTERN.search(comment)
+        if match is None:
+            return None
+        return match.group(), None
+
+    def extract_block(self, texts):
+        """
+        Find the emails of a list of comments. The loops over every comment (search, "@" check,
+        picking the matches) run in C through map/compress; Python only loops over the comments
+        that contain a full address.
+        :param texts: comment texts
+        :return: positions of the comments with an email (array), emails, email types of the domains (None for ids)
+        """
+        matches = list(map(TOKEN_PATTERN.search, texts))
+        positions = array("I", compress(range(len(texts)), matches))
+        emails = list(map(re.Match.group, compress(matches, matches)))
+        email_types = [None] * len(emails)
+        extra = []  # 주소는 있지만 아이디로 볼 단어가 없는 댓글 (예: 123@456.com)
+        for position in compress(
+            range(len(texts)), map(operator.contains, texts, repeat("@"))
+        ):
+            match = ADDRESS_PATTERN.search(texts[position])
+            if match is None:
+                continue
+            address = match.group()
+            entry = (position, address, self.domain_type(address.rpartition("@")[2]))
+            number = bisect_left(positions, position)
+            if number < len(positions) and positions[number] == position:
+                emails[number] = address
+                email_types[number] = entry[2]
+            else:
+                extra.append(entry)
+        if extra:
+            entries = sorted(list(zip(positions, emails, email_types)) + extra)
+            positions = array("I", (entry[0] for entry in entries))
+            emails = [entry[1] for entry in entries]
+            email_types = [entry[2] for entry in entries]
+        return positions, emails, email_types
+
+    def extract_all(self, texts, progress=None):
+        """
+        Find the emails of a whole column, BLOCK_ROWS comments at a time
+        :param texts: comment texts, progress: called with (rows done, total rows), may raise to stop
+        :return: same as extract_block for the whole column
+        """
+        positions = array("I")
+        emails = []
+        email_types = []
+        total = len(texts)
+        for start in range(0, total, BLOCK_ROWS):
+            if progress is not None:
+                progress(start, total)
+            block_positions, block_emails, block_types = self.extract_block(
+                texts[start : start + BLOCK_ROWS]
+            )
+            positions.extend(map(start.__add__, block_positions))
+            emails.extend(block_emails)
+            email_types.extend(block_types)
+        if progress is not None:
+            progress(total, total)
+        return positions, emails, email_types
+
+
+@lru_cache(maxsize=8)
+def _cached_extractor(email_types, aliases):
+    return EmailExtractor(
+        email_types, {email_type: list(words) for email_type, words in aliases}
+    )
+
+
+def get_extractor(email_types, aliases=None):
+    """
+    Get an extractor, reusing it while email_types and aliases stay the same
+    """
+    frozen_aliases = tuple(
+        sorted(
+            (email_type, tuple(words)) for email_type, words in (aliases or {}).items()
+        )
+    )
+    return _cached_extractor(tuple(email_types), frozen_aliases)
+
+
+def format_email(email, email_type):
+    """
+    Address to show for an entry: a full address as is, an id with its email type (abc@지메일)
+    """
+    if "@" in email:
+        return email
+    return f"{email}@{email_type}"
+
+
+def mask_email(email):
+    """
+    Hide the last 4 characters of the id (abc1234 -> abc****, abc1234@gmail.com -> abc****@gmail.com)
+    """
+    local, at, domain = email.partition("@")
+    return f"{local[:-4]}****{at}{domain}"
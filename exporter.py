@@ -0,0 +1,222 @@
+import io
+import os
+import csv
+import gzip
+import json
+from array import array
+from contextlib import contextmanager
+
+from comment_batch import CommentBatch, CommentView, as_view
+
+EXPORT_FORMATS = ("csv", "ndjson", "txt")
+COMMENT_COLUMNS = ("time", "comment", "email_type")
+EMAIL_COLUMNS = ("email", "email_type")
+WRITE_BUFFER_SIZE = 1024 * 1024
+# 저장 형식이 바뀌면 올려서 예전 스냅샷을 거부 (1: pickle, 실행될 수 있어서 더 이상 읽지 않음)
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FORMAT = "comment-snapshot"
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def export_path(directory, name, export_format="csv", compress=False):
+    """
+    Path of an exported file
+    :param directory: output directory, name: file name without extension, export_format: csv, ndjson or txt,
+        compress: add .gz
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"저장 형식은 {', '.join(EXPORT_FORMATS)} 중 하나여야 합니다.")
+    return os.path.join(directory, f"{name}.{export_format}{'.gz' if compress else ''}")
+
+
+@contextmanager
+def atomic_writer(path, compress=False, encoding="utf-8", newline=None):
+    """
+    Open a text file for writing through a large buffer. Everything goes to a temporary file
+    next to path, which replaces path only when the block ends without an error, so a failed
+    or cancelled save never leaves a half-written file behind.
+    :param path: output path, compress: gzip the file, encoding: text encoding, newline: see open
+    :return: text stream
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # 여러 프로세스가 동시에 쓸 수 있으므로 임시 파일 이름에 pid를 붙임
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    raw = open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE)
+    try:
+        binary = (
+            gzip.GzipFile(
+                filename=os.path.basename(path)[:-3], mode="wb", fileobj=raw, mtime=0
+            )
+            if compress
+            else raw
+        )
+        with io.TextIOWrapper(
+            binary, encoding=encoding, newline=newline, write_through=False
+        ) as stream:
+            yield stream
+        raw.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        raw.close()
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def row_columns(rows):
+    """
+    Column names of stage rows: [time, comment, email type] or [email, email type]
+    :return: column names, None if the rows have no known shape
+    """
+    if isinstance(rows, CommentView):
+        return EMAIL_COLUMNS if rows.kind == "email" else COMMENT_COLUMNS
+    for row in rows:
+        return {3: COMMENT_COLUMNS, 2: EMAIL_COLUMNS}.get(len(row))
+    return None
+
+
+def export_rows(rows, path, export_format="csv", compress=None, columns=None):
+    """
+    Stream stage rows to a file one row at a time (rows may be a CommentView or any iterable)
+    csv: header line and quoted fields, opens in Excel (utf-8 with BOM)
+    ndjson: one json object per line ({"email": ..., "email_type": ...})
+    txt: the original "a, b, c" lines
+    :param rows: stage result, path: output path, export_format: csv, ndjson or txt,
+        compress: gzip the file (default: path ends with .gz), columns: column names (default: row_columns)
+    :return: number of rows written
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"저장 형식은 {', '.join(EXPORT_FORMATS)} 중 하나여야 합니다.")
+    if compress is None:
+        compress = path.endswith(".gz")
+    if columns is None:
+        columns = row_columns(rows)
+    count = 0
+    if export_format == "csv":
+        encoding = "utf-8" if compress else "utf-8-sig"
+        with atomic_writer(path, compress, encoding, newline="") as file:
+            writer = csv.writer(file)
+            if columns:
+                writer.writerow(columns)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+    with atomic_writer(path, compress) as file:
+        write = file.write
+        if export_format == "ndjson":
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+            for row in rows:
+                value = dict(zip(columns, row)) if columns else list(row)
+                write(dumps(value) + "\n")
+                count += 1
+        else:
+            for row in rows:
+                write(", ".join(map(str, row)) + "\n")
+                count += 1
+    return count
+
+
+def save_snapshot(rows, path, stage):
+    """
+    Save a stage result as json lines that load much faster than parsing the page again.
+    The first line is a header (format, version, stage, email type names), then one line per row
+    of the view: [time, comment, day offset, email type code, email].
+    Only data is stored, so loading a snapshot from anywhere never runs code.
+    :param rows: stage result (CommentView or rows), path: output path, stage: name of the stage that made the rows
+    :return: path
+    """
+    columns = row_columns(rows)
+    view = as_view(rows, "email" if columns == EMAIL_COLUMNS else "comment")
+    batch = view.batch
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "stage": stage,
+        "kind": view.kind,
+        "type_names": batch.type_names,
+        "rows": len(view),
+    }
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    with atomic_writer(path) as file:
+        write = file.write
+        write(dumps(header) + "\n")
+        for index in view.indices:
+            row = [
+                batch.times[index],
+                batch.comments[index],
+                batch.day_offsets[index],
+                batch.type_codes[index],
+                batch.emails[index],
+            ]
+            write(dumps(row) + "\n")
+    return path
+
+
+def _is_snapshot_row(row, type_count):
+    return (
+        type(row) is list
+        and len(row) == 5
+        and type(row[0]) is str
+        and type(row[1]) is str
+        and type(row[2]) is int
+        and type(row[3]) is int
+        and 0 <= row[3] < type_count
+        and (row[4] is None or type(row[4]) is str)
+    )
+
+
+def load_snapshot(path):
+    """
+    Load a stage result saved with save_snapshot
+    :param path: snapshot path
+    :return: stage name, CommentView of the saved rows
+    :raise ValueError: not a snapshot of this version, or a damaged one
+    """
+    loads = json.JSONDecoder().decode
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            header = loads(file.readline())
+            if (
+                not isinstance(header, dict)
+                or header.get("format") != SNAPSHOT_FORMAT
+                or header.get("version") != SNAPSHOT_VERSION
+            ):
+                raise ValueError(f"{path}은 지원하지 않는 단계 파일입니다.")
+            type_names = header["type_names"]
+            if (
+                type(header["stage"]) is not str
+                or header["kind"] not in ("comment", "email")
+                or not all(type(name) is str for name in type_names)
+            ):
+                raise ValueError(f"{path}은 지원하지 않는 단계 파일입니다.")
+            batch = CommentBatch(type_names)
+            day_offsets = []
+            type_codes = []
+            for line in file:
+                row = loads(line)
+                if not _is_snapshot_row(row, len(type_names)):
+                    raise ValueError(
+                        f"{path}의 {len(batch.times) + 2}번째 줄이 잘못되었습니다."
+                    )
+                batch.times.append(row[0])
+                batch.comments.append(row[1])
+                day_offsets.append(row[2])
+                type_codes.append(row[3])
+                batch.emails.append(row[4])
+        if len(batch.times) != header["rows"]:
+            raise ValueError(f"{path}이 중간에 잘렸습니다.")
+        batch.day_offsets = array("l", day_offsets)
+        batch.type_codes = array("H", type_codes)
+    except (
+        UnicodeDecodeError,
+        json.JSONDecodeError,
+        KeyError,
+        TypeError,
+        OverflowError,
+    ) as error:
+        raise ValueError(f"{path}은 저장된 단계 파일이 아닙니다.") from error
+    return header["stage"], batch.view(header["kind"])
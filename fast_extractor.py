@@ -0,0 +1,219 @@
+import re
+from bisect import bisect_right
+from html import unescape
+
+from comment_parser import (
+    COMMENT_TAG,
+    NON_TEXT_ELEMENTS,
+    TIME_TAG,
+    VOID_ELEMENTS,
+    WHITESPACE_PATTERN,
+)
+
+COMMENT_MARKER = f'id="{COMMENT_TAG[1]}"'.encode("ascii")
+TIME_MARKER = f'id="{TIME_TAG[1]}"'.encode("ascii")
+# 따옴표 없는 id, 작은따옴표, 대문자 등 다른 표기가 있으면 빠른 경로를 쓰지 않음
+ANY_ID_PATTERN = re.compile(
+    rb"""\bid\s*=\s*["']?(%s|%s)(?![\w-])"""
+    % (re.escape(COMMENT_TAG[1].encode()), re.escape(TIME_TAG[1].encode())),
+    re.IGNORECASE,
+)
+START_TAG_PATTERN = re.compile(
+    rb"""<([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>"""
+)
+ID_ATTRIBUTE_PATTERN = re.compile(
+    rb"""(?:^|\s)id\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+)
+# 안의 문자열이 태그로 해석되지 않는 구간 (script/style), 태그가 텍스트에 안 들어가는 구간 (template), 주석
+RAW_START_PATTERN = re.compile(rb"<(script|style|template)\b|<!--", re.IGNORECASE)
+TEMPLATE_TAG_PATTERN = re.compile(rb"<(/?)template\b", re.IGNORECASE)
+# 요소 안의 주석은 글자를 나누기만 하므로 태그처럼 건너뜀
+TAG_PATTERN = re.compile(
+    r"""<!--(?!-?>).*?-->|<(/?)([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>""",
+    re.DOTALL,
+)
+# 인코딩이 ASCII와 호환되는지 확인할 때 쓰는 바이트
+MARKER_SAMPLE = b"<" + COMMENT_MARKER + TIME_MARKER + b">"
+END_TAGS = {
+    COMMENT_TAG[0]: f"</{COMMENT_TAG[0]}>".encode("ascii"),
+    TIME_TAG[0]: f"</{TIME_TAG[0]}>".encode("ascii"),
+}
+
+
+def _ascii_compatible(encoding):
+    """
+    Whether the ASCII markers appear as the same bytes in the encoding (utf-8, cp949, ...)
+    """
+    try:
+        return MARKER_SAMPLE.decode(encoding) == MARKER_SAMPLE.decode("ascii")
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+class UnexpectedMarkup(Exception):
+    """
+    Raised when a page does not follow the standard saved layout; the caller falls back to the full parser
+    """
+
+
+def _raw_regions(content, partial=False):
+    """
+    Byte ranges of script/style/template elements and comments
+    :param partial: content is a part of a page, an unclosed region may continue after it
+    :return: sorted starts, ends
+    """
+    starts = []
+    ends = []
+    position = 0
+    while True:
+        match = RAW_START_PATTERN.search(content, position)
+        if match is None:
+            return starts, ends
+        if match.group(1) is None:
+            end = content.find(b"-->", match.end())
+        elif match.group(1).lower() == b"template":
+            end = _template_end(content, match.end())
+        else:
+            end_tag = re.compile(b"</" + match.group(1), re.IGNORECASE)
+            end_match = end_tag.search(content, match.end())
+            end = -1 if end_match is None else end_match.start()
+        if end < 0:
+            if partial:
+                raise UnexpectedMarkup(
+                    "script/style/template/comment crosses the shard end"
+                )
+            end = len(content)
+        starts.append(match.start())
+        ends.append(end)
+        position = end + 1
+
+
+def _template_end(content, position):
+    # template은 중첩될 수 있으므로 짝이 맞는 닫는 태그를 찾음
+    depth = 1
+    for match in TEMPLATE_TAG_PATTERN.finditer(content, position):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.start()
+    return -1
+
+
+def _find_elements(content, marker, tag, element_id, regions):
+    """
+    Find every element with the marker id
+    :return: [(start of the element, end of its start tag, start of its end tag)]
+    """
+    region_starts, region_ends = regions
+    elements = []
+    end_tag = END_TAGS[tag]
+    position = content.find(marker)
+    while position >= 0:
+        index = bisect_right(region_starts, position) - 1
+        if index >= 0 and position < region_ends[index]:
+            raise UnexpectedMarkup(f"{element_id} inside script/style/template/comment")
+        start = content.rfind(b"<", 0, position)
+        match = START_TAG_PATTERN.match(content, start)
+        if match is None or match.end() <= position:
+            raise UnexpectedMarkup(f"{element_id} outside a start tag")
+        ids = ID_ATTRIBUTE_PATTERN.findall(match.group(2))
+        last_id = b"".join(ids[-1]) if ids else b""
+        if (
+            match.group(1).decode("ascii", "replace") != tag
+            or last_id.decode("ascii", "replace") != element_id
+        ):
+            raise UnexpectedMarkup(f"{element_id} on an unexpected tag")
+        if match.group(2).rstrip().endswith(b"/"):
+            raise UnexpectedMarkup(f"self-closing {tag}")
+        end = content.find(end_tag, match.end())
+        if end < 0:
+            raise UnexpectedMarkup(f"unclosed {tag}")
+        elements.append((start, match.end(), end))
+        position = content.find(marker, match.end())
+    return elements
+
+
+def _element_text(inner, encoding, tag):
+    """
+    Text of an element like BeautifulSoup get_text(strip=True)
+    :param inner: bytes between the start and end tag
+    """
+    if b"<?" in inner:
+        raise UnexpectedMarkup("processing instruction inside an element")
+    text = inner.decode(encoding)
+    pieces = []
+    open_tags = []
+    position = 0
+    for match in TAG_PATTERN.finditer(text):
+        pieces.append(text[position : match.start()])
+        position = match.end()
+        if match.group(2) is None:
+            continue
+        name = match.group(2).lower()
+        if name == tag or name in NON_TEXT_ELEMENTS:
+            raise UnexpectedMarkup(f"{name} inside {tag}")
+        if match.group(1):
+            # 요소 밖에서 열린 태그를 닫으면 요소도 같이 닫히므로 전체 파서로 처리
+            if name not in open_tags:
+                raise UnexpectedMarkup(f"unbalanced </{name}>")
+            while open_tags.pop() != name:
+                pass
+        elif name not in VOID_ELEMENTS and not match.group(3).rstrip().endswith("/"):
+            open_tags.append(name)
+    pieces.append(text[position:])
+    strings = []
+    for piece in pieces:
+        if "<" in piece:
+            raise UnexpectedMarkup("unparsed '<' inside an element")
+        piece = unescape(piece).strip()
+        if piece:
+            strings.append(piece)
+    return "".join(strings)
+
+
+def extract_comments(content, encoding, partial=False):
+    """
+    Pull the published times and comments straight out of the raw page bytes without building
+    any tree. Every assumption the shortcut relies on is checked; anything else raises
+    UnexpectedMarkup so the caller can use the full parser.
+    :param content: page bytes (bytes or mmap), encoding: page encoding,
+        partial: content is a shard of a page that is not the last one, see sharded_parser
+    :return: times, comments (same as parsing with CommentStreamParser)
+    """
+    if not _ascii_compatible(encoding):
+        # utf-16 등은 ASCII 표식이 바이트로 나타나지 않아 댓글이 하나도 없는 것처럼 보임
+        raise UnexpectedMarkup(f"{encoding} is not ASCII compatible")
+    regions = _raw_regions(content, partial)
+    comments = _find_elements(content, COMMENT_MARKER, *COMMENT_TAG, regions)
+    times = _find_elements(content, TIME_MARKER, *TIME_TAG, regions)
+    if len(comments) != len(times):
+        raise UnexpectedMarkup(
+            f"{len(times)} times and {len(comments)} comments do not match"
+        )
+    if not times and not partial and len(content):
+        # 댓글이 없는 페이지는 드물어서 전체 파서로 확인 (앞 조각은 머리 부분만 있을 수 있음)
+        raise UnexpectedMarkup("no time or comment element")
+    variants = 0
+    for match in ANY_ID_PATTERN.finditer(content):
+        index = bisect_right(regions[0], match.start()) - 1
+        if index < 0 or match.start() >= regions[1][index]:
+            variants += 1
+    if variants != len(comments) + len(times):
+        raise UnexpectedMarkup("ids written in a different form")
+
+    # 시간/댓글 요소가 서로 겹치거나 중첩되지 않는지 확인
+    elements = sorted(comments + times)
+    for (_, _, end), (next_start, _, _) in zip(elements, elements[1:]):
+        if end > next_start:
+            raise UnexpectedMarkup("nested time/comment elements")
+
+    time_texts = [
+        _element_text(content[start:end], encoding, TIME_TAG[0])
+        for _, start, end in times
+    ]
+    comment_texts = [
+        WHITESPACE_PATTERN.sub(
+            " ", _element_text(content[start:end], encoding, COMMENT_TAG[0])
+        )
+        for _, start, end in comments
+    ]
+    return time_texts, comment_texts
@@ -0,0 +1,390 @@
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from itertools import repeat
+from datetime import date, datetime, timedelta
+
+from comment_batch import CommentView
+from dedupe import canonical_provider
+from page_loader import read_text
+
+DEFAULT_PATH = os.path.join("data", "history.sqlite3")
+# 여러 프로세스(batch_runner)가 동시에 쓸 때 잠금을 기다리는 시간 (초)
+LOCK_TIMEOUT = 30
+# 큰 추첨의 참여자를 넣을 때 인덱스 페이지가 메모리에 남도록 (KB, 음수는 SQLite 규칙)
+CACHE_KIB = 65536
+
+# 1: 페이지 이름과 날짜마다 추첨 하나 (같은 날 다른 추첨이 앞 추첨을 덮어씀), 2: 실행마다 추첨 하나
+SCHEMA_VERSION = 2
+GIVEAWAYS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    page TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    end_date TEXT,
+    updated TEXT NOT NULL
+);
+"""
+SCHEMA = GIVEAWAYS_TABLE.format(name="giveaways") + """
+CREATE INDEX IF NOT EXISTS giveaways_run_date ON giveaways (run_date);
+CREATE TABLE IF NOT EXISTS stages (
+    giveaway_id INTEGER NOT NULL REFERENCES giveaways (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    rows_in INTEGER,
+    rows_out INTEGER,
+    seconds REAL,
+    PRIMARY KEY (giveaway_id, stage)
+);
+-- 참여자를 날짜로 찾을 때는 giveaways_run_date와 entrants_giveaway를 사용 (참여자 행마다 인덱스를 하나 더 두면 기록이 느려짐)
+CREATE TABLE IF NOT EXISTS entrants (
+    giveaway_id INTEGER NOT NULL REFERENCES giveaways (id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    address TEXT NOT NULL,
+    email_type TEXT,
+    normalized TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entrants_normalized ON entrants (normalized, run_date);
+CREATE INDEX IF NOT EXISTS entrants_giveaway ON entrants (giveaway_id);
+CREATE TABLE IF NOT EXISTS winners (
+    giveaway_id INTEGER NOT NULL REFERENCES giveaways (id) ON DELETE CASCADE,
+    run_date TEXT NOT NULL,
+    address TEXT NOT NULL,
+    email_type TEXT,
+    normalized TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS winners_normalized ON winners (normalized, run_date);
+CREATE INDEX IF NOT EXISTS winners_giveaway ON winners (giveaway_id);
+CREATE INDEX IF NOT EXISTS winners_run_date ON winners (run_date);
+"""
+
+
+class HistoryStore:
+    """
+    Entrants, stage counts and winners of every giveaway in one SQLite file, so questions
+    across giveaways ("has this address won in the last 90 days") are answered with an index
+    lookup instead of reading old result files.
+    A giveaway is one run of a page (from get_comments to the draw): running a stage again in
+    the same run replaces its rows, but a new run never touches the rows of earlier ones, even
+    for a page with the same file name on the same day.
+    Every call opens its own short connection, so the store can be used from the GUI worker
+    thread and from several batch processes at once.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, aliases=None):
+        self.path = path
+        self._alias_lookup = {
+            word.lower(): email_type
+            for email_type, words in (aliases or {}).items()
+            for word in words
+        }
+        self._providers = {}
+        self._ready = False
+
+    def _connect(self):
+        if not self._ready:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        if not self._ready:
+            # WAL: 쓰는 동안에도 다른 프로세스가 읽을 수 있음
+            connection.execute("PRAGMA journal_mode = WAL")
+            self._migrate(connection)
+            connection.executescript(SCHEMA)
+            self._ready = True
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+        return connection
+
+    def _migrate(self, connection):
+        """
+        Bring a history file written by an older version to SCHEMA_VERSION
+        (foreign keys must be off: the giveaways table is rebuilt)
+        """
+        if connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # 여러 프로세스가 동시에 열어도 한 번만 바꾸도록 쓰기 잠금을 잡고 다시 확인
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (version,) = connection.execute("PRAGMA user_version").fetchone()
+            table = connection.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'giveaways'"
+            ).fetchone()
+            if version < 2 and table is not None and "UNIQUE" in table[0]:
+                # 제약 조건은 지울 수 없어서 표를 새로 만들어 옮김 (id는 그대로)
+                connection.execute(GIVEAWAYS_TABLE.format(name="giveaways_new"))
+                connection.execute(
+                    "INSERT INTO giveaways_new (id, page, run_date, end_date, updated) "
+                    "SELECT id, page, run_date, end_date, updated FROM giveaways"
+                )
+                connection.execute("DROP TABLE giveaways")
+                connection.execute("ALTER TABLE giveaways_new RENAME TO giveaways")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def normalize(self, address, email_type=""):
+        """
+        Key an address is stored and looked up with (abc@지메일, ABC@gmail.com -> abc@gmail).
+        Always case-insensitive with one name per provider, whatever dedupe_normalization is,
+        so old records stay comparable when the settings change.
+        """
+        local, _, domain = str(address).partition("@")
+        provider = self._providers.get((email_type, domain))
+        if provider is None:
+            provider = canonical_provider(email_type or "", domain, self._alias_lookup)
+            self._providers[email_type, domain] = provider
+        return f"{local.casefold()}@{provider}"
+
+    def begin_giveaway(self, page, run_date=None, end_date=None):
+        """
+        Create a giveaway for one run of a page
+        :param page: page file (only the file name is kept), run_date: date of the run (default: today),
+            end_date: end date of the giveaway (mm/dd) if known
+        :return: giveaway id
+        """
+        page = os.path.basename(page)
+        run_date = (run_date or date.today()).isoformat()
+        updated = datetime.now().isoformat(timespec="seconds")
+        connection = self._connect()
+        try:
+            with connection:
+                return connection.execute(
+                    "INSERT INTO giveaways (page, run_date, end_date, updated) VALUES (?, ?, ?, ?)",
+                    (page, run_date, end_date, updated),
+                ).lastrowid
+        finally:
+            connection.close()
+
+    def set_end_date(self, giveaway_id, end_date):
+        """
+        Keep the end date of a giveaway that was begun before it was known
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "UPDATE giveaways SET end_date = ? WHERE id = ?",
+                    (end_date, giveaway_id),
+                )
+        finally:
+            connection.close()
+
+    def record_stage(self, giveaway_id, record, entrants=None, winners=None):
+        """
+        Write one stage of a giveaway in a single transaction. The stage counts replace the
+        previous run of the stage; entrants/winners, if given, replace all earlier ones.
+        :param giveaway_id: see begin_giveaway, record: stage record of RunReport,
+            entrants/winners: rows [email, email type, ...] (CommentView, list or an iterator read once)
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO stages (giveaway_id, stage, rows_in, rows_out, seconds) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        giveaway_id,
+                        record["stage"],
+                        record.get("rows_in"),
+                        record.get("rows_out"),
+                        record.get("seconds"),
+                    ),
+                )
+                for table, rows in (("entrants", entrants), ("winners", winners)):
+                    if rows is not None:
+                        self._replace_rows(connection, table, giveaway_id, rows)
+        finally:
+            connection.close()
+
+    def _replace_rows(self, connection, table, giveaway_id, rows):
+        (run_date,) = connection.execute(
+            "SELECT run_date FROM giveaways WHERE id = ?", (giveaway_id,)
+        ).fetchone()
+        connection.execute(f"DELETE FROM {table} WHERE giveaway_id = ?", (giveaway_id,))
+        sql = (
+            f"INSERT INTO {table} (normalized, giveaway_id, run_date, address, email_type) "
+            "VALUES (?, ?, ?, ?, ?)"
+        )
+        if isinstance(rows, CommentView):
+            # 행을 만들지 않고 열에서 바로 읽음
+            addresses = rows.column("emails")
+            email_types = rows.column("email_types")
+        elif isinstance(rows, (list, tuple)):
+            addresses = [row[0] for row in rows]
+            email_types = [row[1] for row in rows]
+        else:
+            # 스트리밍 실행의 참여자는 목록을 만들지 않고 하나씩 넣음
+            connection.executemany(
+                sql,
+                (
+                    (
+                        self.normalize(row[0], row[1]),
+                        giveaway_id,
+                        run_date,
+                        row[0],
+                        row[1],
+                    )
+                    for row in rows
+                ),
+            )
+            return
+        values = sorted(
+            zip(
+                map(self.normalize, addresses, email_types),
+                repeat(giveaway_id),
+                repeat(run_date),
+                addresses,
+                email_types,
+            )
+        )
+        # 정규화 주소 순서로 넣으면 인덱스에 차례로 들어가서 훨씬 빠름
+        connection.executemany(sql, values)
+
+    def _query(self, sql, parameters=()):
+        connection = self._connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def has_won(self, address, email_type="", days=90, today=None):
+        """
+        Whether an address won any giveaway run in the last `days` days (today included)
+        """
+        since = ((today or date.today()) - timedelta(days=days)).isoformat()
+        return bool(
+            self._query(
+                "SELECT 1 FROM winners WHERE normalized = ? AND run_date >= ? LIMIT 1",
+                (self.normalize(address, email_type), since),
+            )
+        )
+
+    def giveaway_count(self, address, email_type=""):
+        """
+        Number of giveaways an address entered (counted after removing duplicates)
+        """
+        return self._query(
+            "SELECT COUNT(DISTINCT giveaway_id) FROM entrants WHERE normalized = ?",
+            (self.normalize(address, email_type),),
+        )[0][0]
+
+    def address_history(self, address, email_type=""):
+        """
+        Every giveaway an address entered or won, newest first
+        :return: [(page, run date, end date, won)]
+        """
+        normalized = self.normalize(address, email_type)
+        return self._query(
+            "SELECT giveaways.page, giveaways.run_date, giveaways.end_date, "
+            "EXISTS (SELECT 1 FROM winners WHERE winners.giveaway_id = giveaways.id "
+            "AND winners.normalized = ?) "
+            "FROM giveaways WHERE giveaways.id IN ("
+            "SELECT giveaway_id FROM entrants WHERE normalized = ? "
+            "UNION SELECT giveaway_id FROM winners WHERE normalized = ?) "
+            "ORDER BY giveaways.run_date DESC, giveaways.id DESC",
+            (normalized, normalized, normalized),
+        )
+
+    def recent_winners(self, days=None, giveaways=None, today=None):
+        """
+        Normalized addresses of the winners of the last `days` days and/or the last `giveaways` giveaways
+        """
+        sql = "SELECT DISTINCT normalized FROM winners WHERE 1"
+        parameters = []
+        if days is not None:
+            sql += " AND run_date >= ?"
+            parameters.append(
+                ((today or date.today()) - timedelta(days=days)).isoformat()
+            )
+        if giveaways is not None:
+            sql += (
+                " AND giveaway_id IN (SELECT id FROM giveaways "
+                "ORDER BY run_date DESC, id DESC LIMIT ?)"
+            )
+            parameters.append(giveaways)
+        return {row[0] for row in self._query(sql, parameters)}
+
+    def winner_giveaways(self, limit, exclude=None):
+        """
+        Ids of the last `limit` giveaways that have winners, newest first
+        :param limit: number of giveaways, exclude: giveaway id to leave out (the one being drawn)
+        """
+        return [
+            row[0]
+            for row in self._query(
+                "SELECT id FROM giveaways WHERE id != ? AND EXISTS "
+                "(SELECT 1 FROM winners WHERE winners.giveaway_id = giveaways.id) "
+                "ORDER BY run_date DESC, id DESC LIMIT ?",
+                (-1 if exclude is None else exclude, limit),
+            )
+        ]
+
+    def winners_of(self, giveaway_ids):
+        """
+        Normalized addresses of the winners of some giveaways
+        """
+        giveaway_ids = list(giveaway_ids)
+        if not giveaway_ids:
+            return []
+        placeholders = ", ".join("?" * len(giveaway_ids))
+        return [
+            row[0]
+            for row in self._query(
+                f"SELECT normalized FROM winners WHERE giveaway_id IN ({placeholders})",
+                giveaway_ids,
+            )
+        ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지난 추첨 기록을 조회합니다.")
+    parser.add_argument(
+        "--settings", default="settings.json", help="이메일 별칭을 읽을 설정 파일"
+    )
+    parser.add_argument(
+        "--history", default=None, help="기록 파일 (기본: 설정의 history_file)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    won = commands.add_parser("won", help="최근 당첨 여부")
+    won.add_argument("address", help="이메일 (abc@gmail.com 또는 아이디)")
+    won.add_argument("email_type", nargs="?", default="", help="이메일 종류 (지메일)")
+    won.add_argument("--days", type=int, default=90)
+    entered = commands.add_parser("entered", help="참여한 추첨 목록")
+    entered.add_argument("address")
+    entered.add_argument("email_type", nargs="?", default="")
+    winners = commands.add_parser("winners", help="최근 당첨자 목록")
+    winners.add_argument("--days", type=int, default=None)
+    winners.add_argument("--giveaways", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    # 기록할 때와 같은 별칭으로 주소를 정규화해야 같은 사람으로 찾을 수 있음
+    settings = {}
+    if os.path.exists(args.settings):
+        settings = json.loads(read_text(args.settings))
+    history = args.history or settings.get("history_file", DEFAULT_PATH)
+    if not os.path.exists(history):
+        print(f"{history}을 찾을 수 없습니다.")
+        return 1
+    store = HistoryStore(history, settings.get("email_aliases", {}))
+    if args.command == "won":
+        won = store.has_won(args.address, args.email_type, args.days)
+        print(f"최근 {args.days}일 당첨: {'예' if won else '아니오'}")
+    elif args.command == "entered":
+        rows = store.address_history(args.address, args.email_type)
+        for page, run_date, end_date, won in rows:
+            print(f"{run_date} {page} (종료일 {end_date}){' 당첨' if won else ''}")
+        print(f"참여한 추첨: {len(rows)}개")
+    else:
+        for address in sorted(store.recent_winners(args.days, args.giveaways)):
+            print(address)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import hashlib
+from array import array
+from bisect import bisect_right
+
+from comment_parser import CommentStreamParser, COMMENT_TAG, TIME_TAG
+
+# 댓글마다 하나씩 있는 시간 요소 앞에서 페이지를 나눔
+SEGMENT_MARKER = f'id="{TIME_TAG[1]}"'.encode("ascii")
+COMMENT_MARKER = f'id="{COMMENT_TAG[1]}"'.encode("ascii")
+DIGEST_SIZE = 16
+PROGRESS_SEGMENTS = 1024
+
+
+class SegmentTable:
+    """
+    Records parsed from every segment of one version of a page.
+    A segment is identified by the digest of its bytes and the parser state it started from;
+    everything is kept in flat columns so a table of 100k segments loads and saves quickly.
+    """
+
+    def __init__(self, states=()):
+        # 열린 태그 이름 tuple, 이전 버전의 번호를 그대로 쓰면 구간을 통째로 복사할 수 있음
+        self.states = list(states)
+        self._state_ids = {
+            state: state_id for state_id, state in enumerate(self.states)
+        }
+        self.digests = bytearray()
+        self.start_states = array("I")
+        self.end_states = array("I")
+        self.record_ends = array("I")  # 구간별 record 끝 위치 (times/comments 기준)
+        self.times = []
+        self.comments = []
+        self._index = None
+
+    def __len__(self):
+        return len(self.start_states)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_index"] = None  # 불러올 때 다시 만듦
+        return state
+
+    def _state_id(self, state):
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = self._state_ids[state] = len(self.states)
+            self.states.append(state)
+        return state_id
+
+    def add(self, digest, start_state, end_state, times, comments):
+        self.digests += digest
+        self.start_states.append(self._state_id(start_state))
+        self.end_states.append(self._state_id(end_state))
+        self.times.extend(times)
+        self.comments.extend(comments)
+        self.record_ends.append(len(self.times))
+        self._index = None
+
+    def extend_from(self, other, first, last):
+        """
+        Copy segments first..last-1 of another table that shares the same state numbers
+        """
+        record_start = other.record_start(first)
+        record_end = other.record_ends[last - 1]
+        shift = len(self.times) - record_start
+        self.digests += other.digests[first * DIGEST_SIZE : last * DIGEST_SIZE]
+        self.start_states.extend(other.start_states[first:last])
+        self.end_states.extend(other.end_states[first:last])
+        self.record_ends.extend(end + shift for end in other.record_ends[first:last])
+        self.times.extend(other.times[record_start:record_end])
+        self.comments.extend(other.comments[record_start:record_end])
+        self._index = None
+
+    def find(self, digest, state):
+        """
+        Find a segment with the same bytes that started from the same parser state
+        :return: segment number or None
+        """
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            return None
+        if self._index is None:
+            digests = bytes(self.digests)
+            self._index = {
+                (digests[offset : offset + DIGEST_SIZE], start_state): number
+                for number, (offset, start_state) in enumerate(
+                    zip(range(0, len(digests), DIGEST_SIZE), self.start_states)
+                )
+            }
+        return self._index.get((digest, state_id))
+
+    def digest(self, number):
+        if number >= len(self):
+            return None
+        return bytes(self.digests[number * DIGEST_SIZE : (number + 1) * DIGEST_SIZE])
+
+    def start_state(self, number):
+        return self.states[self.start_states[number]]
+
+    def end_state(self, number):
+        return self.states[self.end_states[number]]
+
+    def record_start(self, number):
+        return self.record_ends[number - 1] if number else 0
+
+
+def segment_starts(content):
+    """
+    Split a saved page into the page header and one segment per comment thread
+    :param content: page bytes
+    :return: start offset of every segment, the first one is 0
+    """
+    starts = [0]
+    find = content.find
+    rfind = content.rfind
+    position = find(SEGMENT_MARKER)
+    while position >= 0:
+        # 시간 요소 태그가 시작하는 '<'에서 자름 (ASCII라 utf-8/cp949 글자 중간이 아님)
+        start = rfind(b"<", starts[-1], position)
+        if start > starts[-1]:
+            starts.append(start)
+        position = find(SEGMENT_MARKER, position + len(SEGMENT_MARKER))
+    return starts
+
+
+def parse_segments(content, encoding, known=None, progress=None):
+    """
+    Parse a page segment by segment, reusing the records of segments that are byte-identical to
+    the previous version of the page and start from the same parser state.
+    When the page is saved again after more comments loaded, only the new threads, the ones
+    whose text changed (ex. "3분 전" -> "5분 전") and the last one are parsed.
+    :param content: page bytes, encoding: page encoding, known: SegmentTable of the previous version,
+        progress: called with (bytes done, total bytes), may raise to stop parsing
+    :return: times, comments, SegmentTable of this version, number of reused segments
+    """
+    known = known or SegmentTable()
+    table = SegmentTable(known.states)
+    times = []
+    comments = []
+    starts = segment_starts(content)
+    ends = starts[1:] + [len(content)]
+    last = len(starts) - 1
+    total = len(content)
+    blake2b = hashlib.blake2b
+    state = ()
+    parser = None
+    reused = 0
+    run_start = run_end = 0  # 이전 버전에서 연속으로 재사용 중인 구간 범위
+
+    def copy_run():
+        if run_end > run_start:
+            table.extend_from(known, run_start, run_end)
+            record_start = known.record_start(run_start)
+            record_end = known.record_ends[run_end - 1]
+            times.extend(known.times[record_start:record_end])
+            comments.extend(known.comments[record_start:record_end])
+
+    for number, (start, end) in enumerate(zip(starts, ends)):
+        if progress is not None and number % PROGRESS_SEGMENTS == 0:
+            progress(start, total)
+        segment = content[start:end]
+        digest = blake2b(segment, digest_size=DIGEST_SIZE).digest()
+        found = None
+        if number < last and state is not None:
+            if (
+                run_end > run_start
+                and known.digest(run_end) == digest
+                and known.start_state(run_end) == state
+            ):
+                found = run_end  # 이전 버전의 다음 구간과 같음 (가장 흔한 경우)
+            else:
+                found = known.find(digest, state)
+        if found is not None:
+            if found != run_end or run_end == run_start:
+                copy_run()
+                run_start = found
+            run_end = found + 1
+            state = known.end_state(found)
+            parser = None
+            reused += 1
+            continue
+        copy_run()
+        run_start = run_end = 0
+
+        start_state = state
+        if parser is None:
+            parser = CommentStreamParser.from_state(state)
+        parser.feed(segment.decode(encoding))
+        if number == last:
+            parser.close()
+        segment_times = [record[0] for record in parser.records]
+        segment_comments = [record[1] for record in parser.records]
+        parser.records.clear()
+        times.extend(segment_times)
+        comments.extend(segment_comments)
+        state = parser.clean_state()
+        if start_state is not None and state is not None and number < last:
+            # 마지막 구간은 페이지 끝 처리가 섞여 있어 저장하지 않음
+            table.add(digest, start_state, state, segment_times, segment_comments)
+    copy_run()
+    if progress is not None:
+        progress(total, total)
+    return times, comments, table, reused
+
+
+def table_from_records(content, encoding, times, comments):
+    """
+    Segment table of a page whose records came from another parser (the fast extractor or the
+    sharded parser), so the next version of the page can still be parsed incrementally.
+    Only the page header and the first comment threads are parsed here; comment threads are
+    siblings on a saved page, so every later thread starts and ends in the same state.
+    :param content: page bytes, encoding: page encoding, times/comments: records of the whole page
+    :return: SegmentTable, None if the records are not one per comment thread (or do not decode with encoding)
+    """
+    starts = segment_starts(content)
+    ends = starts[1:] + [len(content)]
+    last = len(starts) - 1
+    if last != len(times) or last != len(comments):
+        return None
+    # 댓글 요소도 구간마다 정확히 하나 (머리 구간에는 없음)
+    owners = []
+    position = content.find(COMMENT_MARKER)
+    while position >= 0:
+        owners.append(bisect_right(starts, position) - 1)
+        position = content.find(COMMENT_MARKER, position + len(COMMENT_MARKER))
+    if owners != list(range(1, len(starts))):
+        return None
+
+    # 머리 구간, 첫 두 댓글의 상태를 실제로 파싱해서 확인
+    states = []
+    parser = CommentStreamParser()
+    for number in range(min(3, last)):
+        try:
+            parser.feed(content[starts[number] : ends[number]].decode(encoding))
+        except UnicodeDecodeError:
+            return None
+        expected = [[times[number - 1], comments[number - 1]]] if number else []
+        if list(parser.records) != expected:
+            return None
+        parser.records.clear()
+        state = parser.clean_state()
+        if state is None:
+            return None
+        states.append(state)
+    if len(states) == 3 and states[2] != states[1]:
+        return None
+
+    table = SegmentTable()
+    blake2b = hashlib.blake2b
+    state = ()
+    for number in range(last):
+        end_state = states[min(number, len(states) - 1)]
+        digest = blake2b(
+            content[starts[number] : ends[number]], digest_size=DIGEST_SIZE
+        ).digest()
+        records = slice(number - 1, number) if number else slice(0, 0)
+        table.add(digest, state, end_state, times[records], comments[records])
+        state = end_state
+    return table
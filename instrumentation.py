@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime
+from contextlib import contextmanager
+
+logger = logging.getLogger("comment_picker")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING")
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """
+    Write log lines to whatever sys.stdout is at the time, so contextlib.redirect_stdout
+    (batch runner, benchmarks) still silences them
+    """
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+        self.setFormatter(logging.Formatter("%(message)s"))
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure_logging(level):
+    """
+    Set how much the pipeline prints to the console
+    :param level: DEBUG (every comment of every stage), INFO (stage summaries and picked emails), WARNING (nothing)
+    """
+    if not logger.handlers:
+        logger.addHandler(ConsoleHandler())
+        logger.propagate = False
+    level = str(level).upper()
+    logger.setLevel(level if level in LOG_LEVELS else "INFO")
+
+
+class RunReport:
+    """
+    Wall time, CPU time, memory peak and row counts of every stage of one run.
+    A stage is recorded with `with report.stage(name, rows_in) as stage:` and fills in
+    stage["rows_out"] (and stage["bytes"] for parsing) itself.
+    """
+
+    def __init__(self, html_name="", trace_memory=False):
+        self.html_name = html_name
+        self.trace_memory = trace_memory
+        self.created = datetime.now()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Measure one stage
+        :param name: stage name, rows_in: number of input rows
+        :return: record of the stage (dict), filled in when the block ends
+        """
+        import tracemalloc
+
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        started_tracing = False
+        if self.trace_memory:
+            # tracemalloc는 느려서 설정에서 켰을 때만 사용
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        except BaseException as error:
+            record["error"] = type(error).__name__
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - wall, 4)
+            record["cpu_seconds"] = round(time.process_time() - cpu, 4)
+            record["peak_memory_mb"] = None
+            if self.trace_memory:
+                record["peak_memory_mb"] = round(
+                    tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2
+                )
+                if started_tracing:
+                    tracemalloc.stop()
+            if record.get("bytes") is not None and record["seconds"]:
+                record["bytes_per_second"] = round(record["bytes"] / record["seconds"])
+            self.stages.append(record)
+
+    def summary(self, record=None):
+        """
+        One line summary of a stage (the last one by default) for the GUI
+        """
+        record = record or (self.stages[-1] if self.stages else None)
+        if record is None:
+            return ""
+        text = f"{record['stage']}: {record['seconds']:.2f}초 (CPU {record['cpu_seconds']:.2f}초)"
+        if record["rows_in"] is not None and record["rows_out"] is not None:
+            text += f", {record['rows_in']:,} → {record['rows_out']:,}행"
+        elif record["rows_out"] is not None:
+            text += f", {record['rows_out']:,}행"
+        if record.get("bytes_per_second"):
+            text += f", {record['bytes_per_second'] / 1024 / 1024:.1f} MB/s"
+        if record["peak_memory_mb"] is not None:
+            text += f", 최대 {record['peak_memory_mb']:.1f} MB"
+        return text
+
+    def to_dict(self):
+        return {
+            "created": self.created.isoformat(timespec="seconds"),
+            "html_name": self.html_name,
+            "seconds": round(sum(record["seconds"] for record in self.stages), 4),
+            "stages": self.stages,
+        }
+
+    def save(self, directory="data"):
+        """
+        Save the report as json
+        :param directory: output directory
+        :return: path of the saved report
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f"{self.created.strftime('%Y-%m-%d_%H%M%S')}_run_report.json"
+        )
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=4)
+        return path
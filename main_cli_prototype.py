@@ -1,8 +1,11 @@
-import os
-from bs4 import BeautifulSoup
 import re
 from datetime import datetime
 import json
+from comment_parser import parse_comments
+from dedupe import find_duplicates
+from email_extractor import format_email, get_extractor, mask_email
+from exporter import export_path, export_rows
+from relative_time import parse_day_offset
 
 # load setting from settings.json
 try:
@@ -16,48 +19,15 @@ html_name = settings["html_name"]
 email_types = settings["email_types"]
 pick_number = settings["pick_number"]
 show_process = settings["show_process"]
+email_aliases = settings.get("email_aliases", {})
 
 
 def get_comments():
-    # Try to load the HTML content from the file with UTF-8 encoding
-    try:
-        with open(html_name, "r", encoding="utf-8") as file:
-            html_content = file.read()
-    except UnicodeDecodeError:
-        # If UTF-8 fails, try with CP949 encoding
-        with open(html_name, "r", encoding="cp949") as file:
-            html_content = file.read()
-
-    # Parse the HTML content
-    soup = BeautifulSoup(html_content, "html.parser")
-
-    # Find all comment elements
-    comment_elements = soup.find_all("yt-attributed-string", id="content-text")
-    time_elements = soup.find_all("span", id="published-time-text")
-
-    # 댓글 내용
-    comments = [
-        re.sub(r"\s+", " ", comment.get_text(strip=True))
-        for comment in comment_elements
-    ]
-    # 댓글 시간
-    times = [time.get_text(strip=True) for time in time_elements]
-    # 이메일 타입
-    emails = []
-    for comment in comments:
-        found = False
-        for email_type in email_types:
-            if email_type in comment:
-                emails.append(email_type)
-                found = True
-                break
-        if not found:  # 이메일 타입이 없는 경우
-            emails.append("기타")
-
-    result = []
-
-    for i in range(len(comments)):
-        result.append([times[i], comments[i], emails[i]])
+    # 파일을 조금씩 읽으면서 댓글, 시간, 이메일 타입을 추출
+    result = parse_comments(html_name, email_types, aliases=email_aliases)
+    times = [comment[0] for comment in result]
+    comments = [comment[1] for comment in result]
+    emails = [comment[2] for comment in result]
 
     # 계산과정 출력
     if show_process:
@@ -74,20 +44,12 @@ def get_comments():
 def save_comments(comments, filename):
     """
     comments: get_comments에서 반환된 댓글 리스트입니다. [[time, comment, email_type], ...] 형태
-    주어진 comments를 파일 (yyyy-mm-dd_{filename}.txt) 로 저장합니다.
-    여러번 실행되면 덮어씌웁니다.
+    주어진 comments를 파일 (yyyy-mm-dd_{filename}.csv) 로 저장합니다.
+    여러번 실행되면 덮어씌웁니다. 댓글에 쉼표가 있어도 깨지지 않도록 csv로 저장합니다.
     """
     current_date = datetime.now().strftime("%Y-%m-%d")
     directory = "history"
-
-    # Create directory if it doesn't exist
-    os.makedirs(directory, exist_ok=True)
-
-    with open(
-        f"./history/{current_date}_{filename}.txt", "w", encoding="utf-8"
-    ) as file:
-        for comment in comments:
-            file.write(", ".join(comment) + "\n")
+    export_rows(comments, export_path(directory, f"{current_date}_{filename}"))
 
 
 def overdue_comments(comments, end_date):
@@ -100,7 +62,7 @@ def overdue_comments(comments, end_date):
     cnt_not_overdue = 0
     result = []
     for comment in comments:
-        if int(re.match(r"\d+", comment[0]).group()) >= threshold - 1:
+        if parse_day_offset(comment[0]) >= threshold - 1:
             # within due date
             if show_process:
                 print(f"종료일자 이전 댓글: {comment[0]}, {comment[1]}")
@@ -122,29 +84,23 @@ def overdue_comments(comments, end_date):
 def find_email(comments):
     """
     comments: get_comments에서 반환된 댓글 리스트입니다. [[time, comment, email_type], ...] 형태
-    댓글 중 이메일 주소를 찾아 출력해줍니다.
+    댓글 중 이메일 주소(전체 주소 또는 숫자만이 아닌 첫 단어)를 찾아 출력해줍니다.
     """
+    # 설정이 같으면 미리 컴파일해 둔 추출기를 다시 씀
+    positions, emails, domain_types = get_extractor(
+        email_types, email_aliases
+    ).extract_all([comment[1] for comment in comments])
     result = []
-    cnt_email = 0
-    cnt_not_email = 0
-    email_pattern = r"[a-zA-Z0-9_-]+"
-    for comment in comments:
-        emails = re.findall(email_pattern, comment[1])
-        for email in emails:
-            if not email.isdigit():
-                cnt_email += 1
-                result.append([email, comment[2]])
-                if show_process:
-                    print(f"이메일: {email}")
-                break
-            else:
-                # 댓글에 숫자가 들어간 경우
-                cnt_not_email += 1
-                if show_process:
-                    print(f"이메일이 아닌 것: {email}")
+    for position, email, domain_type in zip(positions, emails, domain_types):
+        # 전체 주소는 도메인으로 이메일 종류를 정함
+        result.append([email, domain_type or comments[position][2]])
+        if show_process:
+            print(f"이메일: {email}")
+    cnt_email = len(result)
+    cnt_not_email = len(comments) - cnt_email
 
     print(f"이메일: {cnt_email}개")
-    print(f"이메일이 아닌 것: {cnt_not_email}개")
+    print(f"이메일이 없는 댓글: {cnt_not_email}개")
     print()
 
     return result
@@ -155,13 +111,11 @@ def find_duplicate_comments(emails):
     emails: find_email에서 반환된 댓글 리스트입니다. [[email, email_type], ...] 형태
     중복된 이메일이 있다면 찾아서 출력해줍니다.
     """
-    email_list = [email[0] for email in emails]
-    duplicate_emails = set(
-        [email for email in email_list if email_list.count(email) > 1]
+    filtered_emails, duplicate_emails, _, _, occurrences = find_duplicates(
+        emails, settings.get("dedupe_normalization", []), email_aliases
     )
-    filtered_emails = [email for email in emails if email[0] not in duplicate_emails]
     if duplicate_emails:
-        print(f"중복된 이메일: {duplicate_emails}")
+        print(f"중복된 이메일: {occurrences}")
     else:
         print("중복된 이메일이 없습니다.")
 
@@ -178,12 +132,12 @@ def random_picker(emails, num):
 
     random_emails = random.sample(emails, num)
     for email in random_emails:
-        print(f"{email[0]}@{email[1]}")
+        print(format_email(email[0], email[1]))
 
     print("마스킹된 이메일 주소:")
     # 마스킹된 이메일 주소 출력
     for email in random_emails:
-        print(f"{email[0][:-4]}****@{email[1]}")
+        print(format_email(mask_email(email[0]), email[1]))
     print()
 
 
@@ -1,282 +1,23 @@
-import os
 import re
-import json
-from datetime import datetime
-from bs4 import BeautifulSoup
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import random
-
-
-class CommentAnalyzer:
-    def __init__(self, settings_file="settings.json"):
-        if not os.path.exists("settings.json"):
-            self._create_settings()
-        self._get_settings()
-
-    def _create_settings(self):
-        """
-        Create settings.json file
-        """
-        settings = {
-            "html_name": "comments.html",
-            "email_types": [
-                "\uc9c0\uba54\uc77c",
-                "\ub124\uc774\ubc84",
-                "\ud56b\uba54\uc77c",
-                "\uc544\uc6c3\ub8e9",
-                "\ud55c\uba54\uc77c",
-                "\ub2e4\uc74c",
-            ],
-            "pick_number": 3,
-            "show_process": True,
-            "grace_period": 1,
-        }
-        with open("settings.json", "w", encoding="utf-8") as file:
-            json.dump(settings, file, indent=4)
-
-    def _get_settings(self):
-        """
-        Load settings from settings.json file
-        html_name: 댓글들이 달린 HTML 파일 저장 이름
-        email_types: 댓글에서 이메일을 추출할 때 분류되는 이메일 종류
-        pick_number: 추첨할 댓글의 개수
-        show_process: 중간 과정을 출력할지 여부 (콘솔에 출력이라 gui에서는 사용하지 않음)
-        grace_period: 종료일자 이후 며칠까지 댓글 가져올지
-        """
-        try:
-            with open("settings.json", "r", encoding="utf-8") as file:
-                self.settings = json.load(file)
-        except UnicodeDecodeError:
-            with open("settings.json", "r", encoding="cp949") as file:
-                self.settings = json.load(file)
-        self.html_name = self.settings["html_name"]
-        self.email_types = self.settings["email_types"]
-        self.pick_number = self.settings["pick_number"]
-        self.show_process = self.settings["show_process"]
-        self.grace_period = self.settings["grace_period"]
-
-    def get_comments(self):
-        """
-        Get comments from the HTML file
-        :return: comments[time, comment, email type]
-        """
-        try:
-            with open(self.html_name, "r", encoding="utf-8") as file:
-                html_content = file.read()
-        except UnicodeDecodeError:
-            with open(self.html_name, "r", encoding="cp949") as file:
-                html_content = file.read()
-        except FileNotFoundError:
-            messagebox.showerror(
-                "파일 에러",
-                f"{self.html_name}을 찾을 수 없습니다.\n실행파일과 같은 폴더에 저장했는지 확인 부탁드립니다.",
-            )
-            return
-
-        soup = BeautifulSoup(html_content, "html.parser")
-        comment_elements = soup.find_all("yt-attributed-string", id="content-text")
-        time_elements = soup.find_all("span", id="published-time-text")
-
-        comments = [
-            re.sub(r"\s+", " ", comment.get_text(strip=True))
-            for comment in comment_elements
-        ]
-        times = [time.get_text(strip=True) for time in time_elements]
-        emails = []
-        for comment in comments:
-            found = False
-            for email_type in self.email_types:
-                if email_type in comment:
-                    emails.append(email_type)
-                    found = True
-                    break
-            if not found:
-                emails.append("기타")
-
-        result = []
-        for i in range(len(comments)):
-            result.append([times[i], comments[i], emails[i]])
-
-        return result
-
-    def save_data(self, datas, filename):
-        """
-        Save data to a text file
-        :param comments: 데이터 리스트, 파일이름
-        """
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        directory = "data"
-        os.makedirs(directory, exist_ok=True)
-        try:
-            with open(
-                f"./{directory}/{current_date}_{filename}.txt", "w", encoding="utf-8"
-            ) as file:
-                for data in datas:
-                    file.write(", ".join(data) + "\n")
-                messagebox.showinfo(
-                    "저장 성공",
-                    f"{directory}에 {current_date}_{filename}.txt를 성공적으로 저장했습니다.",
-                )
-        except Exception as e:
-            messagebox.showerror(
-                "저장 실패", f"파일 저장 중 오류가 발생했습니다: {str(e)}"
-            )
-
-    def overdue_comments(self, comments, end_date):
-        """
-        Remove comments that are posted after the end date
-        :param comments: comments[time, comment, email type], end_date
-        :return: comments[time, comment, email type] that are posted before the end date, comments[time, comment, email type] that are posted after the end date, number of overdue comments, number of not overdue comments
-        """
-        threshold = self.__time_conversion(end_date)
-        cnt_overdue = 0
-        cnt_not_overdue = 0
-        result = []
-        overdue_comments = []
-        for comment in comments:
-            if (
-                int(re.match(r"\d+", comment[0]).group())
-                >= threshold - self.grace_period
-            ):
-                if self.show_process:
-                    print(f"종료일자 이전 댓글: {comment[0]}, {comment[1]}")
-                result.append(comment)
-                cnt_not_overdue += 1
-            else:
-                print(f"종료일자 이후 댓글: {comment[0]}, {comment[1]}")
-                overdue_comments.append(comment)
-                cnt_overdue += 1
-        print(f"종료일자 이후 댓글: {cnt_overdue}개")
-        print(f"종료일자 이전 댓글: {cnt_not_overdue}개")
-        print()
-
-        return result, overdue_comments, cnt_overdue, cnt_not_overdue
-
-    def find_email(self, comments):
-        """
-        Find emails from comments
-        :param comments: comments[time, comment, email type]
-        :return: emails[time, comment, email type], number of comments that contain email, number of comments that do not contain email
-        """
-        result = []
-        cnt_email = 0
-        cnt_not_email = 0
-        email_pattern = r"[a-zA-Z0-9_-]+"
-        for comment in comments:
-            emails = re.findall(email_pattern, comment[1])
-            for email in emails:
-                if not email.isdigit():
-                    cnt_email += 1
-                    result.append([email, comment[2]])
-                    break
-                else:
-                    cnt_not_email += 1
-        return result, cnt_email
-
-    def find_duplicate_comments(self, emails):
-        """
-        Find duplicate emails from emails
-        :param emails: emails[time, comment, email type]
-        :return: emails[time, comment, email type] that do not contain duplicate emails, duplicate emails, number of duplicate emails, number of emails that do not contain duplicate emails
-        """
-        email_list = [email[0] for email in emails]
-        duplicate_emails = set(
-            [email for email in email_list if email_list.count(email) > 1]
-        )
-        filtered_emails = [
-            email for email in emails if email[0] not in duplicate_emails
-        ]
-        if duplicate_emails:
-            print(f"중복된 이메일: {duplicate_emails}")
-        else:
-            print("중복된 이메일이 없습니다.")
-
-        return (
-            filtered_emails,
-            list(duplicate_emails),
-            len(duplicate_emails),
-            len(filtered_emails),
-        )
-
-    def random_picker(self, emails, pick_number):
-        """
-        Pick random emails from emails
-        :param emails: emails[time, comment, email type], pick_number
-        :return: random_emails[picked emails]
-        """
-        random_emails = random.sample(emails, pick_number)
-        for email in random_emails:
-            print(f"{email[0]}@{email[1]}")
-
-        print("마스킹된 이메일 주소:")
-        # 마스킹된 이메일 주소 출력
-        for email in random_emails:
-            print(f"{email[0][:-4]}****@{email[1]}")
-        print()
-
-        return random_emails
-
-    def all_in_one(self, end_date):
-        """
-        Run all the methods in order
-        """
-        try:
-            comments = self.get_comments()
-            comments_remove_overdue, _, _, _ = self.overdue_comments(comments, end_date)
-            comments_emails, _ = self.find_email(comments_remove_overdue)
-            (
-                comments_remove_duplicate,
-                _,
-                _,
-                _,
-            ) = self.find_duplicate_comments(comments_emails)
-            random_emails = self.random_picker(
-                comments_remove_duplicate, self.pick_number
-            )
-        except Exception:  # Catch all exceptions
-            messagebox.showerror(
-                "에러", "모든 과정을 실행하는 도중 오류가 발생했습니다."
-            )
-            return
-        return random_emails
-
-    def __time_conversion(self, end_date):
-        """
-        Convert end date to the number of days from the current date
-        :param end_date: end date
-        :return: the number of days from the current date
-        """
-        current_year = datetime.now().year
-        end_date_with_year = f"{current_year}/{end_date}"
-        date_diff = datetime.now() - datetime.strptime(end_date_with_year, "%Y/%m/%d")
-        print(f"종료일({end_date})으로부터 {date_diff.days}일 지났습니다.")
-        print()
-        return date_diff.days
-
-    def save_settings(self, html_name, email_types, pick_number, grace_period):
-        """
-        Save settings to settings.json file
-        :param html_name: HTML file name, email_types: email types, pick_number: number of picked emails, grace_period: grace period
-        """
-        self.settings["html_name"] = html_name
-        self.settings["email_types"] = [
-            email_type.strip() for email_type in email_types.split(",")
-        ]
-        try:
-            self.settings["pick_number"] = int(pick_number)
-            self.settings["grace_period"] = int(grace_period)
-            if self.settings["pick_number"] <= 0 or self.settings["grace_period"] <= 0:
-                raise ValueError
-        except ValueError:
-            messagebox.showerror(
-                "설정", "뽑기 수와 grace period는 양수로 입력해주세요."
-            )
-            return
-        with open("settings.json", "w", encoding="utf-8") as file:
-            json.dump(self.settings, file, indent=4)
-        self._get_settings()  # Update settings
-        messagebox.showinfo("설정", "정상적으로 저장되었습니다.")
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+from analyzer_core import CommentAnalyzer
+from stage_graph import StageGraph
+from virtual_table import VirtualTable, fill_text_in_chunks
+from worker import BackgroundRunner, StageCancelled
+
+# 현재 단계(current_status)별 저장 파일 이름과 그 결과를 만든 단계
+STATUS_FILES = {
+    1: ("전체댓글", "get_comments"),
+    2: ("기한초과제거", "overdue_comments"),
+    3: ("이메일추출", "find_email"),
+    4: ("중복제거", "find_duplicate_comments"),
+    5: ("추첨결과", None),  # 추첨 결과는 이어서 실행할 단계가 없음
+}
+STAGE_STATUS = {stage: status for status, (_, stage) in STATUS_FILES.items() if stage}
+STAGE_STATUS["near_duplicate_comments"] = 3
+STAGE_STATUS["exclude_past_winners"] = 4
+STAGE_STATUS["random_picker"] = 4
 
 
 class CommentAnalyzerApp:
@@ -338,6 +79,16 @@ class CommentAnalyzerApp:
         )
         self.settings_button.grid(row=1, column=7, padx=5, pady=5)
 
+        # 페이지가 다시 저장되면 보고 있던 단계를 자동으로 다시 실행
+        self.watch_var = tk.BooleanVar(value=False)
+        self.watch_button = tk.Checkbutton(
+            self.settings_frame,
+            text="페이지 변경 감시",
+            variable=self.watch_var,
+            command=self.run_toggle_watch,
+        )
+        self.watch_button.grid(row=1, column=6, padx=5, pady=5)
+
         ###########################################################################################
         # Main Content Frame
         self.tree_frame = tk.Frame(root)
@@ -373,7 +124,8 @@ class CommentAnalyzerApp:
         self.result_label.grid(row=2, column=0, padx=5, pady=5, sticky="w")
 
         # Configure scrollbars
-        self.vsb.config(command=self.tree.yview)
+        # 세로 스크롤은 VirtualTable이 데이터 위치 기준으로 관리
+        self.table = VirtualTable(self.tree, self.vsb)
         self.hsb.config(command=self.tree.xview)
 
         # Configure grid weights
@@ -390,6 +142,20 @@ class CommentAnalyzerApp:
             self.buttons_frame, text="현재 단계 저장", command=self.run_save_comments
         )
         self.save_comments_button.pack(side="left", padx=5, pady=5)
+        self.load_snapshot_button = tk.Button(
+            self.buttons_frame, text="단계 불러오기", command=self.run_load_snapshot
+        )
+        self.load_snapshot_button.pack(side="left", padx=5, pady=5)
+
+        # 진행 상황과 취소 버튼 (백그라운드 실행 중에만 사용)
+        self.progress_bar = ttk.Progressbar(
+            self.buttons_frame, length=150, mode="determinate", maximum=100
+        )
+        self.progress_bar.pack(side="left", padx=5, pady=5)
+        self.cancel_button = tk.Button(
+            self.buttons_frame, text="취소", state="disabled", command=self.run_cancel
+        )
+        self.cancel_button.pack(side="left", padx=5, pady=5)
 
         self.random_picker_button = tk.Button(
             self.buttons_frame, text="5.추첨", command=self.run_random_picker
@@ -432,6 +198,12 @@ class CommentAnalyzerApp:
         self.comments_remove_duplicate = []
         self.duplicate_emails = []
         self.current_status = 0
+        self.watcher = None  # 변경 감시 중이면 PageWatcher
+        self._watch_after = None  # 다음 확인 예약 (root.after id)
+        self._watch_pending = False  # 실행 중이라 미뤄둔 변경이 있는지
+        self._refreshing = (
+            False  # 변경 감시로 다시 실행 중이면 새 창/알림을 띄우지 않음
+        )
         # used for the status of the program and saving the data
         # Status:
         # 0: before get_comments
@@ -441,51 +213,136 @@ class CommentAnalyzerApp:
         # 4: after find_duplicate_comments
         # 5: after random_picker
 
+        self.runner = BackgroundRunner(root, on_progress=self._update_progress)
+        self.analyzer.progress = self.runner.report
+        # 단계 결과를 입력(페이지, 설정, 종료일자)별로 기억해서 바뀐 단계부터만 다시 실행
+        self.graph = StageGraph(self.analyzer)
+        self.stage_buttons = [
+            self.all_in_one_button,
+            self.get_comments_button,
+            self.overdue_comments_button,
+            self.find_email_button,
+            self.find_duplicate_comments_button,
+            self.random_picker_button,
+            self.save_comments_button,
+            self.load_snapshot_button,
+            self.settings_button,
+        ]
+
     def run_all_in_one(self):
         """
         Run all the methods in order
         """
         end_date = self.get_end_date()
-        result = self.analyzer.all_in_one(end_date=end_date)
+
+        def work():
+            if self.analyzer.stream_pipeline:
+                return self.analyzer.all_in_one(end_date)
+            result = self.graph.draw(end_date)
+            self.analyzer.save_report()
+            return result
+
+        self._run_in_background(work, self._show_all_in_one)
+
+    def _show_all_in_one(self, result):
         self._show_comments_in_new_window(result + [""] + self._mask_email(result))
+        counts = self.analyzer.report.stages[-1].get("counts")
+        if counts is not None:
+            # stream_pipeline: 단계별 결과는 남지 않고 개수만 모아짐
+            self.result_label.config(
+                text=f"전체 댓글: {counts['comments']}개\n"
+                f"종료일자 이후 댓글: {counts['overdue']}개\n"
+                f"이메일 주소를 포함한 댓글: {counts['emails']}개\n"
+                f"중복된 이메일: {counts['duplicates']}개\n"
+                f"중복되지 않은 이메일: {counts['entries']}개"
+                + (
+                    f"\n제외된 지난 당첨자: {counts['past_winners']}개"
+                    if self.analyzer.exclude_recent_winners
+                    else ""
+                )
+            )
 
     def run_get_comments(self):
         """
         call get_comments method and display the comments in the Treeview
         """
-        self.comments = self.analyzer.get_comments()
+        self._run_in_background(
+            lambda: self.graph.result("get_comments"), self._show_get_comments
+        )
+
+    def _show_get_comments(self, comments):
+        self.comments = comments
         self.current_status = 1
         self.result_label.config(text="")
         self._display_table(self.comments, ["시간", "댓글", "이메일 종류"])
 
     def run_save_comments(self):
         """
-        Save comments to a text file
+        Save the rows of the current stage to a file (and a snapshot if save_snapshots is on)
         """
-        comments = self._get_treeview_data()
         if self.current_status == 0:
             messagebox.showerror("Save Comments", "댓글을 먼저 가져와주세요.")
             return
-        elif self.current_status == 1:
-            filename = "전체댓글"
-        elif self.current_status == 2:
-            filename = "기한초과제거"
-        elif self.current_status == 3:
-            filename = "이메일추출"
-        elif self.current_status == 4:
-            filename = "중복제거"
-        elif self.current_status == 5:
-            filename = "추첨결과"
-            comments += [[email[0][:-4] + "****", email[1]] for email in comments]
-        self.analyzer.save_data(comments, filename)
+        filename, stage = STATUS_FILES[self.current_status]
+        # 표에 보이는 단계 결과를 복사하지 않고 그대로 저장
+        comments = self.table.data
+        if self.current_status == 5:
+            comments = list(comments) + self._mask_email(comments)
+
+        def show_saved(path):
+            messagebox.showinfo("저장 성공", f"{path}를 성공적으로 저장했습니다.")
+
+        self._run_in_background(
+            lambda: self.analyzer.save_data(comments, filename, stage), show_saved
+        )
+
+    def run_load_snapshot(self):
+        """
+        Load a stage saved with save_snapshots and continue from the next stage
+        """
+        path = filedialog.askopenfilename(
+            title="단계 불러오기",
+            initialdir="data",
+            filetypes=[("단계 저장 파일", "*.snapshot"), ("모든 파일", "*.*")],
+        )
+        if path:
+            self._run_in_background(
+                lambda: self.analyzer.load_snapshot(path), self._show_snapshot
+            )
+
+    def _show_snapshot(self, result):
+        stage, rows = result
+        status = STAGE_STATUS[stage]
+        self.graph.pin(stage, rows)
+        if status == 1:
+            self._show_get_comments(rows)
+            return
+        if status == 2:
+            self.comments_remove_overdue = rows
+        elif status == 3:
+            self.comments_emails = rows
+        elif status == 4:
+            self.comments_remove_duplicate = rows
+        self.current_status = status
+        self.result_label.config(text=f"불러온 행: {len(rows)}개")
+        if rows.kind == "email":
+            self._display_table(rows, ["이메일", "이메일 종류"])
+        else:
+            self._display_table(rows, ["시간", "댓글", "이메일 종류"])
 
     def run_overdue_comments(self):
         """
         call overdue_comments method and display the comments in the Treeview
         """
         end_date = self.get_end_date()
+        self._run_in_background(
+            lambda: self.graph.result("overdue_comments", end_date),
+            self._show_overdue_comments,
+        )
+
+    def _show_overdue_comments(self, result):
         self.comments_remove_overdue, comments_overdue, cnt_overdue, cnt_not_overdue = (
-            self.analyzer.overdue_comments(self.comments, end_date)
+            result
         )
         self.current_status = 2
         self._display_table(
@@ -502,55 +359,157 @@ class CommentAnalyzerApp:
         end_date = self.end_date_entry.get()
         # output error if end_date is not in the correct format
         if not re.match(r"\d{2}/\d{2}", end_date):
-            messagebox.showerror(
-                "날짜형식 오류", "종료일자는 mm/dd 형식으로 입력해주세요."
-            )
+            # 페이지 감시로 다시 실행할 때는 바뀔 때마다 창이 쌓이지 않도록 띄우지 않음
+            if not self._refreshing:
+                messagebox.showerror(
+                    "날짜형식 오류", "종료일자는 mm/dd 형식으로 입력해주세요."
+                )
             raise ValueError("Invalid date format")
         else:
             return end_date
 
     def run_find_email(self):
-        self.comments_emails, cnt_email = self.analyzer.find_email(
-            self.comments_remove_overdue
+        end_date = self.get_end_date()
+        self._run_in_background(
+            lambda: self.graph.result("find_email", end_date), self._show_find_email
         )
+
+    def _show_find_email(self, result):
+        self.comments_emails, cnt_email, near_duplicates = result
+        result_text = f"이메일 주소를 포함한 댓글: {cnt_email}개"
+        if near_duplicates is not None:
+            self.comments_emails, clusters, cnt_near_duplicate = near_duplicates
+            if clusters:
+                # 묶음마다 빈 줄로 구분해서 보여주기
+                rows = []
+                for number, cluster in enumerate(clusters, 1):
+                    rows.append([f"[묶음 {number}] {len(cluster)}개", ""])
+                    rows.extend(cluster)
+                    rows.append([""])
+                self._show_comments_in_new_window(rows, title="유사 댓글 묶음")
+            result_text += f"\n유사 댓글로 제외된 이메일: {cnt_near_duplicate}개"
         self.current_status = 3
         self._display_table(self.comments_emails, ["이메일", "이메일 종류"])
-        self.result_label.config(
-            text=f"이메일 주소를 포함한 댓글: {cnt_email}개",
-        )
+        self.result_label.config(text=result_text)
 
     def run_find_duplicate_comments(self):
+        end_date = self.get_end_date()
+
+        def work():
+            return (
+                self.graph.result("find_duplicate_comments", end_date),
+                self.graph.result("exclude_past_winners", end_date),
+            )
+
+        self._run_in_background(work, self._show_find_duplicate_comments)
+
+    def _show_find_duplicate_comments(self, result):
+        result, past_winners = result
         (
             self.comments_remove_duplicate,
             self.duplicate_emails,
             cnt_duplicate,
             cnt_not_duplicate,
-        ) = self.analyzer.find_duplicate_comments(self.comments_emails)
-        if self.duplicate_emails:
+            occurrences,
+        ) = result
+        if self._refreshing:
+            pass  # 변경 감시로 다시 실행할 때는 개수만 갱신
+        elif self.duplicate_emails:
             messagebox.showinfo("중복 제거", "중복된 이메일이 있습니다.")
             self._show_comments_in_new_window(
                 # _show_comments_in_new_window가 입력받는 형태로 변환
-                [[duplicate_email, ""] for duplicate_email in self.duplicate_emails],
+                [
+                    [duplicate_email, f"{occurrences[duplicate_email]}회"]
+                    for duplicate_email in self.duplicate_emails
+                ],
                 title="중복된 이메일 주소",
             )  # 중복 이메일 보여주기
         else:
             messagebox.showinfo("중복 제거", "중복된 이메일이 없습니다.")
+        result_text = f"중복된 이메일: {cnt_duplicate}개\n중복되지 않은 이메일: {cnt_not_duplicate}개"
+        if past_winners is not None:
+            self.comments_remove_duplicate, excluded, cnt_excluded = past_winners
+            if excluded:
+                self._show_comments_in_new_window(excluded, title="제외된 지난 당첨자")
+            result_text += f"\n제외된 지난 당첨자: {cnt_excluded}개"
         self.current_status = 4
-        self.result_label.config(
-            text=f"중복된 이메일: {cnt_duplicate}개\n중복되지 않은 이메일: {cnt_not_duplicate}개"
-        )
+        self.result_label.config(text=result_text)
         self._display_table(self.comments_remove_duplicate, ["이메일", "이메일 종류"])
 
     def run_random_picker(self):
-        result = self.analyzer.random_picker(
-            self.comments_remove_duplicate, int(self.count_entry.get())
+        end_date = self.get_end_date()
+        pick_number = int(self.count_entry.get())
+        self._run_in_background(
+            lambda: self.graph.draw(end_date, pick_number), self._show_random_picker
         )
+
+    def _show_random_picker(self, result):
         result_masked = self._mask_email(result)
         self._show_comments_in_new_window(result + [""] + result_masked)
 
         self.current_status = 5
         self.result_label.config(text="")
         self._display_table(result, ["이메일", "이메일 종류"])
+        try:
+            self.analyzer.save_report()
+        except OSError:
+            pass  # 실행 기록 저장 실패는 추첨 결과에 영향 없음
+
+    def run_cancel(self):
+        """
+        Stop the stage running in the background
+        """
+        self.runner.cancel()
+
+    def _run_in_background(self, work, on_done):
+        """
+        Run a stage on the worker thread and show its result when it finishes
+        :param work: stage to run (must not touch Tk), on_done: called with the result on the UI thread
+        """
+
+        def finish(result):
+            self._set_running(False)
+            on_done(result)
+            self._show_stage_summary()
+            self._refreshing = False
+
+        if self.runner.start(work, finish, self._on_stage_error):
+            self._set_running(True)
+
+    def _set_running(self, running):
+        state = "disabled" if running else "normal"
+        for button in self.stage_buttons:
+            button.config(state=state)
+        self.cancel_button.config(state="normal" if running else "disabled")
+        self.progress_bar["value"] = 0
+
+    def _show_stage_summary(self):
+        """
+        Add the time of the last stage to the result label (show_stage_summary)
+        """
+        if not self.analyzer.show_stage_summary:
+            return
+        summary = self.analyzer.report.summary()
+        text = self.result_label.cget("text")
+        self.result_label.config(text=f"{text}\n{summary}" if text else summary)
+
+    def _update_progress(self, percent):
+        self.progress_bar["value"] = percent
+
+    def _on_stage_error(self, error):
+        self._set_running(False)
+        self._refreshing = False
+        if isinstance(error, StageCancelled):
+            self.result_label.config(text="취소되었습니다.")
+        elif isinstance(error, FileNotFoundError):
+            messagebox.showerror(
+                "파일 에러",
+                f"{self.analyzer.html_name}을 찾을 수 없습니다.\n실행파일과 같은 폴더에 저장했는지 확인 부탁드립니다.",
+            )
+        else:
+            messagebox.showerror(
+                "에러", f"실행하는 도중 오류가 발생했습니다: {str(error)}"
+            )
 
     def _mask_email(self, emails):
         """
@@ -558,7 +517,9 @@ class CommentAnalyzerApp:
         :param email: email address
         :return: masked email address
         """
-        return [[email[0][:-4] + "****", email[1]] for email in emails]
+        from email_extractor import mask_email
+
+        return [[mask_email(email[0]), email[1]] for email in emails]
 
     def _display_table(self, data, columns):
         """
@@ -573,46 +534,123 @@ class CommentAnalyzerApp:
                 self.tree.column(col, width=500)
             else:
                 self.tree.column(col, width=20)
-        for row in data:
-            self.tree.insert("", "end", values=row)
+        # 변경 감시로 다시 실행하면 보던 위치를 유지
+        self.table.set_data(data, keep_position=self._refreshing)
 
     def _show_comments_in_new_window(self, comments, title="추첨 결과"):
         """
         Show comments in a new window
         :param comments: comments to show, title of the window
         """
+        if self._refreshing:
+            return
         new_window = tk.Toplevel(self.root)
         new_window.title(title)
         new_window.geometry("800x300")
-        # comments 길이와 상관없이 입력받을 수 있도록 함 " ".join(map(str, comment))
-        text = "\n".join([" ".join(map(str, comment)) for comment in comments])
         entry = scrolledtext.ScrolledText(new_window, wrap="word")
-        entry.insert("1.0", text)
         entry.pack(expand=True, fill="both")
+        # comments 길이와 상관없이 입력받을 수 있도록 함 " ".join(map(str, comment))
+        # 양이 많아도 창이 바로 뜨도록 한가할 때 조금씩 채움
+        fill_text_in_chunks(entry, comments)
 
-    def _get_treeview_data(self):
+    def _run_save_settings(self):
         """
-        Get data from the Treeview
-        :return: data in the Treeview
+        Save settings to settings.json file
         """
-        data = []
-        for item in self.tree.get_children():
-            data.append(self.tree.item(item)["values"])
-        return data
+        try:
+            self.analyzer.save_settings(
+                self.html_name_entry.get(),
+                self.email_entry.get(),
+                self.count_entry.get(),
+                self.grace_period_entry.get(),
+            )
+        except ValueError as error:
+            messagebox.showerror("설정", str(error))
+            return
+        messagebox.showinfo("설정", "정상적으로 저장되었습니다.")
+        # 보고 있던 단계를 바뀐 설정으로 다시 보여줌 (설정이 바뀐 단계부터만 실행됨)
+        rerun = self._stage_runs().get(self.current_status)
+        if rerun is not None:
+            rerun()
+
+    def _stage_runs(self):
+        return {
+            1: self.run_get_comments,
+            2: self.run_overdue_comments,
+            3: self.run_find_email,
+            4: self.run_find_duplicate_comments,
+            5: self.run_random_picker,
+        }
 
-    def _run_save_settings(self):
+    def run_toggle_watch(self):
         """
-        Save settings to settings.json file
+        Start or stop watching html_name (watch_interval, watch_debounce)
+        """
+        from page_watcher import PageWatcher
+
+        if self._watch_after is not None:
+            self.root.after_cancel(self._watch_after)
+            self._watch_after = None
+        if not self.watch_var.get():
+            self.watcher = None
+            return
+        self.watcher = PageWatcher(
+            self.analyzer.html_name, self.analyzer.watch_debounce
+        )
+        self._watch_pending = False
+        self._schedule_watch()
+
+    def _schedule_watch(self):
+        self._watch_after = self.root.after(
+            int(self.analyzer.watch_interval * 1000), self._poll_watch
+        )
+
+    def _poll_watch(self):
         """
-        self.analyzer.save_settings(
-            self.html_name_entry.get(),
-            self.email_entry.get(),
-            self.count_entry.get(),
-            self.grace_period_entry.get(),
+        Check the page once (os.stat only) and refresh the current stage when it changed.
+        The refresh runs on the background runner like the buttons; while a stage is running
+        the change is kept and refreshed on a later check.
+        """
+        from page_watcher import PageWatcher
+
+        if self.watcher.path != self.analyzer.html_name:
+            # 설정에서 페이지 이름이 바뀜
+            self.watcher = PageWatcher(
+                self.analyzer.html_name, self.analyzer.watch_debounce
+            )
+        if self.watcher.poll():
+            self._watch_pending = True
+        if self._watch_pending and not self.runner.busy:
+            self._watch_pending = False
+            self._refresh_current_stage()
+        self._schedule_watch()
+
+    def _refresh_current_stage(self):
+        """
+        Run the current stage again after the page changed, updating the table and counts
+        without opening windows. After a draw the entries are refreshed instead of drawing again.
+        """
+        rerun = self._stage_runs().get(
+            min(self.current_status, 4), self.run_get_comments
         )
+        self._refreshing = True
+        try:
+            rerun()
+        except ValueError:
+            # 종료일자 형식 오류, 결과 줄에만 알리고 날짜를 고치면 다음 확인 때 반영
+            self._watch_pending = True
+            self.result_label.config(
+                text="페이지가 바뀌었지만 종료일자가 mm/dd 형식이 아니라 반영하지 못했습니다."
+            )
+        if not self.runner.busy:
+            self._refreshing = False  # 실행이 시작되지 않음
 
 
 if __name__ == "__main__":
+    from multiprocessing import freeze_support
+
+    # 실행 파일(pyinstaller)에서 페이지를 나눠 파싱하는 프로세스를 띄울 때 필요
+    freeze_support()
     root = tk.Tk()
     app = CommentAnalyzerApp(root)
     root.mainloop()
@@ -0,0 +1,153 @@
+import re
+import zlib
+
+from comment_batch import CommentView, select
+
+NUM_PERM = 32  # MinHash 값 개수
+SHINGLE_SIZE = 4  # 글자 단위 shingle 길이
+MAX_HASH = (1 << 32) - 1
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """
+    Split text into overlapping character n-grams, ignoring case and whitespace
+    :param text: comment text, size: n-gram length
+    :return: set of shingles
+    """
+    text = WHITESPACE_PATTERN.sub("", text.lower())
+    if len(text) <= size:
+        return {text}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(shingle_set, num_perm=NUM_PERM):
+    """
+    One-permutation MinHash: every shingle is hashed once and only kept if it is the smallest
+    in its bin, so the cost is linear in the number of shingles instead of shingles x num_perm
+    :param shingle_set: shingles of a comment, num_perm: signature length
+    :return: signature tuple
+    """
+    bins = [None] * num_perm
+    for shingle in shingle_set:
+        value = zlib.crc32(shingle.encode("utf-8"))
+        index = value % num_perm
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    # 빈 칸은 오른쪽의 가장 가까운 값을 빌려와 채움 (rotation densification)
+    if all(value is None for value in bins):
+        return tuple([MAX_HASH] * num_perm)
+    signature = list(bins)
+    for index in range(num_perm):
+        if signature[index] is None:
+            distance = 1
+            while bins[(index + distance) % num_perm] is None:
+                distance += 1
+            signature[index] = (
+                bins[(index + distance) % num_perm] + distance
+            ) & MAX_HASH
+    return tuple(signature)
+
+
+def similarity(signature_a, signature_b):
+    """
+    Estimate the Jaccard similarity of two comments from their signatures
+    """
+    same = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return same / len(signature_a)
+
+
+def choose_bands(num_perm, threshold):
+    """
+    Choose LSH bands so that pairs around the threshold become candidates with high probability
+    :return: number of bands, rows per band
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # (1/b)^(1/r) 근처에서 후보가 될 확률이 급격히 올라감, 임계값보다 조금 낮게 잡음
+        if (1 / bands) ** (1 / rows) <= threshold * 0.9:
+            best = (bands, rows)
+    return best
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while item != root:
+            # 경로 압축
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def find_near_duplicates(texts, threshold=0.8, min_length=20, num_perm=NUM_PERM):
+    """
+    Cluster nearly identical comments with MinHash + LSH.
+    Each comment is only compared with the first comment of every LSH bucket it falls in,
+    so the work grows linearly with the number of comments instead of all pairs.
+    :param texts: comment texts, threshold: estimated Jaccard similarity to count as near duplicate,
+        min_length: shorter comments (e.g. just "아이디 지메일") are never clustered
+    :return: clusters of text indices, each with at least 2 members, in document order
+    """
+    bands, rows = choose_bands(num_perm, threshold)
+    signatures = {}
+    buckets = {}
+    union_find = _UnionFind()
+    for index, text in enumerate(texts):
+        if len(WHITESPACE_PATTERN.sub("", text)) < min_length:
+            continue
+        signature = minhash_signature(shingles(text), num_perm)
+        signatures[index] = signature
+        for band in range(bands):
+            key = (band,) + signature[band * rows : (band + 1) * rows]
+            first = buckets.setdefault(key, index)
+            if first != index and similarity(signatures[first], signature) >= threshold:
+                union_find.union(first, index)
+
+    clusters = {}
+    for index in signatures:
+        root = union_find.find(index)
+        clusters.setdefault(root, []).append(index)
+    return sorted(
+        (members for members in clusters.values() if len(members) > 1),
+        key=lambda members: members[0],
+    )
+
+
+def remove_near_duplicates(emails, texts, threshold=0.8, min_length=20):
+    """
+    Exclude every entry whose comment belongs to a near duplicate cluster
+    :param emails: emails[email, email type], texts: comment text of each entry,
+        threshold: similarity threshold, min_length: minimum comment length to consider
+    :return: emails that are not near duplicates, clusters[[email, comment], ...], number of excluded emails
+    """
+    # 봇은 주소만 바꿔가며 같은 글을 올리므로 주소를 빼고 비교
+    if isinstance(emails, CommentView):
+        addresses = emails.column("emails")
+    else:
+        addresses = [email[0] for email in emails]
+    stripped = [
+        text.replace(str(address), " ") if address else text
+        for address, text in zip(addresses, texts)
+    ]
+    clusters = find_near_duplicates(stripped, threshold, min_length)
+    excluded = {index for members in clusters for index in members}
+    filtered_emails = select(
+        emails, [index for index in range(len(emails)) if index not in excluded]
+    )
+    cluster_rows = [
+        [[addresses[index], texts[index]] for index in members] for members in clusters
+    ]
+    return filtered_emails, cluster_rows, len(excluded)
@@ -0,0 +1,98 @@
+import re
+import mmap
+import codecs
+from contextlib import contextmanager
+
+# 이보다 큰 파일은 읽지 않고 mmap으로 열어서 필요한 부분만 OS가 읽게 함
+MMAP_THRESHOLD = 4 * 1024 * 1024
+SNIFF_SIZE = 64 * 1024
+FALLBACK_ENCODING = "cp949"
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+META_CHARSET_PATTERN = re.compile(
+    rb"""<meta[^>]*?charset\s*=\s*["']?\s*([a-zA-Z0-9_:.-]+)""", re.IGNORECASE
+)
+# 브라우저는 euc-kr 페이지를 cp949(windows-949)로 읽음
+ENCODING_ALIASES = {"euc_kr": "cp949", "ks_c_5601-1987": "cp949", "ksc5601": "cp949"}
+
+
+@contextmanager
+def open_page(path):
+    """
+    Open a file once for reading as bytes.
+    Large files are memory-mapped so nothing is copied until a part is used; the result
+    supports len, find/rfind, slicing and the buffer protocol (hashlib, memoryview) either way.
+    :param path: file path
+    :return: bytes or mmap, valid until the with block ends
+    """
+    with open(path, "rb") as file:
+        size = file.seek(0, 2)
+        file.seek(0)
+        if size < MMAP_THRESHOLD:
+            yield file.read()
+            return
+        content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield content
+        finally:
+            content.close()
+
+
+def _normalize(name):
+    try:
+        encoding = codecs.lookup(name.decode("ascii")).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+    return ENCODING_ALIASES.get(encoding, encoding)
+
+
+def sniff_encoding(content):
+    """
+    Guess the encoding from the BOM, then a <meta charset> near the top, then whether a sample
+    is valid UTF-8. A wrong guess is caught when decoding, see encoding_candidates.
+    :param content: file bytes (bytes or mmap)
+    :return: encoding name
+    """
+    head = content[:SNIFF_SIZE]
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    match = META_CHARSET_PATTERN.search(head)
+    if match and _normalize(match.group(1)):
+        return _normalize(match.group(1))
+    try:
+        # 마지막 글자가 잘렸을 수 있으므로 final=False
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def encoding_candidates(content):
+    """
+    Encodings to try in order: the sniffed one, then cp949 like the original utf-8 -> cp949 retry
+    """
+    encoding = sniff_encoding(content)
+    if encoding == FALLBACK_ENCODING:
+        return [encoding]
+    return [encoding, FALLBACK_ENCODING]
+
+
+def read_text(path):
+    """
+    Read a small text file (settings.json) once and decode it, trying cp949 if it is not UTF-8
+    :param path: file path
+    :return: file content
+    """
+    with open(path, "rb") as file:
+        content = file.read()
+    candidates = encoding_candidates(content)
+    for encoding in candidates:
+        try:
+            return content.decode(encoding)
+        except UnicodeDecodeError:
+            if encoding == candidates[-1]:
+                raise
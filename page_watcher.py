@@ -0,0 +1,45 @@
+import os
+import time
+
+
+class PageWatcher:
+    """
+    Tell when a saved page changed, by polling its size and mtime (one os.stat per poll, no
+    reading). A change is reported once the file has stayed the same for `debounce` seconds,
+    so a page the browser is still writing is not parsed half saved.
+    """
+
+    def __init__(self, path, debounce=2.0, clock=time.monotonic):
+        self.path = path
+        self.debounce = debounce
+        self.clock = clock
+        self._seen = self._signature()  # 마지막으로 본 (크기, 수정 시각)
+        self._reported = self._seen  # 마지막으로 알린 (크기, 수정 시각)
+        self._seen_at = clock()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None  # 저장 중에 잠깐 없어질 수 있음
+        return stat.st_size, stat.st_mtime_ns
+
+    def poll(self):
+        """
+        Check the page once
+        :return: True if the page changed since the last reported change and has settled
+        """
+        signature = self._signature()
+        now = self.clock()
+        if signature != self._seen:
+            self._seen = signature
+            self._seen_at = now
+            return False
+        if (
+            signature is None
+            or signature == self._reported
+            or now - self._seen_at < self.debounce
+        ):
+            return False
+        self._reported = signature
+        return True
@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+
+from comment_batch import CommentBatch
+from comment_parser import iter_page_comments
+from fast_extractor import UnexpectedMarkup, extract_comments
+from incremental_parser import parse_segments, table_from_records
+from instrumentation import logger
+from page_loader import encoding_candidates, open_page, sniff_encoding
+from sharded_parser import SHARD_MIN_BYTES, parse_sharded, shard_bounds
+
+# 파서나 저장 형식이 바뀌면 올려서 예전 캐시를 무효화
+CACHE_VERSION = 4
+CACHE_DIRECTORY = "cache"
+INDEX_NAME = "index.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# 빠른 추출이 진행 상황을 알리는 단위
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def content_hash(path):
+    """
+    Hash the file content without reading it into memory at once
+    :param path: file path
+    :return: hex digest of the content
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed comment batches.
+    Entries are keyed by the content hash of the page; (size, mtime) of each path is remembered
+    so an unchanged file is found without hashing it again. Old pages are evicted LRU-first
+    once the cache grows over max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._removed = set()  # 이 객체가 지운 항목, 색인을 합칠 때 되살리지 않음
+        self.index = self._load_index()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _load_index(self):
+        index = self._read_index()
+        if index.get("version") != CACHE_VERSION:
+            # 버전이 다르면 기존 항목은 모두 버림
+            self._remove_entries(index.get("entries", {}))
+            index = {"version": CACHE_VERSION, "files": {}, "entries": {}}
+        return index
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        on_disk = self._read_index()
+        if on_disk.get("version") == CACHE_VERSION:
+            # 다른 프로세스가 그 사이에 더한 항목을 덮어써서 잃지 않도록 합침
+            for name in ("files", "entries"):
+                merged = {
+                    key: value
+                    for key, value in on_disk[name].items()
+                    if key not in self._removed
+                    and (name == "entries" or value["hash"] not in self._removed)
+                }
+                merged.update(self.index[name])
+                self.index[name] = merged
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self.index, file)
+        os.replace(temp_path, self.index_path)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _remove_entries(self, entries):
+        for key in list(entries):
+            self._removed.add(key)
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+
+    def fingerprint(self, path, content=None):
+        """
+        Get the cache key of a file, hashing it only if size or mtime changed
+        :param path: file path, content: file bytes if already open (see page_loader.open_page)
+        :return: content hash of the file
+        """
+        stat = os.stat(path)
+        known = self.index["files"].get(os.path.abspath(path))
+        if (
+            known
+            and known["size"] == stat.st_size
+            and known["mtime"] == stat.st_mtime_ns
+        ):
+            return known["hash"]
+        key = (
+            content_hash(path)
+            if content is None
+            else hashlib.sha256(content).hexdigest()
+        )
+        self.index["files"][os.path.abspath(path)] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": key,
+        }
+        return key
+
+    def _read_entry(self, key):
+        entry = self.index["entries"].get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._entry_path(key), "rb") as file:
+                cached = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            del self.index["entries"][key]
+            self._removed.add(key)
+            return None
+        entry["last_used"] = time.time()
+        self._save_index()
+        return cached
+
+    def _write_entry(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self._entry_path(key)
+        # 여러 프로세스가 동시에 쓸 수 있으므로 임시 파일 이름에 pid를 붙임
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+        self._removed.discard(key)
+        self.index["entries"][key] = {
+            "size": os.path.getsize(entry_path),
+            "last_used": time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def get(self, key, email_types, aliases=None):
+        """
+        Load a cached batch
+        :param key: content hash, email_types: email types used for classification, aliases: email type aliases
+        :return: CommentBatch or None if not cached
+        """
+        cached = self._read_entry(key)
+        if cached is None:
+            return None
+        batch = CommentBatch.from_columns(cached["columns"])
+        if cached["email_types"] != list(email_types) or cached["aliases"] != (
+            aliases or {}
+        ):
+            # 이메일 종류만 바뀐 경우 다시 파싱하지 않고 분류만 새로 함
+            batch.reclassify(email_types, aliases)
+        return batch
+
+    def put(self, key, email_types, batch, aliases=None):
+        """
+        Store a batch and evict the least recently used pages over the size cap
+        :param key: content hash, email_types: email types, batch: CommentBatch, aliases: email type aliases
+        """
+        self._write_entry(
+            key,
+            {
+                "email_types": list(email_types),
+                "aliases": aliases or {},
+                "columns": batch.to_columns(),
+            },
+        )
+
+    def _segments_key(self, path):
+        path_hash = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return f"segments-{path_hash[:32]}"
+
+    def get_segments(self, path):
+        """
+        Load the segment table of the last parsed version of a path, see incremental_parser
+        :param path: HTML file path
+        :return: SegmentTable or None
+        """
+        return self._read_entry(self._segments_key(path))
+
+    def put_segments(self, path, segments):
+        """
+        Store the segment table of a path, replacing the one of its previous version
+        """
+        self._write_entry(self._segments_key(path), segments)
+
+    def _evict(self):
+        entries = self.index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries[key]["size"]
+            self._remove_entries([key])
+            del entries[key]
+        # 삭제된 항목을 가리키는 파일 정보도 정리
+        self.index["files"] = {
+            path: info
+            for path, info in self.index["files"].items()
+            if info["hash"] in entries
+        }
+
+    def clear(self):
+        """
+        Remove every cached page
+        """
+        self._remove_entries(self.index["entries"])
+        self.index = {"version": CACHE_VERSION, "files": {}, "entries": {}}
+        self._save_index()
+
+
+def extract_records(content, encoding, progress=None):
+    """
+    Get the records with the fast byte-level extractor. The page is read in chunks cut at
+    comment thread boundaries, so progress is reported (and parsing can be stopped) as it goes.
+    :param content: page bytes, encoding: sniffed page encoding (see page_loader.sniff_encoding),
+        progress: called with (bytes done, total bytes), may raise to stop parsing
+    :return: times, comments, None if the page needs the full parser (also if it does not decode with encoding)
+    """
+    times = []
+    comments = []
+    try:
+        bounds = shard_bounds(content, len(content) // CHUNK_BYTES + 1)
+        for number, (start, end) in enumerate(bounds):
+            chunk_times, chunk_comments = extract_comments(
+                content[start:end], encoding, partial=number < len(bounds) - 1
+            )
+            times.extend(chunk_times)
+            comments.extend(chunk_comments)
+            if progress is not None:
+                progress(end, len(content))
+    except (UnexpectedMarkup, UnicodeDecodeError) as error:
+        logger.debug("빠른 추출 대신 전체 파서 사용: %s", error)
+        return None
+    return times, comments
+
+
+def load_comment_batch(
+    path, email_types, cache, aliases=None, progress=None, fast=True, workers=1
+):
+    """
+    Get comments from the HTML file as a CommentBatch, reusing the parse cache if the file did not change
+    and only parsing the changed part if an earlier version of the same path was parsed
+    :param path: HTML file path, email_types: email types, cache: ParseCache or None, aliases: email type aliases,
+        progress: parse progress callback, see iter_comments, fast: try the fast extractor before the full parser,
+        workers: processes used to parse a large page, see sharded_parser
+    :return: CommentBatch
+    """
+    with open_page(path) as content:
+        key = None
+        if cache is not None:
+            key = cache.fingerprint(path, content)
+            batch = cache.get(key, email_types, aliases)
+            if batch is not None:
+                return batch
+        # 이전 버전의 구간이 있으면 바뀐 부분만 파싱하는 쪽이 빠른 추출보다도 빠름
+        known = cache.get_segments(path) if cache is not None else None
+        batch = None
+        records = None
+        # 추측한 인코딩이 틀리면 디코딩할 때 실패하고 전체 파서가 다른 후보로 다시 읽음
+        encoding = sniff_encoding(content)
+        if workers > 1 and known is None and len(content) >= SHARD_MIN_BYTES:
+            try:
+                records = parse_sharded(
+                    path, content, encoding, workers, fast, progress
+                )
+            except UnicodeDecodeError as error:
+                logger.debug("나눠서 파싱하는 대신 전체 파서 사용: %s", error)
+        elif fast and known is None:
+            records = extract_records(content, encoding, progress)
+        if records is not None:
+            batch = CommentBatch.from_texts(*records, email_types, aliases)
+            if cache is not None:
+                # 다음에 다시 저장된 페이지를 바뀐 부분만 파싱할 수 있도록 구간도 저장
+                segments = table_from_records(content, encoding, *records)
+                if segments is not None:
+                    cache.put_segments(path, segments)
+        if batch is None and cache is None:
+            batch = CommentBatch.from_records(
+                iter_page_comments(
+                    content, email_types, aliases=aliases, progress=progress
+                ),
+                email_types,
+            )
+        elif batch is None:
+            # 같은 파일을 다시 저장한 경우 이전 버전과 같은 구간은 파싱하지 않음
+            candidates = encoding_candidates(content)
+            for encoding in candidates:
+                try:
+                    times, comments, segments, _ = parse_segments(
+                        content, encoding, known, progress
+                    )
+                    break
+                except UnicodeDecodeError:
+                    if encoding == candidates[-1]:
+                        raise
+            batch = CommentBatch.from_texts(times, comments, email_types, aliases)
+            cache.put_segments(path, segments)
+    if cache is not None:
+        cache.put(key, email_types, batch, aliases)
+    return batch
@@ -0,0 +1,45 @@
+import re
+from functools import lru_cache
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# 단위별 초, 유튜브는 한 달/일 년을 대략적으로만 표시하므로 30일/365일로 계산
+UNIT_SECONDS = {
+    "초": 1,
+    "분": 60,
+    "시간": 60 * 60,
+    "일": SECONDS_PER_DAY,
+    "주": 7 * SECONDS_PER_DAY,
+    "개월": 30 * SECONDS_PER_DAY,
+    "달": 30 * SECONDS_PER_DAY,
+    "년": 365 * SECONDS_PER_DAY,
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": SECONDS_PER_DAY,
+    "week": 7 * SECONDS_PER_DAY,
+    "month": 30 * SECONDS_PER_DAY,
+    "year": 365 * SECONDS_PER_DAY,
+}
+RELATIVE_TIME_PATTERN = re.compile(
+    r"(\d+)\s*(초|분|시간|일|주|개월|달|년|second|minute|hour|day|week|month|year)",
+    re.IGNORECASE,
+)
+LEADING_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=4096)
+def parse_day_offset(time_text):
+    """
+    Convert a YouTube published time text to the number of whole days ago.
+    Handles "N초/분/시간/일/주/개월/년 전", "N days ago" and the "(수정됨)"/"(edited)" suffix.
+    Pages only use a few hundred distinct texts, so results are cached.
+    :param time_text: published time text (ex. 3주 전(수정됨))
+    :return: days ago (ex. 21), 0 for texts like "방금 전"
+    """
+    match = RELATIVE_TIME_PATTERN.search(time_text)
+    if match:
+        seconds = int(match.group(1)) * UNIT_SECONDS[match.group(2).lower()]
+        return seconds // SECONDS_PER_DAY
+    # 알 수 없는 형식은 예전처럼 앞의 숫자를 일 수로 봄
+    match = LEADING_NUMBER_PATTERN.match(time_text)
+    return int(match.group()) if match else 0
@@ -0,0 +1,177 @@
+import os
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+
+from comment_parser import CommentStreamParser
+from fast_extractor import UnexpectedMarkup, extract_comments
+from incremental_parser import SEGMENT_MARKER
+
+# 이보다 작은 페이지는 프로세스를 띄우는 비용이 더 큼
+SHARD_MIN_BYTES = 16 * 1024 * 1024
+# 프로세스마다 여러 조각을 맡겨서 늦게 끝나는 프로세스가 없도록 함
+SHARDS_PER_WORKER = 4
+
+
+def shard_bounds(content, count):
+    """
+    Split a page into about `count` byte ranges, each starting at the '<' of a published time
+    element (one per comment thread), so no comment thread is cut in half
+    :param content: page bytes (bytes or mmap), count: number of shards wanted
+    :return: [(start, end)] covering the whole page in order
+    """
+    total = len(content)
+    cuts = [0]
+    for number in range(1, count):
+        position = content.find(SEGMENT_MARKER, max(total * number // count, cuts[-1]))
+        if position < 0:
+            break
+        # '<'는 ASCII라 utf-8/cp949 글자 중간에서 자르지 않음
+        cut = content.rfind(b"<", cuts[-1], position)
+        if cut > cuts[-1]:
+            cuts.append(cut)
+    return list(zip(cuts, cuts[1:] + [total]))
+
+
+def guess_state(content, bounds, encoding):
+    """
+    Open tags at the start of the second comment thread. Comment threads are siblings on a
+    saved page, so every shard is parsed from this state; merge_shards checks the guess.
+    """
+    first = content.find(SEGMENT_MARKER)
+    second = content.find(SEGMENT_MARKER, first + len(SEGMENT_MARKER))
+    if len(bounds) < 2 or first < 0 or second < 0:
+        return ()
+    # 페이지 앞부분과 첫 댓글만 파싱
+    parser = CommentStreamParser()
+    parser.feed(content[: content.rfind(b"<", 0, second)].decode(encoding))
+    parser.records.clear()
+    return parser.clean_state() or ()
+
+
+def parse_shard(path, start, end, encoding, state, last, fast):
+    """
+    Parse one byte range of a page (runs in a worker process). The page is memory-mapped,
+    so every worker reads the same pages from the OS cache instead of getting a copy.
+    :param path: page path, start/end: byte range, encoding: page encoding, state: open tags to start from,
+        last: the range ends the page, fast: use the fast extractor
+    :return: times, comments, start state, clean state at the end (None for the fast extractor or an unclean end)
+    """
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            shard = content[start:end]
+    if fast:
+        times, comments = extract_comments(shard, encoding, partial=not last)
+        return times, comments, None, None
+    parser = CommentStreamParser.from_state(state)
+    parser.feed(shard.decode(encoding))
+    if last:
+        parser.close()
+    times = [record[0] for record in parser.records]
+    comments = [record[1] for record in parser.records]
+    parser.records.clear()
+    return times, comments, state, parser.clean_state()
+
+
+def merge_shards(content, bounds, encoding, results):
+    """
+    Join the shard results in page order. A shard is kept only if it was parsed from the state
+    the previous shard really ended in; otherwise it is parsed again here, continuing from the
+    previous shard, so the result is always the same as one parser reading the whole page.
+    :return: times, comments, number of shards parsed again
+    """
+    times = []
+    comments = []
+    state = ()
+    parser = None  # 조각 경계에서 상태가 깨끗하지 않으면 이어서 사용
+    reparsed = 0
+    for number, ((start, end), result) in enumerate(zip(bounds, results)):
+        shard_times, shard_comments, start_state, end_state = result
+        last = number == len(bounds) - 1
+        if parser is None and start_state == state and (end_state is not None or last):
+            times.extend(shard_times)
+            comments.extend(shard_comments)
+            state = end_state
+            continue
+        reparsed += 1
+        if parser is None:
+            parser = CommentStreamParser.from_state(state)
+        parser.feed(content[start:end].decode(encoding))
+        if last:
+            parser.close()
+        times.extend(record[0] for record in parser.records)
+        comments.extend(record[1] for record in parser.records)
+        parser.records.clear()
+        state = parser.clean_state()
+        if state is not None:
+            parser = None
+    return times, comments, reparsed
+
+
+def _run_shards(pool, path, bounds, encoding, state, fast, progress):
+    futures = [
+        pool.submit(
+            parse_shard,
+            path,
+            start,
+            end,
+            encoding,
+            state if number else (),
+            number == len(bounds) - 1,
+            fast,
+        )
+        for number, (start, end) in enumerate(bounds)
+    ]
+    results = []
+    total = bounds[-1][1]
+    try:
+        # 순서대로 기다리므로 결과 순서가 실행 순서와 상관없이 항상 같음
+        for future, (_, end) in zip(futures, bounds):
+            results.append(future.result())
+            if progress is not None:
+                progress(end, total)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+
+def parse_sharded(path, content, encoding, workers, fast=True, progress=None):
+    """
+    Parse one large page on several processes. The page is cut at comment thread boundaries,
+    the shards are parsed in parallel and merged back in page order.
+    With fast, every shard first tries the fast extractor; if any shard needs the full parser,
+    all shards are parsed again with it (and checked by merge_shards).
+    :param path: page path, content: page bytes (bytes or mmap) of the same file, encoding: page encoding,
+        workers: number of processes, fast: try the fast extractor,
+        progress: called with (bytes done, total bytes), may raise to stop parsing
+    :return: times, comments (same as parsing the whole page in one process)
+    """
+    bounds = shard_bounds(content, workers * SHARDS_PER_WORKER)
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(bounds)))
+    try:
+        if fast:
+            try:
+                results = _run_shards(pool, path, bounds, encoding, (), True, progress)
+            except UnexpectedMarkup:
+                pass
+            else:
+                times = [text for result in results for text in result[0]]
+                comments = [text for result in results for text in result[1]]
+                return times, comments
+        state = guess_state(content, bounds, encoding)
+        results = _run_shards(pool, path, bounds, encoding, state, False, progress)
+        times, comments, _ = merge_shards(content, bounds, encoding, results)
+        return times, comments
+    finally:
+        # 취소나 오류로 끝나면 남은 조각은 실행하지 않음
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def resolve_workers(workers):
+    """
+    Number of parse processes from the parse_workers setting (0: one per CPU)
+    """
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
@@ -0,0 +1,162 @@
+import os
+import json
+
+# 단계 순서와 각 단계가 직접 읽는 설정 (CommentAnalyzer 속성 이름)
+# 유사 댓글 제외는 이메일 추출과 같은 단계로 봄 (gui의 3번 버튼)
+STAGE_INPUTS = {
+    "get_comments": ("html_name", "email_types", "email_aliases"),
+    "overdue_comments": ("grace_period",),
+    "find_email": (
+        "email_types",
+        "email_aliases",
+        "remove_near_duplicates",
+        "near_duplicate_threshold",
+        "near_duplicate_min_length",
+    ),
+    "find_duplicate_comments": ("dedupe_normalization", "email_aliases"),
+    "exclude_past_winners": ("exclude_recent_winners",),
+}
+NODES = tuple(STAGE_INPUTS)
+# 스냅샷에 적힌 단계 이름 -> 그 결과를 내는 단계
+NODE_OF_STAGE = {"near_duplicate_comments": "find_email"}
+
+
+class StageGraph:
+    """
+    Memoized stage results of a CommentAnalyzer. Every stage result is kept with a key made of
+    the key of the stage before it and the settings the stage reads (plus the page content hash
+    for get_comments, the end date for overdue_comments and the past winners in the history for
+    exclude_past_winners), so when a setting changes only the stages from the first one that
+    reads it are run again; the draw itself reads only pick_number and always reuses the cached
+    entries.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self._results = {}  # 단계 -> (키, 단계 결과, 다음 단계로 넘기는 행)
+        self._files = {}  # 경로 -> (크기, 수정 시각, 내용 해시)
+        self._pinned = None  # 불러온 스냅샷 (단계, 키)
+
+    def _file_key(self, path):
+        """
+        Content hash of the page, hashed again only when its size or mtime changed
+        """
+        from parse_cache import content_hash
+
+        stat = os.stat(path)
+        known = self._files.get(path)
+        if known is None or known[:2] != (stat.st_size, stat.st_mtime_ns):
+            known = (stat.st_size, stat.st_mtime_ns, content_hash(path))
+            self._files[path] = known
+        return known[2]
+
+    def key(self, stage, end_date=None):
+        """
+        Key of the result of a stage with the current settings
+        :param stage: one of NODES, end_date: end date (mm/dd), needed from overdue_comments on
+        """
+        if self._pinned is not None and self._pinned[0] == stage:
+            return self._pinned[1]
+        analyzer = self.analyzer
+        settings = json.dumps(
+            [getattr(analyzer, name) for name in STAGE_INPUTS[stage]],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        number = NODES.index(stage)
+        if number == 0:
+            return self._file_key(analyzer.html_name), settings
+        if stage == "overdue_comments":
+            settings += end_date or ""
+        elif stage == "exclude_past_winners":
+            # 저장된 추첨으로 제외할 당첨자가 바뀌면 다시 실행
+            settings += json.dumps(analyzer.past_winners_version(), ensure_ascii=False)
+        return self.key(NODES[number - 1], end_date), settings
+
+    def _run(self, stage, rows):
+        """
+        Run one stage on the rows of the stage before it
+        :return: stage result (what the gui shows), rows for the next stage
+        """
+        analyzer = self.analyzer
+        if stage == "find_email":
+            emails, cnt_email, texts = analyzer.find_email(rows)
+            near_duplicates = None
+            if analyzer.remove_near_duplicates:
+                near_duplicates = analyzer.near_duplicate_comments(emails, texts)
+                return (emails, cnt_email, near_duplicates), near_duplicates[0]
+            return (emails, cnt_email, near_duplicates), emails
+        if stage == "find_duplicate_comments":
+            result = analyzer.find_duplicate_comments(rows)
+            return result, result[0]
+        if stage == "exclude_past_winners":
+            if not analyzer.exclude_recent_winners:
+                return None, rows
+            result = analyzer.exclude_past_winners(rows)
+            return result, result[0]
+
+    def result(self, stage, end_date=None):
+        """
+        Result of a stage, running it (and the stages before it) only if a setting it depends
+        on, the end date or the page changed since it last ran
+        :param stage: one of NODES, end_date: end date (mm/dd), needed from overdue_comments on
+        :return: same as the CommentAnalyzer method of the stage (find_email: emails, count, near duplicate result or None;
+            exclude_past_winners: None if exclude_recent_winners is off)
+        """
+        if self._pinned is not None and NODES.index(stage) <= NODES.index(
+            self._pinned[0]
+        ):
+            # 불러온 스냅샷의 단계나 그 앞 단계를 실행하면 페이지에서 다시 시작
+            self._pinned = None
+        return self._get(stage, end_date)[1]
+
+    def rows(self, stage, end_date=None):
+        """
+        Rows a stage passes to the next one
+        """
+        return self._get(stage, end_date)[2]
+
+    def _get(self, stage, end_date):
+        key = self.key(stage, end_date)
+        cached = self._results.get(stage)
+        if cached is not None and cached[0] == key:
+            return cached
+        if stage == "get_comments":
+            comments = self.analyzer.get_comments()
+            entry = (key, comments, comments)
+        elif stage == "overdue_comments":
+            comments = self.rows("get_comments", end_date)
+            result = self.analyzer.overdue_comments(comments, end_date)
+            entry = (key, result, result[0])
+        else:
+            previous = self.rows(NODES[NODES.index(stage) - 1], end_date)
+            entry = (key, *self._run(stage, previous))
+        self._results[stage] = entry
+        return entry
+
+    def draw(self, end_date, pick_number=None):
+        """
+        Pick winners from the cached entries (only the stages whose inputs changed run first)
+        :param end_date: end date, pick_number: number of winners (default: pick_number setting)
+        :return: random_emails[picked emails]
+        """
+        entries = self.rows(NODES[-1], end_date)
+        if pick_number is None:
+            pick_number = self.analyzer.pick_number
+        return self.analyzer.random_picker(entries, pick_number)
+
+    def pin(self, stage, rows):
+        """
+        Use loaded rows (a snapshot) as the output of a stage until that stage or one before it is run
+        :param stage: stage name written in the snapshot, rows: loaded rows
+        """
+        stage = NODE_OF_STAGE.get(stage, stage)
+        self._pinned = (stage, ("snapshot", id(rows)))
+        self._results[stage] = (self._pinned[1], rows, rows)
+
+    def clear(self):
+        """
+        Forget every cached result
+        """
+        self._results.clear()
+        self._pinned = None
@@ -0,0 +1,146 @@
+import random
+from itertools import islice
+
+from comment_parser import iter_page_comments
+from email_classifier import get_classifier
+from fast_extractor import UnexpectedMarkup, extract_comments
+from instrumentation import logger
+from page_loader import sniff_encoding
+from relative_time import parse_day_offset
+from sharded_parser import shard_bounds
+
+# 빠른 추출로 한 번에 읽는 크기, 댓글은 이만큼씩만 메모리에 올라옴
+CHUNK_BYTES = 4 * 1024 * 1024
+# 스트리밍 실행에서 모으는 단계별 개수
+COUNT_NAMES = (
+    "comments",
+    "overdue",
+    "not_overdue",
+    "emails",
+    "duplicates",
+    "entries",
+    "past_winners",
+)
+
+
+def iter_records(content, email_types, aliases=None, progress=None, fast=True):
+    """
+    get_comments one comment at a time. With fast, the page is read in chunks cut at comment
+    thread boundaries (see sharded_parser) by the fast extractor; if a chunk needs the full
+    parser, the full parser reads the page and skips the comments already given out.
+    :param content: page bytes (bytes or mmap), email_types: email types, aliases: email type aliases,
+        progress: called with (bytes done, total bytes), fast: try the fast extractor
+    :return: generator of [time, comment, email type]
+    """
+    yielded = 0
+    if fast:
+        classify_email_type = get_classifier(email_types, aliases).classify
+        try:
+            encoding = sniff_encoding(content)
+            bounds = shard_bounds(content, len(content) // CHUNK_BYTES + 1)
+            for number, (start, end) in enumerate(bounds):
+                times, comments = extract_comments(
+                    content[start:end], encoding, partial=number < len(bounds) - 1
+                )
+                for time_text, comment in zip(times, comments):
+                    yielded += 1
+                    yield [time_text, comment, classify_email_type(comment)]
+                if progress is not None:
+                    progress(end, len(content))
+            return
+        except (UnexpectedMarkup, UnicodeDecodeError) as error:
+            logger.debug("빠른 추출 대신 전체 파서 사용: %s", error)
+    for number, record in enumerate(
+        iter_page_comments(content, email_types, aliases=aliases, progress=progress)
+    ):
+        if number >= yielded:
+            yield record
+
+
+def drop_overdue(records, limit, counts):
+    """
+    overdue_comments one comment at a time: keep the comments posted at least `limit` days ago
+    :param records: comments[time, comment, email type] (any iterable), limit: day offset cut-off,
+        counts: Counter updated with comments, overdue and not_overdue
+    :return: generator of the comments that are not overdue
+    """
+    for record in records:
+        counts["comments"] += 1
+        if parse_day_offset(record[0]) >= limit:
+            counts["not_overdue"] += 1
+            yield record
+        else:
+            counts["overdue"] += 1
+
+
+def extract_emails(records, extractor, counts):
+    """
+    find_email one comment at a time
+    :param records: comments[time, comment, email type], extractor: EmailExtractor, counts: Counter updated with emails
+    :return: generator of [email, email type]; a full address takes the email type of its domain
+    """
+    for _, comment, email_type in records:
+        found = extractor.extract(comment)
+        if found is not None:
+            counts["emails"] += 1
+            yield [found[0], found[1] or email_type]
+
+
+def unique_entries(emails, key, counts):
+    """
+    find_duplicate_comments without keeping every email: only one entry per dedupe key is kept,
+    and it is dropped as soon as the key shows up again, so memory grows with the number of
+    keys, not with the number of comments
+    :param emails: emails[email, email type], key: see dedupe.make_key_function,
+        counts: Counter updated with duplicates and entries
+    :return: {key: [email, email type]} of the keys seen once (first appearance order), {duplicate key: occurrences}
+    """
+    entries = {}
+    duplicates = {}
+    for email in emails:
+        email_key = key(email[0], email[1])
+        if email_key in duplicates:
+            duplicates[email_key] += 1
+        elif email_key in entries:
+            del entries[email_key]
+            duplicates[email_key] = 2
+        else:
+            entries[email_key] = email
+    counts["duplicates"] = len(duplicates)
+    counts["entries"] = len(entries)
+    return entries, duplicates
+
+
+def drop_past_winners(emails, won, normalize, counts):
+    """
+    exclude_past_winners one entry at a time
+    :param emails: emails[email, email type], won: WinnerExclusion.checker, normalize: HistoryStore.normalize,
+        counts: Counter updated with past_winners
+    :return: generator of the entries that did not win recently
+    """
+    for email in emails:
+        if won(normalize(email[0], email[1])):
+            counts["past_winners"] += 1
+        else:
+            yield email
+
+
+def reservoir_sample(rows, pick_number, rng=random):
+    """
+    Pick pick_number rows uniformly at random in one pass, keeping only the picked rows
+    (reservoir sampling, every row ends up picked with the same probability as random.sample)
+    :param rows: any iterable, pick_number: number of rows to pick, rng: random number generator
+    :return: picked rows
+    :raise ValueError: fewer rows than pick_number
+    """
+    rows = iter(rows)
+    if pick_number < 0:
+        raise ValueError("Sample larger than population or is negative")
+    reservoir = list(islice(rows, pick_number))
+    if len(reservoir) < pick_number:
+        raise ValueError("Sample larger than population or is negative")
+    for seen, row in enumerate(rows, pick_number + 1):
+        position = rng.randrange(seen)
+        if position < pick_number:
+            reservoir[position] = row
+    return reservoir
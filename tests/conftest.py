@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from make_page import DEFAULT_EMAIL_TYPES, THREAD, generate_page  # noqa: E402
+
+
+@pytest.fixture
+def email_types():
+    return list(DEFAULT_EMAIL_TYPES)
+
+
+@pytest.fixture
+def make_page(tmp_path, email_types):
+    """
+    Write a synthetic saved page (benchmarks/make_page.py) and return its path
+    """
+
+    def make(count=300, encoding="utf-8", seed=0, name=None):
+        path = tmp_path / (name or f"page_{count}_{encoding}_{seed}.html")
+        generate_page(str(path), count, email_types, seed=seed, encoding=encoding)
+        return str(path)
+
+    return make
+
+
+@pytest.fixture
+def write_page(tmp_path):
+    """
+    Write a page from (time, comment markup) pairs in the saved layout and return its path
+    """
+
+    def write(threads, encoding="utf-8", name="inline.html", header="", footer=""):
+        body = "".join(
+            THREAD.format(author=f"channel{number}", time=time_text, comment=comment)
+            for number, (time_text, comment) in enumerate(threads)
+        )
+        path = tmp_path / name
+        path.write_bytes(
+            f"<html><body>{header}{body}{footer}</body></html>".encode(encoding)
+        )
+        return str(path)
+
+    return write
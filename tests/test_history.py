@@ -0,0 +1,118 @@
+"""
+History schema, migration of old history files and past winner exclusion.
+"""
+
+import sqlite3
+from datetime import date
+
+from history_store import SCHEMA, SCHEMA_VERSION, HistoryStore
+from winner_exclusion import BloomFilter, WinnerExclusion
+
+# 버전 1: 페이지 이름과 날짜마다 추첨 하나
+SCHEMA_V1 = SCHEMA.replace(
+    "    updated TEXT NOT NULL\n);",
+    "    updated TEXT NOT NULL,\n    UNIQUE (page, run_date)\n);",
+    1,
+)
+
+
+def draw(store, page, day, winners, entrants=None):
+    giveaway_id = store.begin_giveaway(page, date(2026, 10, day), "10/16")
+    store.record_stage(
+        giveaway_id,
+        {"stage": "random_picker", "rows_in": 10, "rows_out": len(winners)},
+        entrants=entrants if entrants is not None else winners,
+        winners=winners,
+    )
+    return giveaway_id
+
+
+def test_same_page_same_day_keeps_both_draws(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    first = draw(store, "comments.html", 1, [["abc", "지메일"]])
+    second = draw(store, "comments.html", 1, [["def", "네이버"]])
+    assert first != second
+    assert store.winners_of([first]) == ["abc@gmail"]
+    assert store.winners_of([second]) == ["def@naver"]
+    assert store.has_won("ABC@gmail.com", today=date(2026, 10, 2))
+
+
+def test_migrates_version_1_history(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA_V1)
+    connection.execute(
+        "INSERT INTO giveaways (id, page, run_date, end_date, updated) "
+        "VALUES (7, 'comments.html', '2026-10-01', '09/30', '2026-10-01T12:00:00')"
+    )
+    connection.execute(
+        "INSERT INTO winners VALUES (7, '2026-10-01', 'abc', '지메일', 'abc@gmail')"
+    )
+    connection.commit()
+    connection.close()
+
+    store = HistoryStore(path)
+    # 예전 제약 조건이 없어져 같은 날 같은 페이지를 다시 추첨할 수 있음
+    again = draw(store, "comments.html", 1, [["def", "네이버"]])
+    assert again != 7
+    assert store.winners_of([7]) == ["abc@gmail"]
+    assert store.address_history("abc", "지메일") == [
+        ("comments.html", "2026-10-01", "09/30", 1)
+    ]
+
+    connection = sqlite3.connect(path)
+    assert connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    (table,) = connection.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'giveaways'"
+    ).fetchone()
+    assert "UNIQUE" not in table
+    assert connection.execute("PRAGMA foreign_key_check").fetchall() == []
+    connection.close()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(2000)
+    keys = [f"user{number}@gmail" for number in range(2000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    misses = sum(f"other{number}@naver" in bloom for number in range(10000))
+    assert misses < 100
+
+
+def test_excludes_winners_of_recent_giveaways(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    draw(store, "a.html", 1, [["old", "지메일"]])
+    draw(store, "b.html", 2, [["mid", "지메일"]])
+    draw(store, "c.html", 3, [["new", "네이버"]])
+    current = store.begin_giveaway("d.html", date(2026, 10, 4))
+    store.record_stage(current, {"stage": "random_picker"}, winners=[["self", "다음"]])
+
+    keys = [
+        store.normalize(address, email_type)
+        for address, email_type in [
+            ("old", "지메일"),
+            ("MID", "지메일"),
+            ("new", "네이버"),
+            ("self", "다음"),
+            ("nobody", "지메일"),
+        ]
+    ]
+    exclusion = WinnerExclusion(store, 2)
+    # 지금 추첨 중인 추첨의 당첨자는 제외하지 않음
+    assert exclusion.excluded(keys, current) == [1, 2]
+
+    # 저장된 필터를 읽는 새 인스턴스도 새 추첨의 당첨자를 반영함 (창: e, d)
+    latest = draw(store, "e.html", 5, [["nobody", "지메일"]])
+    exclusion.add_draw(latest)
+    assert WinnerExclusion(store, 2).excluded(keys) == [3, 4]
+
+
+def test_rebuilds_a_damaged_filter(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    draw(store, "a.html", 1, [["abc", "지메일"]])
+    exclusion = WinnerExclusion(store, 3)
+    assert exclusion.excluded(["abc@gmail", "def@naver"]) == [0]
+    with open(exclusion.path, "r+b") as file:
+        file.truncate(file.seek(0, 2) - 1)
+    assert WinnerExclusion(store, 3).excluded(["abc@gmail", "def@naver"]) == [0]
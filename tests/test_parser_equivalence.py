@@ -0,0 +1,141 @@
+"""
+Every way of reading a page must give exactly the records of the BeautifulSoup reference parser.
+"""
+
+import pytest
+
+from comment_parser import parse_comments, parse_comments_bs4
+from fast_extractor import UnexpectedMarkup, extract_comments
+from incremental_parser import parse_segments, segment_starts
+from page_loader import open_page, sniff_encoding
+from parse_cache import ParseCache, load_comment_batch
+from sharded_parser import parse_sharded
+from stream_pipeline import iter_records
+
+# 표준 저장 형식에서 벗어난 댓글 (빠른 추출은 전체 파서로 넘겨야 함)
+NESTED_THREADS = [
+    ("1일 전", "abc123 지메일 <b>꼭</b> 참여합니다"),
+    (
+        "2일 전",
+        'outer <yt-attributed-string id="content-text">inner 네이버</yt-attributed-string>',
+    ),
+    ("3일 전", "a<!-- 숨김 -->b &amp; c<br>d 핫메일"),
+    ("4일 전", "<script>var x = '<b>';</script>xyz 다음"),
+    ("5일 전", "<span><i>열린 태그</span> 한메일"),
+]
+
+
+def batch_records(batch):
+    return [list(row) for row in batch.view()]
+
+
+def assert_all_parsers_agree(path, email_types, tmp_path):
+    expected = parse_comments_bs4(path, email_types)
+    assert parse_comments(path, email_types) == expected
+    with open_page(path) as content:
+        assert list(iter_records(content, email_types)) == expected
+        assert list(iter_records(content, email_types, fast=False)) == expected
+    for fast in (True, False):
+        assert (
+            batch_records(load_comment_batch(path, email_types, None, fast=fast))
+            == expected
+        )
+        cache = ParseCache(str(tmp_path / f"cache_{fast}"))
+        assert (
+            batch_records(load_comment_batch(path, email_types, cache, fast=fast))
+            == expected
+        )
+        # 두 번째는 캐시에서 읽음
+        assert (
+            batch_records(load_comment_batch(path, email_types, cache, fast=fast))
+            == expected
+        )
+    return expected
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "cp949"])
+def test_generated_page(make_page, email_types, tmp_path, encoding):
+    path = make_page(300, encoding)
+    assert len(assert_all_parsers_agree(path, email_types, tmp_path)) == 300
+
+
+def test_nested_and_unusual_markup(write_page, email_types, tmp_path):
+    path = write_page(NESTED_THREADS)
+    with open_page(path) as content:
+        with pytest.raises(UnexpectedMarkup):
+            extract_comments(content, sniff_encoding(content))
+    assert_all_parsers_agree(path, email_types, tmp_path)
+
+
+def test_utf16_page(write_page, email_types, tmp_path):
+    path = write_page([("3일 전", "abc 지메일"), ("4일 전", "def 네이버")], "utf-16")
+    with open_page(path) as content:
+        with pytest.raises(UnexpectedMarkup):
+            extract_comments(content, sniff_encoding(content))
+    expected = assert_all_parsers_agree(path, email_types, tmp_path)
+    assert expected == [
+        ["3일 전", "abc 지메일", "지메일"],
+        ["4일 전", "def 네이버", "네이버"],
+    ]
+
+
+def test_cp949_after_ascii_sample(write_page, email_types, tmp_path):
+    # 앞 64KB가 ASCII라 utf-8로 추측하지만 댓글은 cp949
+    path = write_page(
+        [("1일 전", "abc 지메일"), ("2일 전", "def 네이버")],
+        "cp949",
+        header="<!-- " + "x" * 70000 + " -->",
+    )
+    with open_page(path) as content:
+        assert sniff_encoding(content) == "utf-8"
+    expected = assert_all_parsers_agree(path, email_types, tmp_path)
+    assert [record[1] for record in expected] == ["abc 지메일", "def 네이버"]
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_sharded_parse(make_page, email_types, fast):
+    path = make_page(400)
+    expected = parse_comments_bs4(path, email_types)
+    with open_page(path) as content:
+        times, comments = parse_sharded(path, content, sniff_encoding(content), 2, fast)
+    assert [[time_text, comment] for time_text, comment in zip(times, comments)] == [
+        record[:2] for record in expected
+    ]
+
+
+def test_incremental_reparse(make_page, email_types, tmp_path):
+    path = make_page(300)
+    cache = ParseCache(str(tmp_path / "cache"))
+    load_comment_batch(path, email_types, cache)
+
+    # 다시 저장한 페이지: 새 댓글이 위에 붙고 한 댓글의 시간이 바뀜
+    with open(path, "rb") as file:
+        content = file.read()
+    starts = segment_starts(content)
+    end_tag = "</span></yt-attributed-string>".encode()
+    new_thread = (
+        content[starts[1] : starts[2]]
+        .replace(b"channel0", b"channel_new")
+        .replace(end_tag, " newuser 네이버".encode() + end_tag)
+    )
+    changed = content[starts[5] : starts[6]].replace(b"</a></span>", b" </a></span>")
+    content = (
+        content[: starts[1]]
+        + new_thread
+        + content[starts[1] : starts[5]]
+        + changed
+        + content[starts[6] :]
+    )
+    with open(path, "wb") as file:
+        file.write(content)
+
+    expected = parse_comments_bs4(path, email_types)
+    assert len(expected) == 301
+    times, comments, _, reused = parse_segments(
+        content, "utf-8", cache.get_segments(path)
+    )
+    assert reused > 0
+    assert [[time_text, comment] for time_text, comment in zip(times, comments)] == [
+        record[:2] for record in expected
+    ]
+    assert batch_records(load_comment_batch(path, email_types, cache)) == expected
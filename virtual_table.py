@@ -0,0 +1,107 @@
+ROW_HEIGHT = 20  # ttk.Treeview 기본 행 높이
+BUFFER_ROWS = 50  # 화면 위아래로 미리 넣어둘 행 수
+TEXT_CHUNK_ROWS = 2000  # 새 창에 한 번에 넣을 줄 수
+
+
+class VirtualTable:
+    """
+    Show any number of rows in a ttk.Treeview while only inserting the rows on screen plus a
+    small buffer. The scrollbar is driven by the row position in the underlying data, and the
+    rows in the widget are replaced when the view leaves the buffered window.
+    """
+
+    def __init__(self, tree, scrollbar, buffer_rows=BUFFER_ROWS):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buffer_rows = buffer_rows
+        self.data = []
+        self.first = 0  # 화면 맨 위에 보이는 행
+        self.window_start = 0
+        self.window_end = 0
+        self.scrollbar.config(command=self.yview)
+        self.tree.config(yscrollcommand="")
+        self.tree.bind("<Configure>", lambda event: self._render(self.first))
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll(3))
+
+    @property
+    def visible_rows(self):
+        return max(1, self.tree.winfo_height() // ROW_HEIGHT - 1)
+
+    def set_data(self, data, keep_position=False):
+        """
+        Replace the rows shown in the table
+        :param data: sequence of rows (list or CommentView), read only when rows come into view,
+            keep_position: stay at the same row instead of going back to the top
+        """
+        self.data = data
+        self.window_start = self.window_end = 0
+        self._render(self.first if keep_position else 0, force=True)
+
+    def yview(self, *args):
+        """
+        Scrollbar command: ("moveto", fraction) or ("scroll", number, "units"/"pages")
+        """
+        if args[0] == "moveto":
+            self._render(int(float(args[1]) * len(self.data)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows
+            self._scroll(step)
+
+    def _scroll(self, step):
+        self._render(self.first + step)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll(-3 if event.delta > 0 else 3)
+
+    def _render(self, first, force=False):
+        total = len(self.data)
+        visible = self.visible_rows
+        first = max(0, min(first, total - visible))
+        self.first = first
+        last = min(total, first + visible)
+        if force or first < self.window_start or last > self.window_end:
+            # 버퍼 밖으로 나가면 보이는 부분 주변만 다시 넣음
+            self.window_start = max(0, first - self.buffer_rows)
+            self.window_end = min(total, last + self.buffer_rows)
+            self.tree.delete(*self.tree.get_children())
+            for row in self.data[self.window_start : self.window_end]:
+                self.tree.insert("", "end", values=row)
+        window_size = self.window_end - self.window_start
+        if window_size:
+            self.tree.yview_moveto((first - self.window_start) / window_size)
+        if total:
+            self.scrollbar.set(first / total, last / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+
+def fill_text_in_chunks(widget, rows, chunk_rows=TEXT_CHUNK_ROWS):
+    """
+    Insert rows into a text widget a chunk at a time while Tk is idle, so a large result
+    window opens immediately and keeps responding while it fills
+    :param widget: Text/ScrolledText, rows: rows to show (each joined with spaces), chunk_rows: rows per chunk
+    """
+    iterator = iter(rows)
+    started = False
+
+    def insert_chunk():
+        nonlocal started
+        if not widget.winfo_exists():
+            return  # 다 채우기 전에 창을 닫은 경우
+        lines = []
+        for row in iterator:
+            lines.append(" ".join(map(str, row)))
+            if len(lines) >= chunk_rows:
+                break
+        if not lines:
+            return
+        widget.insert("end", ("\n" if started else "") + "\n".join(lines))
+        started = True
+        widget.after_idle(insert_chunk)
+
+    insert_chunk()
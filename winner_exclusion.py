@@ -0,0 +1,221 @@
+import os
+import json
+import math
+import hashlib
+
+BLOOM_VERSION = 1
+# 거짓 양성 비율, 양성은 정확한 당첨자 집합으로 다시 확인하므로 결과에는 영향 없음
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 1024
+# 필터에 창 밖의 오래된 추첨이 창 크기의 이 배수보다 많이 쌓이면 새로 만듦
+REBUILD_FACTOR = 2
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings: `key in bloom` is False for every key never added,
+    True for every added key and for about FALSE_POSITIVE_RATE of the other keys.
+    The bit positions of a key come from one blake2b digest split into two hashes (double hashing).
+    """
+
+    def __init__(self, capacity, size=None, hashes=None, data=None):
+        self.capacity = max(int(capacity), MIN_CAPACITY)
+        self.size = size or math.ceil(
+            -self.capacity * math.log(FALSE_POSITIVE_RATE) / math.log(2) ** 2
+        )
+        self.hashes = hashes or max(1, round(self.size / self.capacity * math.log(2)))
+        self.data = data if data is not None else bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @staticmethod
+    def _hashes(key):
+        value = int.from_bytes(
+            hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest(), "little"
+        )
+        return value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+
+    def add(self, key):
+        first, second = self._hashes(key)
+        data = self.data
+        size = self.size
+        for number in range(self.hashes):
+            position = (first + number * second) % size
+            data[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        first, second = self._hashes(key)
+        data = self.data
+        size = self.size
+        # 당첨된 적 없는 주소는 대부분 첫 번째나 두 번째 비트에서 끝남
+        for number in range(self.hashes):
+            position = (first + number * second) % size
+            if not data[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+
+class WinnerExclusion:
+    """
+    Entrants to leave out of a draw because they won one of the last `giveaways` giveaways
+    of the history store. A Bloom filter saved next to the history rules out almost every
+    entrant without touching the database; only the few it cannot rule out are confirmed
+    against the exact set of winners of those giveaways, so every entrant costs O(1) however
+    many giveaways the history holds.
+    The filter may also hold older giveaways (they only add entrants to confirm), so after a
+    draw its winners are just added, and the filter is rebuilt only when too many giveaways
+    outside the window have piled up or it is full.
+    """
+
+    def __init__(self, store, giveaways, path=None):
+        self.store = store
+        self.giveaways = giveaways
+        self.path = path or os.path.splitext(store.path)[0] + "_winners.bloom"
+        self._bloom = None
+        self._included = []  # 필터에 들어 있는 추첨 id
+
+    def _load(self):
+        """
+        Read the filter file: one json header line followed by the bits
+        """
+        try:
+            with open(self.path, "rb") as file:
+                header = json.loads(file.readline())
+                data = bytearray(file.read())
+        except (OSError, ValueError):
+            return
+        if header.get("version") != BLOOM_VERSION:
+            return
+        if len(data) != (header["size"] + 7) // 8:
+            return  # 쓰다가 잘린 파일은 새로 만듦
+        bloom = BloomFilter(header["capacity"], header["size"], header["hashes"], data)
+        bloom.count = header["count"]
+        self._bloom = bloom
+        self._included = header["giveaways"]
+
+    def _save(self):
+        bloom = self._bloom
+        header = {
+            "version": BLOOM_VERSION,
+            "capacity": bloom.capacity,
+            "size": bloom.size,
+            "hashes": bloom.hashes,
+            "count": bloom.count,
+            "giveaways": self._included,
+        }
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # 여러 프로세스가 동시에 쓸 수 있으므로 임시 파일에 쓰고 바꿔치기
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(json.dumps(header).encode("utf-8") + b"\n")
+                file.write(bloom.data)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _rebuild(self, window):
+        winners = self.store.winners_of(window)
+        bloom = BloomFilter(2 * len(winners))
+        for key in winners:
+            bloom.add(key)
+        self._bloom = bloom
+        self._included = list(window)
+
+    def _add_giveaways(self, giveaway_ids):
+        """
+        Add the winners of some giveaways to the loaded filter
+        :return: False if the filter would be too full (rebuild instead)
+        """
+        winners = self.store.winners_of(giveaway_ids)
+        if self._bloom.count + len(winners) > self._bloom.capacity:
+            return False
+        for key in winners:
+            self._bloom.add(key)
+        self._included.extend(
+            giveaway_id
+            for giveaway_id in giveaway_ids
+            if giveaway_id not in self._included
+        )
+        return True
+
+    def _refresh(self, window):
+        """
+        Make sure the filter holds the winners of every giveaway of the window
+        """
+        if self._bloom is None:
+            self._load()
+        if self._bloom is not None:
+            included = set(self._included)
+            missing = [
+                giveaway_id for giveaway_id in window if giveaway_id not in included
+            ]
+            outside = len(included) - (len(window) - len(missing))
+            if outside <= REBUILD_FACTOR * self.giveaways:
+                if not missing:
+                    return
+                if self._add_giveaways(missing):
+                    self._save()
+                    return
+        self._rebuild(window)
+        self._save()
+
+    def checker(self, current=None):
+        """
+        Function that tells whether one entrant won one of the last `giveaways` giveaways,
+        for checking entrants one at a time (streaming pipeline)
+        :param current: id of the giveaway being drawn, its own earlier winners are not excluded
+        :return: function(normalized address) -> bool
+        """
+        window = self.store.winner_giveaways(self.giveaways, exclude=current)
+        if not window:
+            return lambda key: False
+        self._refresh(window)
+        bloom = self._bloom
+        winners = None
+
+        def won(key):
+            nonlocal winners
+            if key not in bloom:
+                return False
+            if winners is None:
+                # 필터가 걸러내지 못한 주소가 처음 나올 때만 정확한 집합을 읽음
+                winners = set(self.store.winners_of(window))
+            return key in winners
+
+        return won
+
+    def excluded(self, keys, current=None):
+        """
+        Find the entrants that won one of the last `giveaways` giveaways
+        :param keys: normalized addresses of the entrants (HistoryStore.normalize),
+            current: see checker
+        :return: positions of the entrants to exclude
+        """
+        won = self.checker(current)
+        return [position for position, key in enumerate(keys) if won(key)]
+
+    def version(self, current=None):
+        """
+        Value that changes whenever a saved draw changes which entrants are excluded
+        :param current: see checker
+        :return: ids of the giveaways of the window, their winners (sorted)
+        """
+        window = self.store.winner_giveaways(self.giveaways, exclude=current)
+        return window, sorted(self.store.winners_of(window))
+
+    def add_draw(self, giveaway_id):
+        """
+        Add the winners of a finished draw to the saved filter
+        """
+        if self._bloom is None:
+            self._load()
+        if self._bloom is None:
+            return  # 다음 검사 때 기록에서 새로 만듦
+        if self._add_giveaways([giveaway_id]):
+            self._save()
@@ -0,0 +1,90 @@
+import queue
+import threading
+
+
+class StageCancelled(Exception):
+    """
+    Raised inside a running stage when the user pressed the cancel button
+    """
+
+
+class BackgroundRunner:
+    """
+    Run one pipeline stage at a time on a worker thread so the Tk mainloop keeps responding.
+    The worker never touches Tk: progress, results and errors are put on a queue that the
+    UI thread drains with root.after.
+    """
+
+    def __init__(self, root, on_progress=None, poll_interval=50):
+        self.root = root
+        self.on_progress = on_progress
+        self.poll_interval = poll_interval
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._last_percent = None
+
+    @property
+    def busy(self):
+        return self._thread is not None
+
+    def start(self, work, on_done, on_error):
+        """
+        Start a stage in the background
+        :param work: function run on the worker thread, on_done: called with its result on the UI thread,
+            on_error: called with the raised exception on the UI thread
+        :return: False if another stage is still running
+        """
+        if self.busy:
+            return False
+        self._cancel_event.clear()
+        self._last_percent = None
+        self._queue = queue.Queue()
+
+        def target(results=self._queue):
+            try:
+                results.put(("done", work()))
+            except BaseException as error:  # UI 스레드로 넘겨서 처리
+                results.put(("error", error))
+
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_interval, self._poll, on_done, on_error)
+        return True
+
+    def cancel(self):
+        """
+        Ask the running stage to stop at its next progress report
+        """
+        self._cancel_event.set()
+
+    def report(self, done, total):
+        """
+        Progress callback for the parser and stages, called on the worker thread
+        :param done: work done so far, total: total work
+        """
+        if self._cancel_event.is_set():
+            raise StageCancelled()
+        percent = int(done * 100 / total) if total else 100
+        if percent != self._last_percent:
+            # 같은 값은 다시 보내지 않아 queue가 쌓이지 않게 함
+            self._last_percent = percent
+            self._queue.put(("progress", percent))
+
+    def _poll(self, on_done, on_error):
+        try:
+            while True:
+                kind, value = self._queue.get_nowait()
+                if kind == "progress":
+                    if self.on_progress is not None:
+                        self.on_progress(value)
+                    continue
+                self._thread = None
+                if kind == "done":
+                    on_done(value)
+                else:
+                    on_error(value)
+                return
+        except queue.Empty:
+            pass
+        self.root.after(self.poll_interval, self._poll, on_done, on_error)